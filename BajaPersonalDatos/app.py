@@ -1,16 +1,37 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 from io import BytesIO
 from datetime import date
 
+from Comun.dates import parse_dates
+from Comun.excel import write_excel_bytes
+from Comun.ingest_cache import cached_read
+from Comun.workers import pool_load_message, run_in_pool
+
+try:
+    from BajaPersonalDatos.global_store import (
+        COL_DOCUMENTO,
+        documentos_validos,
+        get_global_store,
+        leer_excel_texto,
+        normalizar_documento,
+        store_available,
+    )
+except ImportError:
+    from global_store import (
+        COL_DOCUMENTO,
+        documentos_validos,
+        get_global_store,
+        leer_excel_texto,
+        normalizar_documento,
+        store_available,
+    )
 
-def _normalizar_fecha(series: pd.Series) -> pd.Series:
-    dt = pd.to_datetime(series, errors="coerce", dayfirst=True)
-    normalized = dt.dt.strftime("%Y-%m-%d")
-    invalid_mask = normalized.isna() | (normalized == "NaT")
-    if invalid_mask.any():
-        normalized.loc[invalid_mask] = series.loc[invalid_mask].astype(str).str.strip().str[:10]
-    return normalized.fillna("").replace({"NaT": "", "nan": "", "None": ""})
+
+COL_DNI = "DNI"
+FUENTE_ARCHIVO = "Subir archivo"
+FUENTE_ALMACEN = "Almacén local"
 
 
 def _filtrar_por_rango_fecha(df: pd.DataFrame, fecha_col: str | None, fecha_inicio: date | None, fecha_fin: date | None) -> pd.DataFrame:
@@ -19,14 +40,75 @@ def _filtrar_por_rango_fecha(df: pd.DataFrame, fecha_col: str | None, fecha_inic
     if not fecha_inicio or not fecha_fin:
         return df
 
-    fechas_norm = _normalizar_fecha(df[fecha_col])
-    fechas_dt = pd.to_datetime(fechas_norm, errors="coerce")
+    fechas_dt = parse_dates(df[fecha_col])[0].dt.normalize()
     inicio = pd.Timestamp(fecha_inicio)
     fin = pd.Timestamp(fecha_fin)
     mask = fechas_dt.notna() & (fechas_dt >= inicio) & (fechas_dt <= fin)
     return df[mask].copy()
 
 
+def _validar_columna(df: pd.DataFrame, col: str | None, mensaje: str) -> None:
+    if col and col not in df.columns:
+        raise ValueError(f"{mensaje} '{col}'. Columnas disponibles: {list(df.columns)}")
+
+
+def _validar_columnas(df_global, df_filtro, fecha_global_col=None, fecha_filtro_col=None) -> None:
+    _validar_columna(df_global, COL_DOCUMENTO, "En la DATA GLOBAL no se encontró la columna")
+    _validar_columna(df_filtro, COL_DNI, "En el archivo de DNIs no se encontró la columna")
+    _validar_columna(df_global, fecha_global_col, "En la DATA GLOBAL no se encontró la columna de fecha")
+    _validar_columna(df_filtro, fecha_filtro_col, "En el archivo de filtro no se encontró la columna de fecha")
+
+
+def _preparar_filtro(df_filtro, fecha_filtro_col, fecha_inicio, fecha_fin) -> pd.DataFrame:
+    df_filtro[COL_DNI] = normalizar_documento(df_filtro[COL_DNI])
+    return _filtrar_por_rango_fecha(df_filtro, fecha_filtro_col, fecha_inicio, fecha_fin)
+
+
+def _documento_en_lista(documentos: pd.Series, dnis: pd.Index) -> np.ndarray:
+    """Máscara de filas cuyo documento normalizado está en dnis.
+
+    Se normaliza cada documento distinto una sola vez (la DATA GLOBAL repite
+    documentos) y la pertenencia se resuelve con la tabla hash de dnis.
+    """
+    codigos, unicos = pd.factorize(documentos, use_na_sentinel=False)
+    normalizados = normalizar_documento(pd.Series(unicos, dtype=documentos.dtype))
+    return normalizados.isin(dnis).to_numpy(dtype=bool)[codigos]
+
+
+def _podar_global(df_global, dnis: pd.Index, fecha_global_col, fecha_inicio, fecha_fin) -> pd.DataFrame:
+    """Semi-join: solo las filas de la DATA GLOBAL con documento en la lista (y en el rango de fechas).
+
+    Se descartan los demás documentos antes de normalizar, interpretar fechas o
+    copiar columnas, así ese trabajo escala con las filas que coinciden y no con
+    el tamaño de la DATA GLOBAL.
+    """
+    df_global = df_global[_documento_en_lista(df_global[COL_DOCUMENTO], dnis)]
+    df_global = df_global.assign(**{COL_DOCUMENTO: normalizar_documento(df_global[COL_DOCUMENTO])})
+    return _filtrar_por_rango_fecha(df_global, fecha_global_col, fecha_inicio, fecha_fin)
+
+
+def _cruzar(df_global: pd.DataFrame, df_filtro: pd.DataFrame):
+    """(encontrados, no encontrados) entre la lista y una DATA GLOBAL ya podada a sus documentos."""
+    # Columna común para merge (las dos tablas ya son pequeñas)
+    df_global = df_global.assign(DNI_MERGE=df_global[COL_DOCUMENTO])
+    df_filtro = df_filtro.assign(DNI_MERGE=df_filtro[COL_DNI])
+
+    # Encontrados: inner join, en el orden de la lista y, por DNI, en el de la DATA GLOBAL
+    df_encontrados = df_filtro.merge(df_global, on="DNI_MERGE", how="inner").drop(columns="DNI_MERGE")
+
+    # No encontrados: DNIs de la lista que no quedaron en la DATA GLOBAL podada
+    # (una celda de DNI vacía nunca cruza y queda como no encontrada).
+    encontrados = pd.Index(documentos_validos(df_global[COL_DOCUMENTO]))
+    df_no_encontrados = (
+        df_filtro.loc[~df_filtro[COL_DNI].isin(encontrados), [COL_DNI]]
+        .drop_duplicates()
+        .reset_index(drop=True)
+    )
+    df_no_encontrados["MENSAJE"] = "DNI no se encontró en la data global filtrada"
+
+    return df_encontrados, df_no_encontrados
+
+
 def procesar_archivos(
     archivo_global,
     archivo_filtro,
@@ -36,77 +118,92 @@ def procesar_archivos(
     fecha_fin: date | None = None,
 ):
     # Leer Excels
-    df_global = pd.read_excel(archivo_global, dtype=str)
-    df_filtro = pd.read_excel(archivo_filtro, dtype=str)
-
-    col_global = "NRO. DOCUMENTO"
-    col_filtro = "DNI"
+    df_global = cached_read(archivo_global, leer_excel_texto, "BajaPersonalDatos", "dtype=str")
+    df_filtro = cached_read(archivo_filtro, leer_excel_texto, "BajaPersonalDatos", "dtype=str")
+    _validar_columnas(df_global, df_filtro, fecha_global_col, fecha_filtro_col)
 
-    # Validar columnas
-    if col_global not in df_global.columns:
-        raise ValueError(
-            f"En la DATA GLOBAL no se encontró la columna '{col_global}'. "
-            f"Columnas disponibles: {list(df_global.columns)}"
-        )
-    if col_filtro not in df_filtro.columns:
-        raise ValueError(
-            f"En el archivo de DNIs no se encontró la columna '{col_filtro}'. "
-            f"Columnas disponibles: {list(df_filtro.columns)}"
-        )
-    if fecha_global_col and fecha_global_col not in df_global.columns:
-        raise ValueError(
-            f"En la DATA GLOBAL no se encontró la columna de fecha '{fecha_global_col}'. "
-            f"Columnas disponibles: {list(df_global.columns)}"
-        )
-    if fecha_filtro_col and fecha_filtro_col not in df_filtro.columns:
-        raise ValueError(
-            f"En el archivo de filtro no se encontró la columna de fecha '{fecha_filtro_col}'. "
-            f"Columnas disponibles: {list(df_filtro.columns)}"
-        )
+    # Primero la lista (pequeña): normalizar, filtrar por fechas y armar el conjunto de DNIs.
+    df_filtro = _preparar_filtro(df_filtro, fecha_filtro_col, fecha_inicio, fecha_fin)
+    dnis = pd.Index(documentos_validos(df_filtro[COL_DNI]))
 
-    # Normalizar
-    df_global[col_global] = df_global[col_global].astype(str).str.strip()
-    df_filtro[col_filtro] = df_filtro[col_filtro].astype(str).str.strip()
+    # Luego la DATA GLOBAL, reducida a esos DNIs antes de cualquier otro trabajo.
+    df_global = _podar_global(df_global, dnis, fecha_global_col, fecha_inicio, fecha_fin)
+    return _cruzar(df_global, df_filtro)
 
-    # Filtrar por rango de fechas (si se configuró en cada archivo)
-    df_global = _filtrar_por_rango_fecha(df_global, fecha_global_col, fecha_inicio, fecha_fin)
-    df_filtro = _filtrar_por_rango_fecha(df_filtro, fecha_filtro_col, fecha_inicio, fecha_fin)
 
-    # Columna común para merge
-    df_global["DNI_MERGE"] = df_global[col_global]
-    df_filtro["DNI_MERGE"] = df_filtro[col_filtro]
+def procesar_con_almacen(
+    archivo_filtro,
+    fecha_filtro_col=None,
+    fecha_inicio: date | None = None,
+    fecha_fin: date | None = None,
+    filtrar_global_por_fecha: bool = False,
+):
+    """Como procesar_archivos, pero la DATA GLOBAL sale del almacén local (solo los DNIs de la lista)."""
+    df_filtro = cached_read(archivo_filtro, leer_excel_texto, "BajaPersonalDatos", "dtype=str")
+    _validar_columna(df_filtro, COL_DNI, "En el archivo de DNIs no se encontró la columna")
+    _validar_columna(df_filtro, fecha_filtro_col, "En el archivo de filtro no se encontró la columna de fecha")
+    df_filtro = _preparar_filtro(df_filtro, fecha_filtro_col, fecha_inicio, fecha_fin)
+    dnis = pd.Index(documentos_validos(df_filtro[COL_DNI]))
+
+    store = get_global_store()
+    if not store.manifest()["importaciones"]:
+        raise ValueError("El almacén de DATA GLOBAL está vacío. Importa una DATA GLOBAL primero.")
+    # El almacén ya aplica el semi-join (y el rango de fechas) al leer.
+    if filtrar_global_por_fecha:
+        df_global = store.buscar(dnis, fecha_inicio, fecha_fin)
+    else:
+        df_global = store.buscar(dnis)
+    df_global = _podar_global(df_global, dnis, None, None, None)
+    return _cruzar(df_global, df_filtro)
 
-    # Merge
-    df_merge = df_filtro.merge(
-        df_global,
-        on="DNI_MERGE",
-        how="left",
-        indicator=True
-    )
 
-    # Encontrados: nos quedamos solo con registros que hacen match
-    df_encontrados = df_merge[df_merge["_merge"] == "both"].copy()
+def importar_data_global(archivo_global, nombre: str, fecha_col: str | None) -> dict:
+    return get_global_store().importar(archivo_global, nombre, fecha_col)
 
-    # Eliminamos columnas auxiliares para que la data quede "limpia"
-    cols_aux = ["_merge", "DNI_MERGE"]
-    df_encontrados = df_encontrados.drop(columns=cols_aux, errors="ignore")
+def df_a_excel_bytes(df):
+    return BytesIO(run_in_pool(write_excel_bytes, df))
 
-    # No encontrados
-    df_no_encontrados = (
-        df_merge[df_merge["_merge"] == "left_only"][["DNI_MERGE"]]
-        .drop_duplicates()
-        .rename(columns={"DNI_MERGE": col_filtro})
-    )
-    df_no_encontrados["MENSAJE"] = "DNI no se encontró en la data global filtrada"
 
-    return df_encontrados, df_no_encontrados
+def _render_almacen() -> str | None:
+    """Estado del almacén local y formulario de importación. Devuelve la columna de fecha del almacén."""
+    resumen = get_global_store().resumen()
+    if resumen["importaciones"]:
+        rango = f", meses {resumen['desde']} a {resumen['hasta']}" if resumen["desde"] else ""
+        st.caption(
+            f"Almacén local: {resumen['filas']:,} filas de {resumen['importaciones']} importación(es){rango}."
+        )
+    else:
+        st.info("El almacén local está vacío. Importa una DATA GLOBAL para empezar.")
 
-def df_a_excel_bytes(df):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False)
-    output.seek(0)
-    return output
+    with st.expander("Importar DATA GLOBAL al almacén", expanded=not resumen["importaciones"]):
+        st.caption(
+            "Se importa una sola vez. Un global nuevo se agrega a lo importado: sus filas reemplazan "
+            "las del mismo documento y fecha (sin fecha, las del mismo documento) y el resto se conserva."
+        )
+        archivo = st.file_uploader("Excel de la DATA GLOBAL a importar", type=["xlsx"], key="global_importar")
+        if archivo is not None:
+            columnas = list(pd.read_excel(archivo, nrows=0).columns)
+            archivo.seek(0)
+            opciones = ["(Sin columna de fecha)"] + columnas
+            fecha_sel = st.selectbox(
+                "Columna de fecha para particionar por mes",
+                options=opciones,
+                index=opciones.index(resumen["fecha_col"]) if resumen["fecha_col"] in opciones else 0,
+                key="global_importar_fecha",
+            )
+            fecha_col = None if fecha_sel == "(Sin columna de fecha)" else fecha_sel
+            if st.button("Importar al almacén"):
+                try:
+                    with st.spinner("Importando DATA GLOBAL..."):
+                        resultado = run_in_pool(importar_data_global, archivo.getvalue(), archivo.name, fecha_col)
+                    if resultado["importado"]:
+                        st.success(f"Se importaron {resultado['filas']:,} filas ({len(resultado['meses'])} mes(es)).")
+                    else:
+                        st.info("Este archivo ya estaba importado.")
+                    resumen = get_global_store().resumen()
+                except Exception as e:
+                    st.error(f"Ocurrió un error: {e}")
+    return resumen["fecha_col"]
 
 
 def run_app():
@@ -123,34 +220,58 @@ def run_app():
     """
     )
 
+    usar_almacen = False
+    if store_available():
+        fuente = st.radio(
+            "Fuente de la DATA GLOBAL",
+            options=[FUENTE_ARCHIVO, FUENTE_ALMACEN],
+            horizontal=True,
+            help="El almacén local guarda la DATA GLOBAL ya importada: no hace falta subirla ni volver a leerla.",
+        )
+        usar_almacen = fuente == FUENTE_ALMACEN
+
     # Carga de archivos
-    archivo_global = st.file_uploader(
-        "Sube el Excel de la DATA GLOBAL (columna 'NRO. DOCUMENTO')",
-        type=["xlsx"],
-        key="global",
-    )
+    archivo_global = None
+    fecha_almacen_col = None
+    if usar_almacen:
+        fecha_almacen_col = _render_almacen()
+    else:
+        archivo_global = st.file_uploader(
+            "Sube el Excel de la DATA GLOBAL (columna 'NRO. DOCUMENTO')",
+            type=["xlsx"],
+            key="global",
+        )
     archivo_filtro = st.file_uploader(
         "Sube el Excel con la LISTA DE DNIs (columna 'DNI')",
         type=["xlsx"],
         key="filtro",
     )
 
-    if archivo_global is not None and archivo_filtro is not None:
-        df_global_preview = pd.read_excel(archivo_global, nrows=0)
-        archivo_global.seek(0)
+    if (archivo_global is not None or usar_almacen) and archivo_filtro is not None:
         df_filtro_preview = pd.read_excel(archivo_filtro, nrows=0)
         archivo_filtro.seek(0)
 
-        fecha_global_options = ["(No filtrar por fecha)"] + list(df_global_preview.columns)
         fecha_filtro_options = ["(No filtrar por fecha)"] + list(df_filtro_preview.columns)
 
         c1, c2 = st.columns(2)
         with c1:
-            fecha_global_sel = st.selectbox(
-                "Columna de fecha en DATA GLOBAL (opcional)",
-                options=fecha_global_options,
-                index=0,
-            )
+            if usar_almacen:
+                # En el almacén la fecha es la columna con la que se particionó al importar.
+                filtrar_global_por_fecha = st.checkbox(
+                    f"Filtrar DATA GLOBAL por fecha ({fecha_almacen_col or 'sin columna de fecha'})",
+                    value=False,
+                    disabled=fecha_almacen_col is None,
+                )
+                fecha_global_sel = "(No filtrar por fecha)"
+            else:
+                df_global_preview = pd.read_excel(archivo_global, nrows=0)
+                archivo_global.seek(0)
+                fecha_global_options = ["(No filtrar por fecha)"] + list(df_global_preview.columns)
+                fecha_global_sel = st.selectbox(
+                    "Columna de fecha en DATA GLOBAL (opcional)",
+                    options=fecha_global_options,
+                    index=0,
+                )
         with c2:
             fecha_filtro_sel = st.selectbox(
                 "Columna de fecha en archivo de DNIs (opcional)",
@@ -172,19 +293,35 @@ def run_app():
         if fecha_inicio > fecha_fin:
             st.warning("La fecha inicial no puede ser mayor que la fecha final.")
 
+        load_message = pool_load_message()
+        if load_message:
+            st.caption(load_message)
+
         if st.button("Procesar archivos"):
             try:
                 if fecha_inicio > fecha_fin:
                     raise ValueError("La fecha inicial no puede ser mayor que la fecha final.")
 
-                df_encontrados, df_no_encontrados = procesar_archivos(
-                    archivo_global,
-                    archivo_filtro,
-                    fecha_global_col=fecha_global_col,
-                    fecha_filtro_col=fecha_filtro_col,
-                    fecha_inicio=fecha_inicio,
-                    fecha_fin=fecha_fin,
-                )
+                # Se envian los bytes (no el UploadedFile) al pool de procesos compartido.
+                if usar_almacen:
+                    df_encontrados, df_no_encontrados = run_in_pool(
+                        procesar_con_almacen,
+                        archivo_filtro.getvalue(),
+                        fecha_filtro_col=fecha_filtro_col,
+                        fecha_inicio=fecha_inicio,
+                        fecha_fin=fecha_fin,
+                        filtrar_global_por_fecha=filtrar_global_por_fecha,
+                    )
+                else:
+                    df_encontrados, df_no_encontrados = run_in_pool(
+                        procesar_archivos,
+                        archivo_global.getvalue(),
+                        archivo_filtro.getvalue(),
+                        fecha_global_col=fecha_global_col,
+                        fecha_filtro_col=fecha_filtro_col,
+                        fecha_inicio=fecha_inicio,
+                        fecha_fin=fecha_fin,
+                    )
 
                 st.success("Procesamiento completado.")
 
@@ -0,0 +1,310 @@
+"""
+Almacén local de la DATA GLOBAL en Parquet, para no volver a leer el Excel en cada proceso.
+
+La DATA GLOBAL se importa una vez (texto, como dtype=str en pd.read_excel) y se
+guarda en un archivo Parquet por mes de la columna de fecha elegida al importar
+(mes=AAAA-MM; las filas sin fecha van a mes=sin_fecha). Dentro de cada archivo
+las filas se ordenan por el documento normalizado, así las estadísticas de cada
+grupo de filas sirven de índice: buscar una lista de DNIs solo lee los grupos
+que pueden contenerlos, y un rango de fechas solo abre los meses que lo cubren.
+
+Importar una DATA GLOBAL nueva agrega sus filas a las particiones que toca: las
+filas de un mismo documento y fecha reemplazan a las que ya había (en las filas
+sin fecha, las del mismo documento) y el resto se conserva, de modo que los
+globales mensuales se agregan sin duplicar filas aunque se crucen de mes.
+Volver a importar el mismo archivo no hace nada. Requiere pyarrow (store_available).
+La ruta se toma de AQUANQA_GLOBAL_STORE (por defecto ~/.aquanqa/data_global).
+"""
+
+import importlib.util
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from Comun.dates import parse_dates
+from Comun.ingest_cache import cached_read, file_digest
+
+
+STORE_DIR_ENV = "AQUANQA_GLOBAL_STORE"
+DEFAULT_STORE_DIR = Path.home() / ".aquanqa" / "data_global"
+COL_DOCUMENTO = "NRO. DOCUMENTO"
+SIN_FECHA = "sin_fecha"
+ROW_GROUP_ROWS = 50_000
+
+_DOC_KEY = "_doc"
+_FECHA_KEY = "_fecha"
+_ORDEN_KEY = "_orden"
+_MANIFEST = "manifest.json"
+_LOCK = ".lock"
+
+
+def store_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def normalizar_documento(valores: pd.Series) -> pd.Series:
+    """Documento como texto sin espacios en los extremos (igual en la DATA GLOBAL y en la lista).
+
+    Las celdas vacías (nulos o solo espacios) quedan como None, nunca como "nan".
+    """
+    texto = valores.astype(str).str.strip().astype(object)
+    return texto.where(valores.notna() & (texto != ""), None)
+
+
+def documentos_validos(documentos) -> list[str]:
+    """Documentos distintos ya normalizados, sin nulos ni vacíos, en orden."""
+    return sorted({doc for doc in documentos if isinstance(doc, str) and doc})
+
+
+def leer_excel_texto(buffer) -> pd.DataFrame:
+    return pd.read_excel(buffer, dtype=str)
+
+
+@contextmanager
+def _bloqueo_archivo(path: Path):
+    """Bloqueo exclusivo entre procesos sobre path (las importaciones corren en el pool)."""
+    with open(path, "a+b") as handle:
+        if os.name == "nt":
+            import msvcrt
+
+            handle.seek(0)
+            # LK_LOCK reintenta por unos segundos; se repite hasta obtener el bloqueo.
+            while True:
+                try:
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def _meses_en_rango(meses: list[str], fecha_inicio: date, fecha_fin: date) -> list[str]:
+    desde, hasta = fecha_inicio.strftime("%Y-%m"), fecha_fin.strftime("%Y-%m")
+    return [mes for mes in meses if desde <= mes <= hasta]
+
+
+def _combinar(anteriores: list[str], parte: pd.DataFrame) -> pd.DataFrame:
+    """Filas de la partición con las de parte, que reemplazan a las anteriores de la misma llave.
+
+    La llave es (documento, fecha): un global que trae a una persona en un día reemplaza
+    las filas que ya había de esa persona en ese día y conserva todo lo demás. En las filas
+    sin fecha la llave queda en el documento.
+    """
+    if not anteriores:
+        return parte
+    import pyarrow.parquet as pq
+
+    previas = pd.concat([pq.read_table(path).to_pandas() for path in anteriores], ignore_index=True)
+    llave = [_DOC_KEY, _FECHA_KEY]
+    repetidas = pd.MultiIndex.from_frame(previas[llave]).isin(pd.MultiIndex.from_frame(parte[llave]))
+    return pd.concat([previas.loc[~repetidas], parte], ignore_index=True)
+
+
+class GlobalStore:
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+
+    def manifest(self) -> dict:
+        path = self.root / _MANIFEST
+        if not path.exists():
+            return {
+                "fecha_col": None, "columnas": [], "siguiente_fila": 0, "importaciones": [], "meses": {},
+                "sin_fecha": [],
+            }
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+        # Los manifest anteriores guardaban las filas sin fecha como un mes más.
+        sin_fecha = manifest.setdefault("sin_fecha", [])
+        if SIN_FECHA in manifest["meses"]:
+            sin_fecha.append(manifest["meses"].pop(SIN_FECHA))
+        return manifest
+
+    def _archivos(self, manifest: dict, meses: list[str], sin_fecha: bool) -> list[str]:
+        archivos = [manifest["meses"][mes]["archivo"] for mes in meses]
+        if sin_fecha:
+            archivos += [parte["archivo"] for parte in manifest["sin_fecha"]]
+        return [str(self.root / archivo) for archivo in archivos]
+
+    def _guardar_manifest(self, manifest: dict) -> None:
+        # Se escribe aparte y se reemplaza, así una lectura nunca ve un manifest a medias.
+        path = self.root / _MANIFEST
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def resumen(self) -> dict:
+        manifest = self.manifest()
+        meses = sorted(manifest["meses"])
+        particiones = [*manifest["meses"].values(), *manifest["sin_fecha"]]
+        return {
+            "filas": sum(particion["filas"] for particion in particiones),
+            "importaciones": len(manifest["importaciones"]),
+            "fecha_col": manifest["fecha_col"],
+            "desde": meses[0] if meses else None,
+            "hasta": meses[-1] if meses else None,
+        }
+
+    def _schema(self, columnas: list[str]):
+        import pyarrow as pa
+
+        return pa.schema(
+            [pa.field(col, pa.string()) for col in columnas]
+            + [
+                pa.field(_DOC_KEY, pa.string()),
+                pa.field(_FECHA_KEY, pa.timestamp("ns")),
+                pa.field(_ORDEN_KEY, pa.int64()),
+            ]
+        )
+
+    def importar(self, archivo, nombre: str, fecha_col: str | None) -> dict:
+        """Importa una DATA GLOBAL (bytes o archivo); devuelve {"importado", "filas", "meses"}.
+
+        Toda la importación (leer el manifest, escribir las partes, reemplazarlo) se hace con
+        el bloqueo del almacén, así dos importaciones a la vez no pierden la una a la otra.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        with _bloqueo_archivo(self.root / _LOCK):
+            return self._importar(archivo, nombre, fecha_col)
+
+    def _importar(self, archivo, nombre: str, fecha_col: str | None) -> dict:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        digest = file_digest(archivo)
+        manifest = self.manifest()
+        if any(item["digest"] == digest for item in manifest["importaciones"]):
+            return {"importado": False, "filas": 0, "meses": []}
+        if manifest["importaciones"] and fecha_col != manifest["fecha_col"]:
+            raise ValueError(
+                f"El almacén se particionó por la columna de fecha '{manifest['fecha_col']}'; "
+                "importa la DATA GLOBAL con esa misma columna."
+            )
+
+        df = cached_read(archivo, leer_excel_texto, "BajaPersonalDatos", "dtype=str")
+        if COL_DOCUMENTO not in df.columns:
+            raise ValueError(
+                f"En la DATA GLOBAL no se encontró la columna '{COL_DOCUMENTO}'. "
+                f"Columnas disponibles: {list(df.columns)}"
+            )
+        if fecha_col and fecha_col not in df.columns:
+            raise ValueError(
+                f"En la DATA GLOBAL no se encontró la columna de fecha '{fecha_col}'. "
+                f"Columnas disponibles: {list(df.columns)}"
+            )
+
+        columnas = [str(col) for col in df.columns]
+        df = df.astype(object).where(df.notna(), None)
+        df.columns = columnas
+        if fecha_col:
+            fechas = parse_dates(df[fecha_col])[0].dt.normalize()
+        else:
+            fechas = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+        meses = fechas.dt.strftime("%Y-%m").where(fechas.notna(), SIN_FECHA)
+        df[_DOC_KEY] = normalizar_documento(df[COL_DOCUMENTO])
+        df[_FECHA_KEY] = fechas.astype("datetime64[ns]")
+        df[_ORDEN_KEY] = manifest["siguiente_fila"] + np.arange(len(df), dtype=np.int64)
+
+        columnas_store = list(dict.fromkeys(manifest["columnas"] + columnas))
+        schema = self._schema(columnas_store)
+        nuevos, reemplazados = {}, []
+        for mes, parte in df.groupby(meses, sort=True):
+            anteriores = self._archivos(manifest, [mes] if mes in manifest["meses"] else [], mes == SIN_FECHA)
+            parte = _combinar(anteriores, parte).reindex(columns=schema.names)
+            carpeta = self.root / f"mes={mes}"
+            carpeta.mkdir(parents=True, exist_ok=True)
+            relativo = f"mes={mes}/parte-{digest[:16]}.parquet"
+            parte = parte.sort_values([_DOC_KEY, _ORDEN_KEY], kind="stable")
+            tabla = pa.Table.from_pandas(parte, schema=schema, preserve_index=False)
+            tmp = self.root / f"{relativo}.tmp"
+            pq.write_table(tabla, tmp, row_group_size=ROW_GROUP_ROWS)
+            os.replace(tmp, self.root / relativo)
+            nuevos[mes] = {"archivo": relativo, "filas": len(parte)}
+            reemplazados += anteriores
+
+        sin_fecha = nuevos.pop(SIN_FECHA, None)
+        if sin_fecha is not None:
+            manifest["sin_fecha"] = [{**sin_fecha, "digest": digest}]
+        manifest["meses"].update(nuevos)
+        manifest["fecha_col"] = fecha_col
+        manifest["columnas"] = columnas_store
+        manifest["siguiente_fila"] += len(df)
+        meses_importados = sorted(nuevos) + ([SIN_FECHA] if sin_fecha else [])
+        manifest["importaciones"].append(
+            {
+                "digest": digest,
+                "archivo": nombre,
+                "importado": datetime.now().isoformat(timespec="seconds"),
+                "filas": len(df),
+                "meses": meses_importados,
+            }
+        )
+        self._guardar_manifest(manifest)
+        for path in reemplazados:
+            Path(path).unlink(missing_ok=True)
+        return {"importado": True, "filas": len(df), "meses": meses_importados}
+
+    def buscar(
+        self, documentos, fecha_inicio: date | None = None, fecha_fin: date | None = None
+    ) -> pd.DataFrame:
+        """Filas cuyo documento normalizado está en documentos (y la fecha en el rango, si se da).
+
+        Las columnas y el orden de filas son los de la DATA GLOBAL importada.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        manifest = self.manifest()
+        columnas = manifest["columnas"]
+        meses = list(manifest["meses"])
+        por_fecha = fecha_inicio is not None and fecha_fin is not None
+        if por_fecha:
+            meses = _meses_en_rango(meses, fecha_inicio, fecha_fin)
+        # Las filas sin fecha nunca caen en un rango de fechas.
+        archivos = self._archivos(manifest, meses, sin_fecha=not por_fecha)
+        documentos = pa.array(documentos_validos(documentos), pa.string())
+        if not archivos or not len(documentos):
+            return pd.DataFrame(columns=columnas, dtype=object)
+
+        dataset = ds.dataset(
+            archivos,
+            schema=self._schema(columnas),
+            format="parquet",
+        )
+        filtro = ds.field(_DOC_KEY).isin(documentos)
+        if por_fecha:
+            inicio = pa.scalar(pd.Timestamp(fecha_inicio).to_pydatetime(), pa.timestamp("ns"))
+            fin = pa.scalar(pd.Timestamp(fecha_fin).to_pydatetime(), pa.timestamp("ns"))
+            filtro &= (ds.field(_FECHA_KEY) >= inicio) & (ds.field(_FECHA_KEY) <= fin)
+        tabla = dataset.to_table(columns=columnas + [_ORDEN_KEY], filter=filtro)
+        df = tabla.to_pandas().sort_values(_ORDEN_KEY, kind="stable")
+        return df.drop(columns=_ORDEN_KEY).reset_index(drop=True).astype(object)
+
+
+_default_store: GlobalStore | None = None
+_default_store_lock = threading.Lock()
+
+
+def get_global_store() -> GlobalStore:
+    """Almacén en la ruta configurada (el mismo para el servidor y los procesos del pool)."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = GlobalStore(os.environ.get(STORE_DIR_ENV) or DEFAULT_STORE_DIR)
+        return _default_store
@@ -0,0 +1,172 @@
+"""Normalizacion de fechas compartida por las herramientas.
+
+parse_dates interpreta una columna una sola vez: factoriza los valores crudos,
+resuelve cada valor distinto (fechas ya tipadas, numeros de serie de Excel y
+textos con formato inferido una vez por columna) y devuelve la columna tipada
+datetime64 junto con el texto "YYYY-MM-DD" que se muestra en pantalla. El
+resultado queda en un cache pequeno por contenido de columna, de modo que las
+distintas etapas de una misma carga no vuelven a parsear la misma columna. Cada
+entrada guarda dos arreglos del largo de la columna, asi que el cache se acota
+por bytes (_CACHE_MAX_BYTES) ademas de por cantidad de columnas.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+
+DISPLAY_FORMAT = "%Y-%m-%d"
+EXCEL_EPOCH = pd.Timestamp("1899-12-30")
+# Solo se interpretan como serie de Excel los numeros entre 1950-01-01 y 2099-12-31.
+EXCEL_SERIAL_RANGE = (18264, 73050)
+EXCEL_SERIAL_TEXT = re.compile(r"^\d{5}(?:\.0+)?$")
+ISO_LIKE_TEXT = re.compile(r"^\d{4}[-/.]")
+NULL_TEXTS = {"", "nan", "nat", "none"}
+
+_CACHE_SIZE = 16
+_CACHE_MAX_BYTES = 64 * 1024 * 1024
+_cache: OrderedDict[str, tuple[np.ndarray, np.ndarray]] = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+
+
+def _excel_serial_to_timestamp(value: float) -> pd.Timestamp:
+    low, high = EXCEL_SERIAL_RANGE
+    if not low <= value <= high:
+        return pd.NaT
+    return EXCEL_EPOCH + pd.Timedelta(days=float(value))
+
+
+def _parse_texts(texts: list[str], formats: dict | None = None) -> list:
+    """Parsea textos distintos infiriendo el formato una vez por familia (ISO / dia primero).
+
+    Con formats se usa el formato ya inferido de cada familia y se agregan los que falten.
+    """
+    if not texts:
+        return []
+    series = pd.Series(texts, dtype=object)
+    iso_like = series.str.match(ISO_LIKE_TEXT).to_numpy(dtype=bool)
+    parsed = pd.Series(pd.NaT, index=series.index, dtype="datetime64[ns]")
+    for mask, dayfirst in ((iso_like, False), (~iso_like, True)):
+        subset = series[mask]
+        if subset.empty:
+            continue
+        family = "dayfirst" if dayfirst else "iso"
+        if formats is not None and family in formats:
+            fmt = formats[family]
+        else:
+            fmt = guess_datetime_format(subset.iloc[0], dayfirst=dayfirst)
+            if formats is not None:
+                formats[family] = fmt
+        if fmt:
+            subset_parsed = pd.to_datetime(subset, format=fmt, errors="coerce")
+        else:
+            subset_parsed = pd.Series(pd.NaT, index=subset.index, dtype="datetime64[ns]")
+        pending = subset_parsed.isna()
+        if pending.any():
+            # Archivos con formatos mezclados: solo lo que no calzo con el formato inferido.
+            subset_parsed[pending] = pd.to_datetime(
+                subset[pending], format="mixed", dayfirst=dayfirst, errors="coerce"
+            )
+        parsed[mask] = subset_parsed.astype("datetime64[ns]")
+    return parsed.tolist()
+
+
+def _parse_distinct(uniques: np.ndarray, formats: dict | None = None) -> tuple[np.ndarray, np.ndarray]:
+    parsed = np.full(len(uniques), pd.NaT, dtype=object)
+    texts: list[str] = []
+    text_positions: list[int] = []
+    for position, value in enumerate(uniques):
+        if isinstance(value, (pd.Timestamp, datetime, date, np.datetime64)):
+            timestamp = pd.Timestamp(value)
+            parsed[position] = timestamp.tz_localize(None) if timestamp.tz else timestamp
+        elif isinstance(value, (int, float, np.number)) and not isinstance(value, (bool, np.bool_)):
+            if not pd.isna(value):
+                parsed[position] = _excel_serial_to_timestamp(value)
+        elif isinstance(value, str):
+            text = value.strip()
+            if text.lower() in NULL_TEXTS:
+                continue
+            if EXCEL_SERIAL_TEXT.match(text):
+                parsed[position] = _excel_serial_to_timestamp(float(text))
+            else:
+                texts.append(text)
+                text_positions.append(position)
+    for position, timestamp in zip(text_positions, _parse_texts(texts, formats)):
+        parsed[position] = timestamp
+
+    display = np.empty(len(uniques), dtype=object)
+    for position, (value, timestamp) in enumerate(zip(uniques, parsed)):
+        if not pd.isna(timestamp):
+            display[position] = timestamp.strftime(DISPLAY_FORMAT)
+            continue
+        # Igual que antes: si no se reconoce la fecha se muestran los primeros 10 caracteres.
+        text = "" if pd.isna(value) else str(value).strip()[:10]
+        display[position] = "" if text.lower() in NULL_TEXTS else text
+    values = pd.to_datetime(pd.Series(parsed, dtype=object), errors="coerce")
+    return values.to_numpy(dtype="datetime64[ns]"), display
+
+
+def _column_key(series: pd.Series) -> str:
+    hashes = pd.util.hash_pandas_object(series, index=False).to_numpy()
+    digest = hashlib.sha1(hashes.tobytes()).hexdigest()
+    return f"{series.dtype}:{len(series)}:{digest}"
+
+
+def _entry_bytes(entry: tuple[np.ndarray, np.ndarray]) -> int:
+    # El texto de cada fila es una referencia a uno de los textos distintos: se cuenta el puntero.
+    values, display = entry
+    return values.nbytes + display.nbytes
+
+
+def _remember(key: str, entry: tuple[np.ndarray, np.ndarray]) -> None:
+    """Guarda entry y expulsa las columnas usadas hace mas tiempo hasta caber en el presupuesto."""
+    global _cache_bytes
+    size = _entry_bytes(entry)
+    if size > _CACHE_MAX_BYTES:
+        return
+    with _cache_lock:
+        previous = _cache.pop(key, None)
+        if previous is not None:
+            _cache_bytes -= _entry_bytes(previous)
+        _cache[key] = entry
+        _cache_bytes += size
+        while len(_cache) > _CACHE_SIZE or _cache_bytes > _CACHE_MAX_BYTES:
+            _, evicted = _cache.popitem(last=False)
+            _cache_bytes -= _entry_bytes(evicted)
+
+
+def parse_dates(series: pd.Series, formats: dict | None = None) -> tuple[pd.Series, pd.Series]:
+    """Devuelve (fechas datetime64, texto YYYY-MM-DD) con el mismo indice que series.
+
+    Los valores que no son fecha quedan como NaT y su texto conserva los primeros
+    10 caracteres del valor original (vacio para nulos). formats guarda el formato
+    inferido por familia de texto: pasar el mismo dict en cada bloque de un archivo
+    hace que todos usen el formato del primero (y no lo vuelvan a inferir).
+    """
+    key = _column_key(series)
+    if formats:
+        key = f"{key}:{sorted(formats.items())}"
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+    if cached is None:
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        uniques = np.append(np.asarray(uniques, dtype=object), np.array([None], dtype=object))
+        unique_values, unique_display = _parse_distinct(uniques, formats)
+        # El codigo -1 (nulos) apunta al ultimo elemento del diccionario.
+        cached = (unique_values[codes], unique_display[codes])
+        _remember(key, cached)
+
+    values, display = cached
+    return (
+        pd.Series(values, index=series.index, name=series.name),
+        pd.Series(display, index=series.index, name=series.name, dtype=object),
+    )
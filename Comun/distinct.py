@@ -0,0 +1,34 @@
+"""Valores distintos de una columna, separados por tipo.
+
+pd.factorize junta los valores que son iguales para Python aunque su tipo no lo
+sea (1, 1.0 y True; 100 y 100.0), pero su texto no es el mismo ("1", "1.0",
+"True"). Las herramientas que evaluan cada valor distinto una sola vez y
+reparten el resultado por codigo usan factorize_typed para no mezclarlos.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+_type_of = np.frompyfunc(type, 1, 1)
+_SINGLE_KIND = {"string", "empty"}
+
+
+def factorize_typed(values) -> tuple[np.ndarray, np.ndarray]:
+    """(codigo por fila, primer valor de cada codigo como object); los nulos llevan -1.
+
+    Dos valores comparten codigo solo si son iguales y del mismo tipo.
+    """
+    codes, uniques = pd.factorize(values)
+    uniques = np.asarray(uniques, dtype=object)
+    # Una columna de solo textos no puede tener valores juntados de distinto tipo.
+    if values.dtype != object or pd.api.types.infer_dtype(values, skipna=True) in _SINGLE_KIND:
+        return codes, uniques
+    objects = np.asarray(values, dtype=object)
+    types, _ = pd.factorize(_type_of(objects))
+    valid = codes >= 0
+    key = codes[valid].astype(np.int64) * (int(types.max(initial=0)) + 1) + types[valid]
+    codes = np.full(len(objects), -1, dtype=np.int64)
+    codes[valid], _ = pd.factorize(key)
+    _, first = np.unique(codes[valid], return_index=True)
+    return codes, objects[valid][first]
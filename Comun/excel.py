@@ -0,0 +1,277 @@
+"""Lectura de Excel (.xlsx) por partes: hojas, encabezado y solo las columnas usadas.
+
+- list_sheet_names lee los nombres desde xl/workbook.xml, sin abrir las hojas.
+- read_sheet_preview trae el encabezado y las primeras filas (para configurar).
+- read_sheet_columns carga solo las columnas pedidas. Usa python-calamine si esta
+  instalado; si no, recorre la hoja con openpyxl en modo read-only y guarda solo
+  las celdas de esas columnas.
+- iter_sheet_chunks recorre la hoja por bloques de filas, para no tenerla entera en memoria.
+
+Los valores se convierten igual que en pd.read_excel(engine="openpyxl"), asi que
+el resultado es equivalente a leer la hoja completa y luego seleccionar columnas.
+
+write_excel_bytes arma el .xlsx de descarga a partir de un DataFrame, escribiendo
+por bloques (openpyxl write-only); write_excel_sheets_bytes hace lo mismo con varias hojas.
+"""
+
+import importlib.util
+import io
+import os
+import zipfile
+from collections.abc import Callable
+from xml.etree import ElementTree
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+
+_WORKBOOK_XML = "xl/workbook.xml"
+_SHEET_TAG = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}sheet"
+
+
+def _to_buffer(file) -> io.BytesIO:
+    """BytesIO independiente del archivo subido (no mueve su posicion para otros lectores)."""
+    if isinstance(file, (bytes, bytearray)):
+        return io.BytesIO(file)
+    if hasattr(file, "getvalue"):
+        return io.BytesIO(file.getvalue())
+    if hasattr(file, "seek"):
+        file.seek(0)
+    return io.BytesIO(file.read())
+
+
+def has_fast_engine() -> bool:
+    # pd.read_excel(engine="calamine") existe desde pandas 2.2.
+    pandas_version = tuple(int(part) for part in pd.__version__.split(".")[:2])
+    return pandas_version >= (2, 2) and importlib.util.find_spec("python_calamine") is not None
+
+
+def list_sheet_names(file) -> list[str]:
+    """Nombres de hojas en orden, leidos de la metadata del libro."""
+    buffer = _to_buffer(file)
+    try:
+        with zipfile.ZipFile(buffer) as archive, archive.open(_WORKBOOK_XML) as workbook:
+            return [
+                element.attrib["name"]
+                for _, element in ElementTree.iterparse(workbook)
+                if element.tag == _SHEET_TAG
+            ]
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError):
+        buffer.seek(0)
+        return pd.ExcelFile(buffer, engine="openpyxl").sheet_names
+
+
+def _open_sheet(buffer: io.BytesIO, sheet_name):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(buffer, read_only=True, data_only=True)
+    if isinstance(sheet_name, int):
+        return workbook, workbook.worksheets[sheet_name]
+    return workbook, workbook[sheet_name]
+
+
+def read_sheet_preview(file, sheet_name=0, nrows: int = 500) -> tuple[pd.DataFrame, int | None]:
+    """Encabezado + primeras nrows filas, y cantidad de filas de datos segun la metadata."""
+    buffer = _to_buffer(file)
+    preview = pd.read_excel(buffer, sheet_name=sheet_name, nrows=nrows, engine="openpyxl")
+    buffer.seek(0)
+    workbook, sheet = _open_sheet(buffer, sheet_name)
+    try:
+        max_row = sheet.max_row
+    finally:
+        workbook.close()
+    total_rows = max(int(max_row) - 1, len(preview)) if max_row else None
+    return preview, total_rows
+
+
+def _convert_value(value):
+    # Misma conversion que el lector openpyxl de pandas.
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        as_int = int(value)
+        return as_int if as_int == value else float(value)
+    if isinstance(value, str) and value in _ERROR_VALUES:
+        return np.nan
+    return value
+
+
+def _error_values() -> frozenset[str]:
+    try:
+        from openpyxl.cell.cell import ERROR_CODES
+    except ImportError:
+        return frozenset()
+    return frozenset(ERROR_CODES)
+
+
+_ERROR_VALUES = _error_values()
+try:
+    from pandas._libs.parsers import STR_NA_VALUES as _NA_TEXTS
+except ImportError:
+    _NA_TEXTS = {"", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND",
+                 "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"}
+PROGRESS_EVERY_ROWS = 5000
+
+
+def _iter_projected_rows(rows, positions: list[int]):
+    """Celdas convertidas de las columnas pedidas; no entrega las filas vacias del final.
+
+    Como en pd.read_excel, una fila es vacia solo si lo es entera: una fila del final
+    con datos en otras columnas (ej. totales) se entrega aunque lo proyectado este vacio.
+    """
+    pending_empty = []
+    for row in rows:
+        width = len(row)
+        converted = [
+            _convert_value(row[position]) if position < width else ""
+            for position in positions
+        ]
+        if any(value is not None and value != "" for value in row):
+            yield from pending_empty
+            pending_empty.clear()
+            yield converted
+        else:
+            pending_empty.append(converted)
+
+
+def _read_columns_openpyxl(
+    buffer: io.BytesIO,
+    sheet_name,
+    columns: list,
+    on_rows: Callable[[int], None] | None = None,
+) -> pd.DataFrame:
+    workbook, sheet = _open_sheet(buffer, sheet_name)
+    try:
+        sheet.reset_dimensions()
+        rows = sheet.iter_rows(values_only=True)
+        header_row = next(rows, None)
+        if header_row is None:
+            return pd.DataFrame(columns=columns)
+        positions = _column_positions(header_row, columns)
+        data = [list(columns)]
+        for converted in _iter_projected_rows(rows, positions):
+            data.append(converted)
+            if on_rows is not None and len(data) % PROGRESS_EVERY_ROWS == 0:
+                on_rows(len(data) - 1)
+    finally:
+        workbook.close()
+    return TextParser(data, header=0).read()
+
+
+def _header_names(header_row: tuple) -> list:
+    names = [_convert_value(value) for value in header_row]
+    # Mismos nombres que pd.read_excel: celdas vacias -> "Unnamed: i", duplicados -> "x.1".
+    return list(TextParser([names], header=0).read().columns)
+
+
+def _column_positions(header_row: tuple, columns: list) -> list[int]:
+    parsed_names = _header_names(header_row)
+    positions = []
+    for column in columns:
+        matches = [index for index, name in enumerate(parsed_names) if name == column]
+        if not matches:
+            raise ValueError(f"No se encontro la columna '{column}' en la hoja.")
+        positions.append(matches[0])
+    return positions
+
+
+def read_sheet_columns(
+    file,
+    sheet_name=0,
+    columns: list | None = None,
+    on_rows: Callable[[int], None] | None = None,
+) -> pd.DataFrame:
+    """Carga solo columns (todas si es None), en ese orden.
+
+    on_rows(filas_leidas) se llama cada PROGRESS_EVERY_ROWS filas cuando la lectura
+    es fila a fila (openpyxl); los motores que leen en bloque no lo llaman.
+    """
+    buffer = _to_buffer(file)
+    if columns is None:
+        engine = "calamine" if has_fast_engine() else "openpyxl"
+        return pd.read_excel(buffer, sheet_name=sheet_name, engine=engine)
+    if has_fast_engine():
+        return pd.read_excel(buffer, sheet_name=sheet_name, engine="calamine", usecols=list(columns))[
+            list(columns)
+        ]
+    return _read_columns_openpyxl(buffer, sheet_name, list(columns), on_rows=on_rows)
+
+
+def iter_sheet_chunks(file, sheet_name=0, columns: list | None = None, chunk_rows: int = 50_000):
+    """Recorre la hoja en bloques de chunk_rows filas (DataFrames de tipo object).
+
+    file puede ser una ruta (se lee del disco sin cargar el libro entero) o un
+    archivo/bytes. Las celdas vacias quedan como NaN. A diferencia de
+    read_sheet_columns no se infiere el tipo de cada columna sobre todo el archivo:
+    cada celda conserva su valor (un entero sigue entero aunque la columna tenga vacios).
+    """
+    source = file if isinstance(file, (str, os.PathLike)) else _to_buffer(file)
+    workbook, sheet = _open_sheet(source, sheet_name)
+    try:
+        sheet.reset_dimensions()
+        rows = sheet.iter_rows(values_only=True)
+        header_row = next(rows, None)
+        if header_row is None:
+            return
+        columns = list(columns) if columns is not None else _header_names(header_row)
+        positions = _column_positions(header_row, columns)
+        chunk = []
+        for converted in _iter_projected_rows(rows, positions):
+            chunk.append([np.nan if isinstance(value, str) and value in _NA_TEXTS else value for value in converted])
+            if len(chunk) >= chunk_rows:
+                yield pd.DataFrame(chunk, columns=columns, dtype=object)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=columns, dtype=object)
+    finally:
+        workbook.close()
+
+
+# Filas que se convierten a valores de celda por vez al escribir.
+WRITE_CHUNK_ROWS = 10_000
+
+
+def _header_cells(worksheet, columns) -> list:
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+
+    # Mismo estilo de encabezado que DataFrame.to_excel.
+    thin = Side(style="thin")
+    cells = []
+    for column in columns:
+        cell = WriteOnlyCell(worksheet, value=str(column))
+        cell.font = Font(bold=True)
+        cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+        cell.alignment = Alignment(horizontal="center", vertical="top")
+        cells.append(cell)
+    return cells
+
+
+def write_excel_bytes(df: pd.DataFrame, sheet_name: str = "Sheet1") -> bytes:
+    """Escribe df en un .xlsx en memoria (sin indice). Es picklable para correr en el pool.
+
+    Usa openpyxl en modo write-only: las filas se escriben por bloques y el libro
+    no guarda objetos de celda, asi la memoria no crece con el tamano de df.
+    """
+    return write_excel_sheets_bytes({sheet_name: df})
+
+
+def write_excel_sheets_bytes(sheets: dict[str, pd.DataFrame]) -> bytes:
+    """Como write_excel_bytes, con una hoja por cada (nombre, DataFrame) en orden."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    for sheet_name, df in sheets.items():
+        worksheet = workbook.create_sheet(title=sheet_name)
+        worksheet.append(_header_cells(worksheet, df.columns))
+        for start in range(0, len(df), WRITE_CHUNK_ROWS):
+            chunk = df.iloc[start : start + WRITE_CHUNK_ROWS].astype(object)
+            chunk = chunk.where(chunk.notna(), None)
+            for row in chunk.itertuples(index=False, name=None):
+                worksheet.append(row)
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
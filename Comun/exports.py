@@ -0,0 +1,41 @@
+"""Archivos de descarga (Excel, CSV, Parquet) a partir de un DataFrame.
+
+export_bytes es picklable para armarlos en el pool de procesos. CSV y Parquet
+sirven para resultados muy grandes, donde el .xlsx es lento de generar y abrir;
+Parquet solo se ofrece si pyarrow esta instalado.
+"""
+
+import importlib.util
+import io
+
+import pandas as pd
+
+from Comun.excel import write_excel_bytes
+
+
+EXPORT_FORMATS = {
+    "xlsx": ("Excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ("CSV", "text/csv"),
+    "parquet": ("Parquet", "application/vnd.apache.parquet"),
+}
+PARQUET_COMPRESSION = "zstd"
+
+
+def available_export_formats() -> list[str]:
+    formats = ["xlsx", "csv"]
+    if importlib.util.find_spec("pyarrow") is not None:
+        formats.append("parquet")
+    return formats
+
+
+def export_bytes(df: pd.DataFrame, file_format: str, sheet_name: str = "Sheet1") -> bytes:
+    if file_format == "xlsx":
+        return write_excel_bytes(df, sheet_name)
+    if file_format == "csv":
+        # utf-8 con BOM para que Excel respete tildes y enies al abrir el CSV.
+        return df.to_csv(index=False).encode("utf-8-sig")
+    if file_format == "parquet":
+        output = io.BytesIO()
+        df.to_parquet(output, index=False, compression=PARQUET_COMPRESSION)
+        return output.getvalue()
+    raise ValueError(f"Formato de exportacion desconocido: {file_format}")
@@ -0,0 +1,177 @@
+"""Cache en disco de archivos ya leidos, compartido por todas las herramientas.
+
+La llave es el SHA-256 del contenido subido mas una descripcion de como se leyo
+(hoja, columnas, dtype...). El DataFrame se guarda en Parquet (o pickle si la
+columna tiene tipos mezclados que Arrow no acepta) dentro de un directorio local,
+con expulsion LRU cuando se supera el presupuesto de bytes. Asi un mismo archivo
+subido varias veces, en la misma o en otra sesion, no se vuelve a parsear.
+
+Leer un pickle puede ejecutar codigo, asi que el directorio es solo del usuario
+(0700, por defecto ~/.aquanqa/ingest_cache); si otro usuario es su dueno el cache
+no se usa.
+"""
+
+import hashlib
+import io
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+
+CACHE_DIR_ENV = "AQUANQA_CACHE_DIR"
+CACHE_MAX_MB_ENV = "AQUANQA_CACHE_MAX_MB"
+DEFAULT_CACHE_DIR = Path.home() / ".aquanqa" / "ingest_cache"
+DEFAULT_CACHE_MAX_MB = 1024
+
+_DIGEST_MEMO_SIZE = 64
+_digest_memo: dict[tuple, str] = {}
+
+
+def file_bytes(file) -> bytes:
+    if isinstance(file, (bytes, bytearray)):
+        return bytes(file)
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    if hasattr(file, "seek"):
+        file.seek(0)
+    content = file.read()
+    if hasattr(file, "seek"):
+        file.seek(0)
+    return content
+
+
+def file_digest(file) -> str:
+    """SHA-256 del contenido. Para un UploadedFile se memoriza por file_id entre reruns."""
+    memo_key = None
+    file_id = getattr(file, "file_id", None)
+    if file_id is not None:
+        memo_key = (file_id, getattr(file, "size", None))
+        cached = _digest_memo.get(memo_key)
+        if cached:
+            return cached
+    digest = hashlib.sha256(file_bytes(file)).hexdigest()
+    if memo_key is not None:
+        if len(_digest_memo) >= _DIGEST_MEMO_SIZE:
+            _digest_memo.pop(next(iter(_digest_memo)))
+        _digest_memo[memo_key] = digest
+    return digest
+
+
+class IngestCache:
+    def __init__(self, directory: str | os.PathLike, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _entry_key(self, digest: str, key_parts: tuple) -> str:
+        description = "|".join(repr(part) for part in key_parts)
+        return hashlib.sha256(f"{digest}|{description}".encode("utf-8")).hexdigest()
+
+    def _ensure_private(self) -> bool:
+        """Crea el directorio solo para el usuario y verifica que siga siendo suyo."""
+        try:
+            self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+            if os.name == "nt":
+                return True
+            stat = self.directory.stat()
+            if stat.st_uid != os.getuid():
+                return False
+            if stat.st_mode & 0o077:
+                os.chmod(self.directory, 0o700)
+            return True
+        except OSError:
+            return False
+
+    def _find(self, entry_key: str) -> Path | None:
+        for suffix in (".parquet", ".pkl"):
+            path = self.directory / f"{entry_key}{suffix}"
+            if path.exists():
+                return path
+        return None
+
+    def _read(self, path: Path) -> pd.DataFrame:
+        if path.suffix == ".parquet":
+            return pd.read_parquet(path)
+        return pd.read_pickle(path)
+
+    def _write(self, entry_key: str, df: pd.DataFrame) -> None:
+        tmp_path = self.directory / f".{entry_key}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            try:
+                df.to_parquet(tmp_path, index=True)
+                final_path = self.directory / f"{entry_key}.parquet"
+            except (ImportError, ValueError, TypeError, NotImplementedError):
+                # Sin pyarrow, o columnas con tipos mezclados (texto y numeros) que Arrow no acepta.
+                tmp_path.unlink(missing_ok=True)
+                df.to_pickle(tmp_path)
+                final_path = self.directory / f"{entry_key}.pkl"
+            os.replace(tmp_path, final_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self.directory.glob("*"):
+            if path.suffix not in {".parquet", ".pkl"}:
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def load(self, file, loader, *key_parts) -> pd.DataFrame:
+        """Devuelve el DataFrame cacheado o ejecuta loader(buffer) y lo guarda.
+
+        key_parts describe la lectura (hoja, columnas, opciones) y forman parte de la llave.
+        """
+        if not self._ensure_private():
+            # Directorio de otro usuario (o sin permisos): se lee sin cache.
+            return loader(io.BytesIO(file_bytes(file)))
+        entry_key = self._entry_key(file_digest(file), key_parts)
+        path = self._find(entry_key)
+        if path is not None:
+            try:
+                df = self._read(path)
+                os.utime(path)
+                return df
+            except Exception:
+                # Entrada corrupta o a medio escribir por otro proceso: se vuelve a leer.
+                path.unlink(missing_ok=True)
+
+        df = loader(io.BytesIO(file_bytes(file)))
+        with self._lock:
+            try:
+                self._write(entry_key, df)
+                self._evict()
+            except OSError:
+                # Sin espacio o sin permisos: se sigue sin cache.
+                pass
+        return df
+
+
+_default_cache: IngestCache | None = None
+
+
+def get_ingest_cache() -> IngestCache:
+    global _default_cache
+    if _default_cache is None:
+        directory = os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR
+        max_mb = int(os.environ.get(CACHE_MAX_MB_ENV) or DEFAULT_CACHE_MAX_MB)
+        _default_cache = IngestCache(directory, max_mb * 1024 * 1024)
+    return _default_cache
+
+
+def cached_read(file, loader, *key_parts) -> pd.DataFrame:
+    return get_ingest_cache().load(file, loader, *key_parts)
@@ -0,0 +1,132 @@
+"""Trabajos en segundo plano con progreso y cancelacion.
+
+Un trabajo se identifica por una llave (p. ej. hash del archivo + configuracion):
+si se vuelve a pedir la misma llave se reutiliza el trabajo en curso o su
+resultado, aunque el pedido venga de un rerun o de otra sesion tras refrescar la
+pagina. La funcion del trabajo recibe ``progress(stage, fraction, rows_done=None)``;
+cada llamada actualiza el estado visible y es el punto donde se atiende la
+cancelacion (lanza JobCancelled).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+JOB_PENDING = "en cola"
+JOB_RUNNING = "ejecutando"
+JOB_DONE = "completado"
+JOB_CANCELLED = "cancelado"
+JOB_FAILED = "error"
+FINISHED_STATUSES = {JOB_DONE, JOB_CANCELLED, JOB_FAILED}
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, key: str, rows_total: int | None = None):
+        self.key = key
+        self.status = JOB_PENDING
+        self.stage = "En cola"
+        self.fraction = 0.0
+        self.rows_done: int | None = None
+        self.rows_total = rows_total
+        self.submitted_at = time.monotonic()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.result = None
+        self.error: BaseException | None = None
+        self._cancel_event = threading.Event()
+
+    def progress(self, stage: str, fraction: float, rows_done: int | None = None) -> None:
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+        self.stage = stage
+        self.fraction = min(max(float(fraction), 0.0), 1.0)
+        if rows_done is not None:
+            self.rows_done = rows_done
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_event.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def eta_seconds(self) -> float | None:
+        if self.started_at is None or self.fraction <= 0 or self.finished:
+            return None
+        elapsed = time.monotonic() - self.started_at
+        return elapsed / self.fraction * (1 - self.fraction)
+
+    def _run(self, fn, args, kwargs):
+        if self._cancel_event.is_set():
+            self._finish(JOB_CANCELLED)
+            return
+        self.status = JOB_RUNNING
+        self.started_at = time.monotonic()
+        try:
+            self.result = fn(*args, progress=self.progress, **kwargs)
+        except JobCancelled:
+            self._finish(JOB_CANCELLED)
+        except Exception as exc:
+            self.error = exc
+            self._finish(JOB_FAILED)
+        else:
+            self.stage = "Listo"
+            self.fraction = 1.0
+            self._finish(JOB_DONE)
+
+    def _finish(self, status: str) -> None:
+        self.status = status
+        self.finished_at = time.monotonic()
+
+
+class JobStore:
+    def __init__(self, max_workers: int = 2, max_finished: int = 32):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="aquanqa-job")
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._max_finished = max_finished
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(key)
+
+    def submit(self, key: str, fn, *args, rows_total: int | None = None, **kwargs) -> Job:
+        """Encola fn(*args, progress=..., **kwargs) salvo que la llave ya este en curso o lista."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status not in {JOB_CANCELLED, JOB_FAILED}:
+                self._jobs.move_to_end(key)
+                return job
+            job = Job(key, rows_total=rows_total)
+            self._jobs[key] = job
+            self._prune()
+        self._executor.submit(job._run, fn, args, kwargs)
+        return job
+
+    def _prune(self) -> None:
+        finished = [key for key, job in self._jobs.items() if job.finished]
+        for key in finished[: max(0, len(finished) - self._max_finished)]:
+            del self._jobs[key]
+
+
+_default_store: JobStore | None = None
+_default_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """JobStore del proceso (compartido por todas las sesiones de Streamlit)."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = JobStore()
+        return _default_store
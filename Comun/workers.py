@@ -0,0 +1,296 @@
+"""Pool de procesos compartido por todas las sesiones y herramientas.
+
+El trabajo pesado de pandas (validaciones, cruces, armado de Excel) se ejecuta en
+un pool acotado de procesos en lugar del hilo de cada sesion, asi una carga
+grande no frena a los demas usuarios por el GIL. Las tareas esperan en una cola
+por sesion y se despachan en ronda (una de cada sesion con trabajo pendiente),
+de modo que una sesion con muchas tareas no acapara el pool. Si la cola supera
+el limite se rechaza la tarea con WorkerPoolBusy (contrapresion visible en la UI).
+
+fn debe poder importarse desde su modulo (no desde __main__); si no, o si el pool
+esta desactivado (AQUANQA_WORKERS=0), la tarea corre en el hilo que la pide.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+
+WORKERS_ENV = "AQUANQA_WORKERS"
+MAX_QUEUE_ENV = "AQUANQA_MAX_QUEUE"
+DEFAULT_MAX_QUEUE = 32
+METRICS_WINDOW = 500
+_FUNCTION_WINDOW = 50
+
+
+class WorkerPoolBusy(ValueError):
+    pass
+
+
+def _default_workers() -> int:
+    return min(4, max(1, (os.cpu_count() or 2) - 1))
+
+
+def _timed_call(fn, args, kwargs):
+    started = time.time()
+    result = fn(*args, **kwargs)
+    return started, time.time(), result
+
+
+def _function_name(fn) -> str:
+    return f"{getattr(fn, '__module__', '')}.{getattr(fn, '__qualname__', repr(fn))}"
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class _Task:
+    def __init__(self, fn, args, kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future: Future = Future()
+        self.submitted = time.time()
+
+
+class WorkerPool:
+    def __init__(self, max_workers: int, max_queue: int = DEFAULT_MAX_QUEUE):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: ProcessPoolExecutor | None = None
+        self._queues: OrderedDict[str, deque[_Task]] = OrderedDict()
+        self._running = 0
+        self._lock = threading.Lock()
+        self._waits: deque[float] = deque(maxlen=METRICS_WINDOW)
+        self._runs: deque[float] = deque(maxlen=METRICS_WINDOW)
+        self._runs_by_function: dict[str, deque[float]] = {}
+        self._completed = 0
+        self._rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: no hereda hilos ni sockets del servidor de Streamlit (y funciona igual en Windows).
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def queue_depth(self) -> int:
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def submit(self, session_id: str, fn, *args, **kwargs) -> Future:
+        """Encola fn(*args, **kwargs) para la sesion; devuelve un Future con el resultado."""
+        task = _Task(fn, args, kwargs)
+        if self.max_workers <= 0 or getattr(fn, "__module__", None) == "__main__":
+            self._run_inline(task)
+            return task.future
+        with self._lock:
+            depth = sum(len(queue) for queue in self._queues.values())
+            if depth >= self.max_queue:
+                self._rejected += 1
+                raise WorkerPoolBusy(
+                    f"El servidor esta ocupado ({depth} tareas en cola). "
+                    "Intenta nuevamente en unos minutos."
+                )
+            self._queues.setdefault(session_id, deque()).append(task)
+            dispatched = self._dispatch()
+        self._attach(dispatched)
+        return task.future
+
+    def run(self, session_id: str, fn, *args, **kwargs):
+        return self.submit(session_id, fn, *args, **kwargs).result()
+
+    def _run_inline(self, task: _Task) -> None:
+        task.future.set_running_or_notify_cancel()
+        try:
+            started, finished, result = _timed_call(task.fn, task.args, task.kwargs)
+        except Exception as exc:
+            task.future.set_exception(exc)
+            return
+        self._record(task, started, finished)
+        task.future.set_result(result)
+
+    def _next_task(self) -> _Task | None:
+        # Ronda por sesion: se toma la primera sesion con cola y se manda al final.
+        while self._queues:
+            session_id, queue = next(iter(self._queues.items()))
+            task = queue.popleft()
+            if queue:
+                self._queues.move_to_end(session_id)
+            else:
+                del self._queues[session_id]
+            if task.future.set_running_or_notify_cancel():
+                return task
+        return None
+
+    def _dispatch(self) -> list[tuple[_Task, Future | Exception]]:
+        # Se llama con self._lock tomado; los resultados se entregan con _attach, ya sin el lock.
+        dispatched = []
+        while self._running < self.max_workers:
+            task = self._next_task()
+            if task is None:
+                break
+            try:
+                process_future = self._submit_to_executor(task)
+            except RuntimeError as exc:
+                # Interprete cerrandose: el pool ya no acepta tareas.
+                dispatched.append((task, exc))
+                continue
+            self._running += 1
+            dispatched.append((task, process_future))
+        return dispatched
+
+    def _attach(self, dispatched: list[tuple[_Task, Future | Exception]]) -> None:
+        # Sin self._lock: un futuro que ya termino llama a _on_done en este mismo hilo,
+        # y los callbacks del Future de la tarea pueden volver a llamar a submit.
+        for task, outcome in dispatched:
+            if isinstance(outcome, Exception):
+                task.future.set_exception(outcome)
+            else:
+                outcome.add_done_callback(lambda done, task=task: self._on_done(task, done))
+
+    def _submit_to_executor(self, task: _Task) -> Future:
+        try:
+            return self._get_executor().submit(_timed_call, task.fn, task.args, task.kwargs)
+        except BrokenProcessPool:
+            # Un proceso murio (p. ej. sin memoria): se levanta un pool nuevo.
+            self._executor = None
+            return self._get_executor().submit(_timed_call, task.fn, task.args, task.kwargs)
+
+    def _on_done(self, task: _Task, done: Future) -> None:
+        try:
+            started, finished, result = done.result()
+        except BrokenProcessPool as exc:
+            with self._lock:
+                self._executor = None
+            task.future.set_exception(exc)
+        except Exception as exc:
+            task.future.set_exception(exc)
+        else:
+            self._record(task, started, finished)
+            task.future.set_result(result)
+        with self._lock:
+            self._running -= 1
+            dispatched = self._dispatch()
+        self._attach(dispatched)
+
+    def _record(self, task: _Task, started: float, finished: float) -> None:
+        run_seconds = max(0.0, finished - started)
+        with self._lock:
+            self._waits.append(max(0.0, started - task.submitted))
+            self._runs.append(run_seconds)
+            self._runs_by_function.setdefault(
+                _function_name(task.fn), deque(maxlen=_FUNCTION_WINDOW)
+            ).append(run_seconds)
+            self._completed += 1
+
+    def expected_run_seconds(self, fn) -> float | None:
+        """Tiempo promedio de ejecucion de las ultimas llamadas a fn (None si no hay)."""
+        with self._lock:
+            runs = self._runs_by_function.get(_function_name(fn))
+            return sum(runs) / len(runs) if runs else None
+
+    def metrics(self) -> dict:
+        """Espera en cola vs tiempo de ejecucion (ultimas METRICS_WINDOW tareas)."""
+        with self._lock:
+            waits = list(self._waits)
+            runs = list(self._runs)
+            return {
+                "procesos": self.max_workers,
+                "en_ejecucion": self._running,
+                "en_cola": sum(len(queue) for queue in self._queues.values()),
+                "sesiones_en_cola": len(self._queues),
+                "completadas": self._completed,
+                "rechazadas": self._rejected,
+                "espera_promedio_s": sum(waits) / len(waits) if waits else 0.0,
+                "espera_p95_s": _percentile(waits, 0.95),
+                "ejecucion_promedio_s": sum(runs) / len(runs) if runs else 0.0,
+                "ejecucion_p95_s": _percentile(runs, 0.95),
+            }
+
+
+_default_pool: WorkerPool | None = None
+_default_pool_lock = threading.Lock()
+
+
+def get_worker_pool() -> WorkerPool:
+    """Pool del proceso del servidor (compartido por todas las sesiones)."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            workers_env = os.environ.get(WORKERS_ENV)
+            workers = int(workers_env) if workers_env else _default_workers()
+            max_queue = int(os.environ.get(MAX_QUEUE_ENV) or DEFAULT_MAX_QUEUE)
+            _default_pool = WorkerPool(workers, max_queue)
+        return _default_pool
+
+
+def current_session_id() -> str:
+    """Id de la sesion de Streamlit que ejecuta el script (o "local" fuera de Streamlit)."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return "local"
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else "local"
+
+
+def run_in_pool(fn, *args, **kwargs):
+    """Ejecuta fn en el pool compartido a nombre de la sesion actual y espera el resultado."""
+    return get_worker_pool().run(current_session_id(), fn, *args, **kwargs)
+
+
+def wait_with_progress(
+    future: Future,
+    fn,
+    progress,
+    stage: str,
+    start_fraction: float,
+    end_fraction: float,
+    rows_done: int | None = None,
+    poll_seconds: float = 0.5,
+):
+    """Espera future informando progress(etapa, fraccion, filas) mientras tanto.
+
+    En cola se queda en start_fraction; en ejecucion avanza segun lo que tardaron
+    las ultimas llamadas a fn en el pool. Si progress lanza (cancelacion) se cancela la tarea si aun
+    no empezo y se propaga la excepcion.
+    """
+    started = None
+    while True:
+        done, _ = wait([future], timeout=poll_seconds)
+        if done:
+            return future.result()
+        if future.running():
+            started = started or time.time()
+            expected = get_worker_pool().expected_run_seconds(fn)
+            share = min((time.time() - started) / expected, 0.95) if expected else 0.0
+            current_stage = stage
+        else:
+            share = 0.0
+            current_stage = "En cola de procesamiento"
+        try:
+            progress(current_stage, start_fraction + (end_fraction - start_fraction) * share, rows_done)
+        except BaseException:
+            future.cancel()
+            raise
+
+
+def pool_load_message() -> str | None:
+    """Texto de carga del servidor para la UI, o None si no hay tareas esperando."""
+    metrics = get_worker_pool().metrics()
+    if not metrics["en_cola"]:
+        return None
+    return (
+        f"Servidor ocupado: {metrics['en_ejecucion']} tareas en ejecucion y "
+        f"{metrics['en_cola']} en cola (espera promedio {metrics['espera_promedio_s']:.1f} s)."
+    )
@@ -1,30 +1,63 @@
-import io
+import json
 import math
-import re
+import time
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
+from Comun.excel import list_sheet_names, read_sheet_columns, read_sheet_preview
+from Comun.exports import EXPORT_FORMATS, available_export_formats, export_bytes
+from Comun.ingest_cache import cached_read, file_digest
+from Comun.jobs import JOB_CANCELLED, JOB_DONE, JOB_FAILED, get_job_store
+from Comun.workers import (
+    current_session_id,
+    get_worker_pool,
+    pool_load_message,
+    run_in_pool,
+    wait_with_progress,
+)
+
 try:
+    from ValidacionDeDatos.incremental import (
+        CHANGE_COL,
+        CHANGE_MODIFIED,
+        CHANGE_NEW,
+        ValidationSnapshot,
+        validate_incremental,
+    )
+    from ValidacionDeDatos.omission_rules import load_omission_rules
+    from ValidacionDeDatos.results_index import ResultsIndex
+    from ValidacionDeDatos.streaming import validate_file_streaming
     from ValidacionDeDatos.styles import render_metric, setup_styles
     from ValidacionDeDatos.validation_logic import (
         CECO_EVALUATED_COL,
         CECO_EVALUATED_COUNT_COL,
+        DISTINCT_HIT_RATIO_ATTR,
         detect_file_dates,
+        resolve_activity_code_column,
         suggest_columns,
-        summarize_validation,
-        validate_people_ceco_activity,
     )
 except ImportError:
+    from incremental import (
+        CHANGE_COL,
+        CHANGE_MODIFIED,
+        CHANGE_NEW,
+        ValidationSnapshot,
+        validate_incremental,
+    )
+    from omission_rules import load_omission_rules
+    from results_index import ResultsIndex
+    from streaming import validate_file_streaming
     from styles import render_metric, setup_styles
     from validation_logic import (
         CECO_EVALUATED_COL,
         CECO_EVALUATED_COUNT_COL,
+        DISTINCT_HIT_RATIO_ATTR,
         detect_file_dates,
+        resolve_activity_code_column,
         suggest_columns,
-        summarize_validation,
-        validate_people_ceco_activity,
     )
 
 
@@ -32,31 +65,88 @@ STATS_STATE_KEY = "vd_stats_df"
 DATES_STATE_KEY = "vd_file_dates"
 CONFIG_STATE_KEY = "vd_last_config"
 HIDDEN_STATE_KEY = "vd_hidden_neutral_rows"
+RULES_STATE_KEY = "vd_rules_version"
+HIT_RATIO_STATE_KEY = "vd_distinct_hit_ratio"
+JOB_STATE_KEY = "vd_applied_job"
+SNAPSHOT_STATE_KEY = "vd_snapshot"
+CHANGES_STATE_KEY = "vd_changes"
+INDEX_STATE_KEY = "vd_results_index"
+# Ultimas busquedas de la sesion (el indice de resultados se comparte entre sesiones).
+SEARCH_STATE_KEY = "vd_search_state"
+EXPORTS_STATE_KEY = "vd_exports"
+
+
+PREVIEW_ROWS = 500
+JOB_POLL_SECONDS = 0.75
+# Parte de la barra de progreso que corresponde a leer el archivo (el resto es validar).
+READ_PROGRESS_SHARE = 0.6
+# Desde esta cantidad de filas se ofrecen tambien CSV y Parquet para descargar.
+LARGE_EXPORT_ROWS = 20_000
+CHANGE_COLORS = {CHANGE_MODIFIED: "#fff3cd", CHANGE_NEW: "#d1e7dd"}
+
+
+# st.fragment (Streamlit >= 1.37) vuelve a ejecutar solo la seccion cuando cambia
+# uno de sus widgets; en versiones anteriores la seccion corre como funcion normal.
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda fn: fn)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _sheet_names_cached(file_digest_value: str, _file) -> list[str]:
+    return list_sheet_names(_file)
 
 
 def get_excel_sheet_names(file) -> list[str]:
-    """Devuelve los nombres de las hojas del Excel. Reinicia el stream para no consumirlo."""
+    """Devuelve los nombres de las hojas leyendo solo la metadata del libro (una vez por archivo)."""
     try:
-        if hasattr(file, "seek"):
-            file.seek(0)
-        xl = pd.ExcelFile(file, engine="openpyxl")
-        return xl.sheet_names
+        return _sheet_names_cached(file_digest(file), file)
     except Exception:
         return []
 
 
-@st.cache_data
-def load_excel(file, sheet_name=0):
-    """Carga el Excel. sheet_name puede ser el nombre de la hoja (ej. 'main') o el índice (0 = primera)."""
+@st.cache_data(max_entries=16, show_spinner=False)
+def _suggest_columns_cached(file_digest_value: str, sheet_name, _df: pd.DataFrame) -> dict[str, str | None]:
+    return suggest_columns(_df)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _load_excel_preview_cached(file_digest_value: str, sheet_name, _file):
+    return read_sheet_preview(_file, sheet_name=sheet_name, nrows=PREVIEW_ROWS)
+
+
+def load_excel_preview(file, sheet_name=0):
+    """Encabezado + primeras filas de la hoja y cantidad total de filas (segun el libro)."""
+    try:
+        return _load_excel_preview_cached(file_digest(file), sheet_name, file)
+    except Exception as exc:
+        st.error(f"Error al cargar el archivo: {exc}")
+        return None, None
+
+
+def load_excel(file, sheet_name=0, columns: tuple | None = None):
+    """Carga el Excel. sheet_name puede ser el nombre de la hoja (ej. 'main') o el índice (0 = primera).
+
+    Con columns solo se leen esas columnas. El resultado queda en el cache de ingesta
+    (por hash del archivo), asi que volver a subir el mismo archivo no lo re-parsea.
+    """
     try:
-        if hasattr(file, "seek"):
-            file.seek(0)
-        return pd.read_excel(file, sheet_name=sheet_name, engine="openpyxl")
+        return _read_sheet_cached(file, sheet_name, columns)
     except Exception as exc:
         st.error(f"Error al cargar el archivo: {exc}")
         return None
 
 
+def _read_sheet_cached(file, sheet_name, columns: tuple | None, on_rows=None) -> pd.DataFrame:
+    return cached_read(
+        file,
+        lambda buffer: read_sheet_columns(
+            buffer, sheet_name=sheet_name, columns=list(columns) if columns else None, on_rows=on_rows
+        ),
+        "ValidacionDeDatos",
+        sheet_name,
+        columns,
+    )
+
+
 def _safe_index(options: list, value, fallback: int = 0) -> int:
     try:
         return options.index(value)
@@ -70,14 +160,6 @@ def _build_optional_options(df: pd.DataFrame, suggested_col: str | None) -> tupl
     return options, default
 
 
-def _contains_text(series: pd.Series, query: str) -> pd.Series:
-    if not query:
-        return pd.Series([True] * len(series), index=series.index)
-    escaped_query = re.escape(query.strip().lower())
-    values = series.fillna("").astype(str).str.lower()
-    return values.str.contains(escaped_query, regex=True)
-
-
 def _render_section_header(title: str, subtitle: str = "") -> None:
     subtitle_html = f'<p class="subtitle">{subtitle}</p>' if subtitle else ""
     st.markdown(
@@ -91,16 +173,9 @@ def _render_section_header(title: str, subtitle: str = "") -> None:
     )
 
 
-def _apply_quick_filter(df: pd.DataFrame, quick_filter: str) -> pd.DataFrame:
-    if quick_filter == "Solo con problemas":
-        return df[df["Tiene Problemas"].astype(bool)]
-    if quick_filter == "Solo CECO diferentes":
-        return df[df["Cecos Diferentes"].astype(bool)]
-    if quick_filter == "Solo con vacios":
-        return df[df["Tiene Ceco Vacio"] | df["Tiene Actividad Vacia"]]
-    if quick_filter == "Solo con omitidas CECO" and "Filas Omitidas CECO" in df.columns:
-        return df[df["Filas Omitidas CECO"] > 0]
-    return df
+def _highlight_changes(row: pd.Series) -> list[str]:
+    color = CHANGE_COLORS.get(row.get(CHANGE_COL, ""), "")
+    return [f"background-color: {color}" if color else "" for _ in row]
 
 
 def _render_instructions() -> None:
@@ -115,12 +190,13 @@ def _render_instructions() -> None:
     )
 
 
-def _render_preview(df: pd.DataFrame) -> None:
+def _render_preview(df: pd.DataFrame, total_rows: int | None = None) -> None:
     _render_section_header("Vista previa", "Confirma que el archivo se cargo correctamente")
+    rows_label = total_rows if total_rows is not None else f"{len(df)}+"
     st.markdown(
         f"""
 <div style="margin: 0.5rem 0 1rem; color: #94a3b8;">
-Archivo cargado: <strong>{len(df)}</strong> filas, <strong>{len(df.columns)}</strong> columnas
+Archivo cargado: <strong>{rows_label}</strong> filas, <strong>{len(df.columns)}</strong> columnas
 </div>
 """,
         unsafe_allow_html=True,
@@ -129,8 +205,8 @@ Archivo cargado: <strong>{len(df)}</strong> filas, <strong>{len(df.columns)}</st
         st.dataframe(df.head(15), use_container_width=True)
 
 
-def _render_configuration(df: pd.DataFrame) -> dict[str, str]:
-    suggestions = suggest_columns(df)
+def _render_configuration(df: pd.DataFrame, file_digest_value: str, sheet_name) -> dict[str, str]:
+    suggestions = _suggest_columns_cached(file_digest_value, sheet_name, df)
     all_columns = df.columns.tolist()
 
     _render_section_header("Configuracion", "Selecciona columnas principales y opcionales")
@@ -184,6 +260,12 @@ def _render_configuration(df: pd.DataFrame) -> dict[str, str]:
             help="Si la seleccionas, Actividad Diferente y omision de CECO consideraran este codigo.",
         )
 
+    streaming = st.checkbox(
+        "Validar por bloques (archivos muy grandes)",
+        value=False,
+        help="Lee el archivo por partes sin cargarlo entero en memoria. Usalo si el archivo no entra en memoria.",
+    )
+
     return {
         "person_col": person_col,
         "ceco_col": ceco_col,
@@ -191,35 +273,241 @@ def _render_configuration(df: pd.DataFrame) -> dict[str, str]:
         "document_col": document_col if document_col != "Ninguna" else None,
         "date_col": date_col if date_col != "Ninguna" else None,
         "activity_code_col": activity_code_col if activity_code_col != "Ninguna" else None,
+        "streaming": streaming,
     }
 
 
-def _run_validation(df: pd.DataFrame, config: dict[str, str]) -> None:
-    stats_df = validate_people_ceco_activity(
-        df=df,
+def _validation_columns(config: dict[str, str], activity_code_col: str | None, rule_columns=()) -> tuple:
+    columns = [
+        config["person_col"],
+        config["ceco_col"],
+        config["activity_col"],
+        config["document_col"],
+        config["date_col"],
+        activity_code_col,
+        *rule_columns,
+    ]
+    return tuple(dict.fromkeys(col for col in columns if col))
+
+
+def _validation_job_key(file, sheet_name, config: dict[str, str], rules, previous: ValidationSnapshot | None) -> str:
+    """Llave del trabajo: mismo archivo, hoja, columnas, reglas y foto anterior => mismo resultado.
+
+    La foto anterior entra en la llave porque los cambios (y la foto nueva) se calculan
+    contra ella: otra sesion, o esta con otra carga previa, no recibe cambios ajenos.
+    """
+    config_text = json.dumps(config, sort_keys=True, default=str)
+    previous_digest = previous.digest if previous is not None else "-"
+    return f"vd:{file_digest(file)}:{sheet_name}:{config_text}:{rules.version}:{previous_digest}"
+
+
+def _validate_in_memory(
+    file_content: bytes,
+    sheet_name,
+    config: dict[str, str],
+    activity_code_col: str | None,
+    rule_columns: tuple,
+    rules,
+    total_rows: int | None,
+    previous: ValidationSnapshot | None,
+    session_id: str,
+    progress,
+) -> tuple[pd.DataFrame, list[str], ValidationSnapshot, dict | None]:
+    def on_rows(rows_read: int) -> None:
+        fraction = min(rows_read / total_rows, 1.0) if total_rows else 0.0
+        progress("Leyendo archivo", READ_PROGRESS_SHARE * fraction, rows_read)
+
+    progress("Leyendo archivo", 0.0, 0)
+    df = _read_sheet_cached(
+        file_content, sheet_name, _validation_columns(config, activity_code_col, rule_columns), on_rows=on_rows
+    )
+    rows_read = len(df)
+
+    engine_kwargs = {
+        "person_col": config["person_col"],
+        "ceco_col": config["ceco_col"],
+        "activity_col": config["activity_col"],
+        "date_col": config["date_col"],
+        "document_col": config["document_col"],
+        "activity_code_col": activity_code_col,
+    }
+    # Solo se validan las personas que cambiaron respecto de la carga anterior
+    # (todas si no hay foto compatible); archivos grandes se reparten en el pool.
+    stats_df, snapshot, changes = validate_incremental(
+        df,
+        engine_kwargs,
+        rules,
+        rules.version,
+        previous=previous,
+        session_id=session_id,
+        progress=lambda stage, fraction: progress(
+            stage, READ_PROGRESS_SHARE + (1 - READ_PROGRESS_SHARE) * fraction, rows_read
+        ),
+    )
+    return stats_df, detect_file_dates(df, config["date_col"]), snapshot, changes
+
+
+def _validate_streaming(
+    file_content: bytes,
+    sheet_name,
+    config: dict[str, str],
+    activity_code_col: str | None,
+    rule_columns: tuple,
+    rules,
+    session_id: str,
+    progress,
+) -> tuple[pd.DataFrame, list[str]]:
+    # Lectura y validacion por bloques en un proceso del pool: el archivo nunca se
+    # materializa entero (ni en el cache de ingesta).
+    future = get_worker_pool().submit(
+        session_id,
+        validate_file_streaming,
+        file_content,
         person_col=config["person_col"],
         ceco_col=config["ceco_col"],
         activity_col=config["activity_col"],
         date_col=config["date_col"],
         document_col=config["document_col"],
-        activity_code_col=config["activity_code_col"],
+        activity_code_col=activity_code_col,
+        rules=rules,
+        infer_activity_code=False,
+        file_format="xlsx",
+        sheet_name=sheet_name,
+        rule_columns=rule_columns,
     )
+    return wait_with_progress(future, validate_file_streaming, progress, "Validando por bloques", 0.0, 0.98)
+
+
+def _validation_job(
+    file_content: bytes,
+    sheet_name,
+    preview_df: pd.DataFrame,
+    config: dict[str, str],
+    rules,
+    total_rows: int | None,
+    previous: ValidationSnapshot | None,
+    session_id: str,
+    progress,
+) -> dict:
+    """Lee en un hilo del JobStore y valida en el pool de procesos compartido.
+
+    No usa st.* (no hay contexto de script); session_id es la sesion que pidio el
+    trabajo, para el reparto justo del pool, y previous la foto de la validacion
+    anterior de esa sesion (se revalidan solo las personas que cambiaron).
+    """
+    progress("Detectando Cod. Actividad", 0.0)
+    # La columna de Cod. Actividad se infiere sobre la vista previa; asi basta con
+    # leer del archivo solo las columnas que usa la validacion.
+    activity_code_col = resolve_activity_code_column(
+        preview_df,
+        config["person_col"],
+        config["ceco_col"],
+        config["activity_col"],
+        config["activity_code_col"],
+    )
+    # Las excepciones de las reglas pueden mirar otras columnas (ej. Fundo): se leen
+    # tambien, si estan en la hoja (si no, la excepcion no aplica a ninguna fila).
+    rule_columns = tuple(col for col in rules.columns if col in preview_df.columns)
+
+    snapshot, changes = None, None
+    if config.get("streaming"):
+        stats_df, file_dates = _validate_streaming(
+            file_content, sheet_name, config, activity_code_col, rule_columns, rules, session_id, progress
+        )
+    else:
+        stats_df, file_dates, snapshot, changes = _validate_in_memory(
+            file_content,
+            sheet_name,
+            config,
+            activity_code_col,
+            rule_columns,
+            rules,
+            total_rows,
+            previous,
+            session_id,
+            progress,
+        )
+
+    distinct_hit_ratio = stats_df.attrs.get(DISTINCT_HIT_RATIO_ATTR)
     hidden_neutral_rows = 0
     if CECO_EVALUATED_COUNT_COL in stats_df.columns and "Tiene Problemas" in stats_df.columns:
         neutral_mask = (stats_df[CECO_EVALUATED_COUNT_COL] == 0) & (~stats_df["Tiene Problemas"])
         hidden_neutral_rows = int(neutral_mask.sum())
         stats_df = stats_df[~neutral_mask].reset_index(drop=True)
 
-    file_dates = detect_file_dates(df, config["date_col"])
-    st.session_state[STATS_STATE_KEY] = stats_df
-    st.session_state[DATES_STATE_KEY] = file_dates
-    st.session_state[CONFIG_STATE_KEY] = config
-    st.session_state[HIDDEN_STATE_KEY] = hidden_neutral_rows
+    return {
+        "stats_df": stats_df,
+        "file_dates": file_dates,
+        "config": config,
+        "hidden_neutral_rows": hidden_neutral_rows,
+        "rules_version": f"{rules.source} ({rules.version})",
+        "distinct_hit_ratio": distinct_hit_ratio,
+        "snapshot": snapshot,
+        "changes": changes,
+        # El indice de la tabla se arma aqui, fuera del rerun de la UI.
+        "results_index": ResultsIndex(stats_df, file_dates),
+    }
+
+
+def _apply_job_result(job) -> None:
+    result = job.result
+    st.session_state[STATS_STATE_KEY] = result["stats_df"]
+    st.session_state[DATES_STATE_KEY] = result["file_dates"]
+    st.session_state[CONFIG_STATE_KEY] = result["config"]
+    st.session_state[HIDDEN_STATE_KEY] = result["hidden_neutral_rows"]
+    st.session_state[RULES_STATE_KEY] = result["rules_version"]
+    st.session_state[HIT_RATIO_STATE_KEY] = result["distinct_hit_ratio"]
+    st.session_state[JOB_STATE_KEY] = job.key
+    st.session_state[CHANGES_STATE_KEY] = result["changes"]
+    st.session_state[INDEX_STATE_KEY] = result["results_index"]
+    if result["snapshot"] is not None:
+        st.session_state[SNAPSHOT_STATE_KEY] = result["snapshot"]
+
+
+def _format_seconds(seconds: float) -> str:
+    seconds = int(round(seconds))
+    return f"{seconds // 60} min {seconds % 60:02d} s" if seconds >= 60 else f"{seconds} s"
+
+
+def _render_job_progress(job) -> None:
+    st.progress(job.fraction, text=f"{job.stage} ({job.fraction:.0%})")
+    details = []
+    if job.rows_done is not None:
+        total = f" de {job.rows_total}" if job.rows_total else ""
+        details.append(f"Filas procesadas: {job.rows_done}{total}")
+    eta = job.eta_seconds()
+    if eta is not None:
+        details.append(f"Tiempo restante estimado: {_format_seconds(eta)}")
+    if details:
+        st.caption(" · ".join(details))
+    if job.cancel_requested:
+        st.caption("Cancelando...")
+    elif st.button("Cancelar validacion"):
+        job.cancel()
+        st.rerun()
+
+
+def _render_job_status(job) -> bool:
+    """Muestra el estado del trabajo; devuelve True si sigue en curso (hay que refrescar)."""
+    if not job.finished:
+        _render_job_progress(job)
+        return True
+    if job.status == JOB_DONE and st.session_state.get(JOB_STATE_KEY) != job.key:
+        _apply_job_result(job)
+        st.success("Validacion completada.")
+    elif job.status == JOB_CANCELLED:
+        st.info("Validacion cancelada.")
+    elif job.status == JOB_FAILED:
+        if isinstance(job.error, ValueError):
+            st.error(str(job.error))
+        else:
+            st.error(f"Ocurrio un error durante la validacion: {job.error}")
+    return False
 
 
-def _render_summary(stats_df: pd.DataFrame, file_dates: list[str]) -> None:
+def _render_summary(results_index: ResultsIndex, file_dates: list[str]) -> None:
     _render_section_header("Resumen general", "Indicadores principales de la validacion")
-    summary = summarize_validation(stats_df, file_dates)
+    summary = results_index.summary
     m1, m2, m3, m4 = st.columns(4)
     with m1:
         render_metric("Total personas", summary["total_personas"])
@@ -244,8 +532,33 @@ def _render_summary(stats_df: pd.DataFrame, file_dates: list[str]) -> None:
             f"Se ocultaron {hidden_neutral_rows} registros sin CECO evaluable y sin problemas (no aplican a validacion)."
         )
 
+    changes = st.session_state.get(CHANGES_STATE_KEY)
+    if changes:
+        st.info(
+            f"Cambios respecto de la carga anterior: {changes['modificadas']} personas modificadas, "
+            f"{changes['nuevas']} nuevas y {changes['eliminadas']} que ya no estan. "
+            f"Se reutilizaron {changes['reutilizadas']} sin volver a validar (resaltadas en la tabla las que cambiaron)."
+        )
+
+    rules_version = st.session_state.get(RULES_STATE_KEY)
+    if rules_version:
+        st.caption(f"Reglas de omision de CECO: {rules_version}")
+    hit_ratio = st.session_state.get(HIT_RATIO_STATE_KEY)
+    if hit_ratio is not None:
+        st.caption(f"Valores resueltos desde el diccionario de valores distintos: {hit_ratio:.1%} de las filas")
+
+
+@_fragment
+def _render_table_and_detail(stats_df: pd.DataFrame, results_index: ResultsIndex) -> None:
+    # El detalle depende de los filtros de la tabla: ambos van en el mismo fragmento.
+    positions = _render_results_table(stats_df, results_index)
+    if len(positions) == 0:
+        st.info("No hay registros para mostrar con los filtros actuales.")
+    else:
+        _render_person_detail(stats_df, results_index, positions)
+
 
-def _render_results_table(stats_df: pd.DataFrame) -> pd.DataFrame:
+def _render_results_table(stats_df: pd.DataFrame, results_index: ResultsIndex) -> np.ndarray:
     _render_section_header(
         "Resultados de validacion",
         "Busqueda rapida + filtro rapido. Lo avanzado esta en el desplegable.",
@@ -261,13 +574,7 @@ def _render_results_table(stats_df: pd.DataFrame) -> pd.DataFrame:
     with top2:
         quick_filter = st.selectbox(
             "Filtro rapido",
-            options=[
-                "Todos",
-                "Solo con problemas",
-                "Solo CECO diferentes",
-                "Solo con vacios",
-                "Solo con omitidas CECO",
-            ],
+            options=results_index.quick_filter_options(),
             index=0,
         )
     with top3:
@@ -281,54 +588,24 @@ def _render_results_table(stats_df: pd.DataFrame) -> pd.DataFrame:
             activity_query = st.text_input("Contiene Actividad", value="", placeholder="Ej: PODADOR")
 
         a3, a4 = st.columns(2)
-        sort_options = [
-            col
-            for col in ["Persona", "Tiene Problemas", "Filas Persona", "Filas Omitidas CECO"]
-            if col in stats_df.columns
-        ]
-        if not sort_options:
-            sort_options = [stats_df.columns[0]]
         with a3:
-            sort_by = st.selectbox("Ordenar por", options=sort_options, index=0)
+            sort_by = st.selectbox("Ordenar por", options=results_index.sort_options, index=0)
         with a4:
             ascending = st.checkbox("Orden ascendente", value=True)
 
-    filtered_df = stats_df.copy()
-    filtered_df = _apply_quick_filter(filtered_df, quick_filter)
-
-    if search_query.strip():
-        search_cols = [
-            "Persona",
-            "Documento",
-            "Cecos Unicos",
-            CECO_EVALUATED_COL,
-            "Actividades Unicas",
-            "Actividades (con Cod. Actividad)",
-            "Observaciones",
-        ]
-        search_mask = pd.Series([False] * len(filtered_df), index=filtered_df.index)
-        for col in search_cols:
-            if col in filtered_df.columns:
-                search_mask = search_mask | _contains_text(filtered_df[col], search_query)
-        filtered_df = filtered_df[search_mask]
-
-    if ceco_query.strip() and "Cecos Unicos" in filtered_df.columns:
-        filtered_df = filtered_df[_contains_text(filtered_df["Cecos Unicos"], ceco_query)]
-
-    if activity_query.strip():
-        activity_mask = pd.Series([False] * len(filtered_df), index=filtered_df.index)
-        if "Actividades Unicas" in filtered_df.columns:
-            activity_mask = activity_mask | _contains_text(filtered_df["Actividades Unicas"], activity_query)
-        if "Actividades (con Cod. Actividad)" in filtered_df.columns:
-            activity_mask = activity_mask | _contains_text(
-                filtered_df["Actividades (con Cod. Actividad)"], activity_query
-            )
-        filtered_df = filtered_df[activity_mask]
-
-    if sort_by in filtered_df.columns:
-        filtered_df = filtered_df.sort_values(by=sort_by, ascending=ascending, kind="stable")
+    # Filtros, busqueda y orden salen del indice: solo se copian las filas de la pagina.
+    positions = results_index.select(
+        quick_filter=quick_filter,
+        search_query=search_query,
+        ceco_query=ceco_query,
+        activity_query=activity_query,
+        sort_by=sort_by,
+        ascending=ascending,
+        search_state=st.session_state.setdefault(SEARCH_STATE_KEY, {}),
+    )
 
     show_cols = [
+        CHANGE_COL,
         "Persona",
         "Documento",
         "Filas Persona",
@@ -343,14 +620,14 @@ def _render_results_table(stats_df: pd.DataFrame) -> pd.DataFrame:
         "Observaciones",
         "Tiene Problemas",
     ]
-    show_cols = [col for col in show_cols if col in filtered_df.columns]
+    show_cols = [col for col in show_cols if col in stats_df.columns]
 
-    if filtered_df.empty:
+    if len(positions) == 0:
         st.info("No hay registros para mostrar con esos filtros.")
-        return filtered_df
+        return positions
 
     p1, p2 = st.columns([1, 2])
-    total_rows = len(filtered_df)
+    total_rows = len(positions)
     total_pages = max(1, math.ceil(total_rows / rows_per_page))
     with p1:
         page = st.number_input("Pagina", min_value=1, max_value=total_pages, value=1, step=1)
@@ -359,12 +636,15 @@ def _render_results_table(stats_df: pd.DataFrame) -> pd.DataFrame:
     with p2:
         st.caption(f"Mostrando {start + 1}-{end} de {total_rows} registros. Filtro rapido: {quick_filter}.")
 
-    page_df = filtered_df.iloc[start:end][show_cols]
-    st.dataframe(page_df, use_container_width=True, height=420)
-    return filtered_df
+    page_df = stats_df.iloc[positions[start:end]][show_cols]
+    if CHANGE_COL in page_df.columns:
+        st.dataframe(page_df.style.apply(_highlight_changes, axis=1), use_container_width=True, height=420)
+    else:
+        st.dataframe(page_df, use_container_width=True, height=420)
+    return positions
 
 
-def _render_person_detail(stats_df: pd.DataFrame) -> None:
+def _render_person_detail(stats_df: pd.DataFrame, results_index: ResultsIndex, positions: np.ndarray) -> None:
     _render_section_header("Detalle por persona", "Busca por nombre y revisa el detalle del registro")
     person_search = st.text_input(
         "Buscar persona para detalle",
@@ -372,16 +652,24 @@ def _render_person_detail(stats_df: pd.DataFrame) -> None:
         placeholder="Escribe nombre o parte del nombre",
         help="No necesitas seleccionar DNI para encontrar una persona.",
     )
-    detail_df = stats_df.copy()
-    if person_search.strip():
-        detail_df = detail_df[_contains_text(detail_df["Persona"], person_search)]
-    if detail_df.empty:
+    # Las opciones son posiciones de stats_df: elegir una persona no recorre la tabla.
+    person_options, total_matches = results_index.find_people(
+        positions, person_search, search_state=st.session_state.setdefault(SEARCH_STATE_KEY, {})
+    )
+    if total_matches == 0:
         st.info("No se encontro persona para el termino de busqueda.")
         return
+    if total_matches > len(person_options):
+        st.caption(
+            f"Mostrando {len(person_options)} de {total_matches} personas. Escribe mas del nombre para acotar."
+        )
 
-    person_options = detail_df["Persona"].astype(str).tolist()
-    selected_person = st.selectbox("Selecciona una persona", options=person_options)
-    person_data = detail_df[detail_df["Persona"] == selected_person].iloc[0]
+    selected_position = st.selectbox(
+        "Selecciona una persona",
+        options=person_options.tolist(),
+        format_func=lambda position: results_index.person_labels[position],
+    )
+    person_data = stats_df.iloc[selected_position]
 
     c1, c2, c3 = st.columns(3)
     with c1:
@@ -424,18 +712,58 @@ def _build_export_dataframe(df: pd.DataFrame, for_excel: bool = True) -> pd.Data
     if not for_excel:
         return export_df
 
-    if "Cecos Diferentes" in export_df.columns:
-        export_df["Cecos Diferentes"] = export_df["Cecos Diferentes"].map(
-            lambda x: "SI" if bool(x) else "NO"
-        )
-    if "Tiene Problemas" in export_df.columns:
-        export_df["Tiene Problemas"] = export_df["Tiene Problemas"].map(
-            lambda x: "SI" if bool(x) else "NO"
-        )
+    for col in ("Cecos Diferentes", "Tiene Problemas"):
+        if col in export_df.columns:
+            export_df[col] = np.where(export_df[col].astype(bool), "SI", "NO")
     return export_df
 
 
-def _render_observations_view(stats_df: pd.DataFrame) -> None:
+def _export_files() -> dict:
+    """Archivos ya generados para la validacion actual, por (tipo, formato)."""
+    validation_id = st.session_state.get(JOB_STATE_KEY)
+    cache = st.session_state.get(EXPORTS_STATE_KEY)
+    if cache is None or cache["validation_id"] != validation_id:
+        cache = {"validation_id": validation_id, "files": {}}
+        st.session_state[EXPORTS_STATE_KEY] = cache
+    return cache["files"]
+
+
+def _render_export_download(source_df: pd.DataFrame, kind: str, label: str, sheet_name: str, file_stem: str) -> None:
+    """Genera el archivo solo cuando se pide y lo reutiliza mientras no cambie la validacion."""
+    formats = available_export_formats() if len(source_df) >= LARGE_EXPORT_ROWS else ["xlsx"]
+    file_format = "xlsx"
+    if len(formats) > 1:
+        file_format = st.radio(
+            "Formato",
+            options=formats,
+            format_func=lambda value: EXPORT_FORMATS[value][0],
+            horizontal=True,
+            key=f"vd_export_format_{kind}",
+            help="Para resultados muy grandes CSV o Parquet se generan y abren mas rapido que Excel.",
+        )
+    format_label, mime = EXPORT_FORMATS[file_format]
+
+    files = _export_files()
+    data = files.get((kind, file_format))
+    if data is None:
+        if not st.button(f"Preparar {label} ({format_label})", key=f"vd_export_prepare_{kind}_{file_format}"):
+            return
+        export_df = _build_export_dataframe(source_df, for_excel=file_format != "parquet")
+        with st.spinner("Generando archivo..."):
+            data = run_in_pool(export_bytes, export_df, file_format, sheet_name)
+        files[(kind, file_format)] = data
+
+    st.download_button(
+        label=f"Descargar {label} ({format_label})",
+        data=data,
+        file_name=f"{file_stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{file_format}",
+        mime=mime,
+        key=f"vd_export_download_{kind}_{file_format}",
+    )
+
+
+@_fragment
+def _render_observations_view(stats_df: pd.DataFrame, results_index: ResultsIndex) -> None:
     _render_section_header(
         "Vista de observaciones",
         "Solo registros con problemas (CECO diferentes o vacios). Aqui puedes revisar y descargar el Excel.",
@@ -444,7 +772,7 @@ def _render_observations_view(stats_df: pd.DataFrame) -> None:
         st.info("No hay columna de problemas en los datos.")
         return
 
-    problems_df = stats_df[stats_df["Tiene Problemas"].astype(bool)].copy()
+    problems_df = stats_df[results_index.quick_filters.get("Solo con problemas", np.zeros(len(stats_df), dtype=bool))]
     if problems_df.empty:
         st.success("No hay observaciones: nadie tiene CECO diferentes ni vacios.")
         return
@@ -462,35 +790,27 @@ def _render_observations_view(stats_df: pd.DataFrame) -> None:
     st.dataframe(problems_df[view_cols], use_container_width=True, height=400)
     st.caption(f"Total: {len(problems_df)} registros con observaciones.")
 
-    export_df = _build_export_dataframe(problems_df, for_excel=True)
-    buf = io.BytesIO()
-    with pd.ExcelWriter(buf, engine="openpyxl") as writer:
-        export_df.to_excel(writer, index=False, sheet_name="Observaciones")
-
-    st.download_button(
-        label="Descargar Excel con observaciones",
-        data=buf.getvalue(),
-        file_name=f"observaciones_ceco_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
+    _render_export_download(problems_df, "observaciones", "observaciones", "Observaciones", "observaciones_ceco")
 
 
+@_fragment
 def _render_export(stats_df: pd.DataFrame) -> None:
     _render_section_header(
         "Exportar resultados",
-        "Descarga la validacion completa en Excel (vista limpia).",
+        "Descarga la validacion completa (vista limpia). El archivo se genera al pedirlo.",
     )
-    export_all_df = _build_export_dataframe(stats_df, for_excel=True)
-    full_output = io.BytesIO()
-    with pd.ExcelWriter(full_output, engine="openpyxl") as writer:
-        export_all_df.to_excel(writer, index=False, sheet_name="Validacion")
+    _render_export_download(stats_df, "validacion", "validacion completa", "Validacion", "validacion_ceco_actividad")
 
-    st.download_button(
-        label="Descargar validacion completa (Excel)",
-        data=full_output.getvalue(),
-        file_name=f"validacion_ceco_actividad_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
+
+def _render_results(stats_df: pd.DataFrame, file_dates: list[str]) -> None:
+    results_index = st.session_state.get(INDEX_STATE_KEY)
+    if results_index is None or results_index.size != len(stats_df):
+        results_index = ResultsIndex(stats_df, file_dates)
+        st.session_state[INDEX_STATE_KEY] = results_index
+    _render_summary(results_index, file_dates)
+    _render_table_and_detail(stats_df, results_index)
+    _render_observations_view(stats_df, results_index)
+    _render_export(stats_df)
 
 
 def run_app():
@@ -525,42 +845,55 @@ def run_app():
     else:
         selected_sheet = sheet_names[0]
 
-    df = load_excel(uploaded_file, sheet_name=selected_sheet)
+    df, total_rows = load_excel_preview(uploaded_file, sheet_name=selected_sheet)
     if df is None:
         return
     if df.empty:
         st.warning("El archivo esta vacio.")
         return
 
-    _render_preview(df)
-    config = _render_configuration(df)
+    _render_preview(df, total_rows)
+    config = _render_configuration(df, file_digest(uploaded_file), selected_sheet)
 
-    if st.button("Procesar validacion", type="primary"):
-        try:
-            _run_validation(df, config)
-            st.success("Validacion completada.")
-        except ValueError as exc:
-            st.error(str(exc))
-        except Exception as exc:
-            st.error(f"Ocurrio un error durante la validacion: {exc}")
-
-    if STATS_STATE_KEY not in st.session_state:
+    try:
+        rules = load_omission_rules()
+    except ValueError as exc:
+        st.error(str(exc))
         return
 
-    stats_df = st.session_state[STATS_STATE_KEY]
-    file_dates = st.session_state.get(DATES_STATE_KEY, [])
-
-    _render_summary(stats_df, file_dates)
-    filtered_df = _render_results_table(stats_df)
-
-    _render_observations_view(stats_df)
+    # El trabajo se busca por llave en cada rerun: si la pagina se refresco y se
+    # vuelve a subir el mismo archivo con la misma configuracion, se retoma.
+    job_store = get_job_store()
+    previous = st.session_state.get(SNAPSHOT_STATE_KEY)
+    job_key = _validation_job_key(uploaded_file, selected_sheet, config, rules, previous)
+    load_message = pool_load_message()
+    if load_message:
+        st.caption(load_message)
+    if st.button("Procesar validacion", type="primary"):
+        job_store.submit(
+            job_key,
+            _validation_job,
+            uploaded_file.getvalue(),
+            selected_sheet,
+            df,
+            config,
+            rules,
+            total_rows,
+            previous,
+            current_session_id(),
+            rows_total=total_rows,
+        )
+    job = job_store.get(job_key)
+    job_running = _render_job_status(job) if job is not None else False
 
-    if filtered_df.empty:
-        st.info("No hay registros para mostrar con los filtros actuales.")
-    else:
-        _render_person_detail(filtered_df)
+    if job_running:
+        # Mientras corre solo se muestra el progreso: los resultados anteriores no
+        # corresponden a esta configuracion y no se rearman exportaciones en cada refresco.
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
 
-    _render_export(stats_df)
+    if STATS_STATE_KEY in st.session_state:
+        _render_results(st.session_state[STATS_STATE_KEY], st.session_state.get(DATES_STATE_KEY, []))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,172 @@
+"""Revalidacion incremental entre cargas sucesivas del mismo archivo.
+
+Cada validacion deja una foto (ValidationSnapshot) con las stats de cada persona
+en el orden de grupos y una huella del conjunto de filas de esa persona (solo
+las columnas que usa la validacion). Si se vuelve a subir el archivo con la
+misma configuracion y la misma version de reglas, solo se validan las personas
+nuevas o cuya huella cambio; el resto reutiliza las stats anteriores.
+
+Las stats de una persona dependen solo de sus filas, salvo la fecha: el formato
+se infiere sobre toda la columna, por eso la fecha se normaliza a YYYY-MM-DD con
+el archivo completo antes de calcular huellas y de validar el subconjunto.
+"""
+
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+from Comun.workers import get_worker_pool
+
+try:
+    from ValidacionDeDatos.parallel import PARALLEL_MIN_ROWS, validate_people_groups
+    from ValidacionDeDatos.validation_logic import (
+        STATS_COLUMNS,
+        OmissionMatcher,
+        _finalize_stats,
+        _require_columns,
+        normalize_dates,
+    )
+except ImportError:
+    from parallel import PARALLEL_MIN_ROWS, validate_people_groups
+    from validation_logic import (
+        STATS_COLUMNS,
+        OmissionMatcher,
+        _finalize_stats,
+        _require_columns,
+        normalize_dates,
+    )
+
+
+CHANGE_COL = "Cambio"
+CHANGE_NEW = "Nueva"
+CHANGE_MODIFIED = "Modificada"
+
+
+class ValidationSnapshot:
+    """Stats sin orden final (fila i = persona person_keys[i]) y huella de cada persona.
+
+    digest identifica el contenido de la foto (llave, personas y huellas): dos fotos con
+    el mismo digest dan los mismos cambios frente a una misma carga nueva.
+    """
+
+    def __init__(self, key: str, person_keys: pd.Index, fingerprints: np.ndarray, stats_df: pd.DataFrame):
+        self.key = key
+        self.person_keys = person_keys
+        self.fingerprints = fingerprints
+        self.stats_df = stats_df
+        h = hashlib.blake2b(key.encode("utf-8"), digest_size=16)
+        h.update(pd.util.hash_pandas_object(person_keys.to_frame(index=False), index=False).to_numpy().tobytes())
+        h.update(np.ascontiguousarray(fingerprints).tobytes())
+        self.digest = h.hexdigest()
+
+
+def snapshot_key(engine_kwargs: dict, rules_version: str) -> str:
+    """Llave de compatibilidad: mismas columnas resueltas y misma version de reglas."""
+    return f"{json.dumps(engine_kwargs, sort_keys=True)}:{rules_version}"
+
+
+def person_fingerprints(
+    df: pd.DataFrame, person_col: str, columns: list[str], document_col: str | None = None
+) -> tuple[pd.Index, np.ndarray, np.ndarray]:
+    """(personas en orden de groupby, huella por persona, grupo de cada fila).
+
+    La huella combina la suma de los hashes de fila (no depende del orden), la
+    cantidad de filas y el documento de la primera fila (el Documento que se muestra).
+    """
+    grouped = df.groupby(person_col, dropna=False)
+    group_ids = grouped.ngroup().to_numpy()
+    person_keys = grouped.size().index
+    n_groups = len(person_keys)
+
+    row_hashes = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+    sums = np.zeros(n_groups, dtype=np.uint64)
+    np.add.at(sums, group_ids, row_hashes)
+    counts = np.bincount(group_ids, minlength=n_groups).astype(np.uint64)
+    _, first_rows = np.unique(group_ids, return_index=True)
+    combined = pd.DataFrame({"suma": sums, "filas": counts})
+    if document_col:
+        combined["documento"] = pd.util.hash_array(df[document_col].iloc[first_rows].to_numpy(dtype=object))
+    return person_keys, pd.util.hash_pandas_object(combined, index=False).to_numpy(), group_ids
+
+
+def validate_incremental(
+    df: pd.DataFrame,
+    engine_kwargs: dict,
+    rules: OmissionMatcher,
+    rules_version: str,
+    previous: ValidationSnapshot | None = None,
+    session_id: str = "local",
+    progress=None,
+) -> tuple[pd.DataFrame, ValidationSnapshot, dict | None]:
+    """Valida df reutilizando previous para las personas cuya huella no cambio.
+
+    Devuelve (stats con orden final, foto nueva, cambios). Las stats llevan la
+    columna CHANGE_COL y cambios = {"modificadas", "nuevas", "eliminadas",
+    "reutilizadas"} solo si previous era compatible; si no, cambios es None.
+    """
+    person_col = engine_kwargs["person_col"]
+    _require_columns(df, [person_col, engine_kwargs["ceco_col"], engine_kwargs["activity_col"]])
+    date_col = engine_kwargs.get("date_col")
+    if date_col:
+        df = df.assign(**{date_col: normalize_dates(df[date_col])})
+
+    key = snapshot_key(engine_kwargs, rules_version)
+    columns = list(dict.fromkeys(col for col in engine_kwargs.values() if col))
+    # Un cambio en una columna de las excepciones tambien cambia el resultado de la persona.
+    columns += [col for col in rules.columns if col in df.columns and col not in columns]
+    person_keys, fingerprints, group_ids = person_fingerprints(
+        df, person_col, columns, engine_kwargs.get("document_col")
+    )
+
+    if previous is not None and previous.key == key:
+        previous_positions = previous.person_keys.get_indexer(person_keys)
+        is_new = previous_positions < 0
+        changed = is_new.copy()
+        known = ~is_new
+        changed[known] = previous.fingerprints[previous_positions[known]] != fingerprints[known]
+    else:
+        previous = None
+        previous_positions = np.full(len(person_keys), -1)
+        is_new = np.ones(len(person_keys), dtype=bool)
+        changed = is_new
+
+    changed_df = df[changed[group_ids]]
+    shards = get_worker_pool().max_workers if len(changed_df) >= PARALLEL_MIN_ROWS else 1
+    changed_stats, distinct_stats = validate_people_groups(
+        changed_df, engine_kwargs, rules, shards=shards, session_id=session_id, progress=progress
+    )
+
+    # Se arma el resultado completo en el orden de grupos: las personas
+    # recalculadas salen de changed_stats (mismo orden relativo) y el resto de la foto anterior.
+    parts = [(np.flatnonzero(changed), changed_stats)]
+    if previous is not None:
+        parts.append((np.flatnonzero(~changed), previous.stats_df.iloc[previous_positions[~changed]]))
+    parts = [(positions, part) for positions, part in parts if len(positions)]
+    if parts:
+        group_order = np.concatenate([positions for positions, _ in parts])
+        stats_df = pd.concat([part for _, part in parts], ignore_index=True)
+        stats_df = stats_df.iloc[np.argsort(group_order, kind="stable")].reset_index(drop=True)
+    else:
+        stats_df = pd.DataFrame(columns=STATS_COLUMNS)
+    snapshot = ValidationSnapshot(key, person_keys, fingerprints, stats_df)
+
+    changes = None
+    result = stats_df.copy()
+    if previous is not None:
+        labels = np.full(len(person_keys), "", dtype=object)
+        labels[changed & ~is_new] = CHANGE_MODIFIED
+        labels[is_new] = CHANGE_NEW
+        result[CHANGE_COL] = labels
+        changes = {
+            "modificadas": int((changed & ~is_new).sum()),
+            "nuevas": int(is_new.sum()),
+            "eliminadas": int(len(previous.person_keys) - (~is_new).sum()),
+            "reutilizadas": int((~changed).sum()),
+        }
+    if progress is not None:
+        progress("Ordenando resultados", 0.95)
+    if result.empty:
+        return pd.DataFrame(columns=STATS_COLUMNS), snapshot, changes
+    return _finalize_stats(result, distinct_stats), snapshot, changes
@@ -0,0 +1,234 @@
+"""Reglas de omision de CECO cargadas desde archivo (JSON o YAML).
+
+Formato::
+
+    {
+      "actividades": ["cosecha", "acopio"],
+      "prefijos_codigo": ["MANTCAM-007-"],
+      "regex_actividad": ["^estibador(es)?$"],
+      "excepciones": [
+        {
+          "nombre": "Fundo Norte en campania",
+          "columna": "Fundo",
+          "valores": ["NORTE"],
+          "desde": "2025-01-01",
+          "hasta": "2025-03-31",
+          "actividades": ["poda"],
+          "prefijos_codigo": [],
+          "regex_actividad": [],
+          "reemplaza_base": false
+        }
+      ]
+    }
+
+Las reglas base que el archivo no trae ("actividades", "prefijos_codigo") son
+las listas CECO_OMITTED_* de validation_logic, la unica fuente de esas listas;
+si el archivo las trae, reemplazan a las integradas. Cada excepcion aplica solo
+a las filas que cumplen su condicion (valor de una columna, rango de fechas o
+ambos) y agrega sus reglas a las base; con "reemplaza_base" esas filas dejan de
+usar las reglas base. El archivo se compila una vez y se reutiliza mientras no
+cambie (mtime + hash de contenido).
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from Comun.dates import parse_dates
+
+try:
+    from ValidacionDeDatos.validation_logic import (
+        CECO_OMITTED_ACTIVITIES,
+        CECO_OMITTED_CODE_PREFIXES,
+        DistinctMapper,
+        OmissionMatcher,
+        _normalize_text,
+    )
+except ImportError:
+    from validation_logic import (
+        CECO_OMITTED_ACTIVITIES,
+        CECO_OMITTED_CODE_PREFIXES,
+        DistinctMapper,
+        OmissionMatcher,
+        _normalize_text,
+    )
+
+
+RULES_PATH_ENV = "VD_REGLAS_OMISION"
+DEFAULT_RULES_PATH = Path(__file__).with_name("reglas_omision.json")
+
+_RULE_LIST_KEYS = ("actividades", "prefijos_codigo", "regex_actividad")
+
+
+class OmissionOverride:
+    def __init__(self, spec: dict):
+        self.name = str(spec.get("nombre") or "Excepcion")
+        self.column = spec.get("columna") or None
+        self.values = frozenset(_normalize_text(value) for value in spec.get("valores", []))
+        self.start = pd.Timestamp(spec["desde"]) if spec.get("desde") else None
+        self.end = pd.Timestamp(spec["hasta"]) if spec.get("hasta") else None
+        self.replaces_base = bool(spec.get("reemplaza_base", False))
+        self.matcher = OmissionMatcher(
+            spec.get("actividades", []),
+            spec.get("prefijos_codigo", []),
+            spec.get("regex_actividad", []),
+        )
+
+    def applies_to(self, df: pd.DataFrame, dates: pd.Series | None) -> np.ndarray:
+        mask = np.ones(len(df), dtype=bool)
+        if self.column:
+            if self.column not in df.columns:
+                return np.zeros(len(df), dtype=bool)
+            column_values = DistinctMapper.from_values(df[self.column]).map(_normalize_text)
+            mask &= column_values.map(lambda value: value in self.values, dtype=bool).values()
+        if self.start is not None or self.end is not None:
+            if dates is None:
+                return np.zeros(len(df), dtype=bool)
+            date_mask = dates.notna()
+            if self.start is not None:
+                date_mask &= dates >= self.start
+            if self.end is not None:
+                date_mask &= dates <= self.end
+            mask &= date_mask.to_numpy(dtype=bool)
+        return mask
+
+
+class CompiledOmissionRules:
+    """Plan de omision compilado: reglas base + excepciones por columna/fecha."""
+
+    def __init__(self, spec: dict, source: str, version: str):
+        self.source = source
+        self.version = version
+        self.base = OmissionMatcher(
+            spec.get("actividades", CECO_OMITTED_ACTIVITIES),
+            spec.get("prefijos_codigo", CECO_OMITTED_CODE_PREFIXES),
+            spec.get("regex_actividad", []),
+        )
+        self.overrides = [OmissionOverride(item) for item in spec.get("excepciones", [])]
+        # Columnas de las excepciones: hay que leerlas junto con las de la validacion.
+        self.columns = tuple(dict.fromkeys(override.column for override in self.overrides if override.column))
+
+    def omitted_mask(
+        self,
+        df: pd.DataFrame,
+        activities: DistinctMapper,
+        activity_codes: DistinctMapper,
+        date_col: str | None = None,
+    ) -> np.ndarray:
+        base_mask = self.base.omitted_mask(df, activities, activity_codes, date_col)
+        if not self.overrides:
+            return base_mask
+
+        dates = None
+        if date_col and date_col in df.columns:
+            dates = parse_dates(df[date_col])[0]
+
+        mask = base_mask.copy()
+        for override in self.overrides:
+            rows = override.applies_to(df, dates)
+            if not rows.any():
+                continue
+            override_mask = override.matcher.omitted_mask(df, activities, activity_codes, date_col)
+            if override.replaces_base:
+                mask[rows] = override_mask[rows]
+            else:
+                mask |= rows & override_mask
+        return mask
+
+
+def _validate_spec(spec, source: str) -> dict:
+    if not isinstance(spec, dict):
+        raise ValueError(f"Archivo de reglas de omision invalido ({source}): se esperaba un objeto.")
+    sections = [spec] + list(spec.get("excepciones", []) or [])
+    for section in sections:
+        if not isinstance(section, dict):
+            raise ValueError(f"Archivo de reglas de omision invalido ({source}): excepcion mal formada.")
+        for key in _RULE_LIST_KEYS:
+            values = section.get(key, [])
+            if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+                raise ValueError(
+                    f"Archivo de reglas de omision invalido ({source}): '{key}' debe ser una lista de textos."
+                )
+        for pattern in section.get("regex_actividad", []):
+            try:
+                re.compile(pattern)
+            except re.error as exc:
+                raise ValueError(
+                    f"Regex de actividad invalida en reglas de omision ({source}): {pattern!r} ({exc})"
+                ) from exc
+        # Cada regex puede compilar sola y fallar al unirla con las demas (grupos con
+        # el mismo nombre, flags en medio): se compila la alternancia que usa OmissionMatcher.
+        try:
+            OmissionMatcher(section.get("actividades", []), [], section.get("regex_actividad", []))
+        except re.error as exc:
+            raise ValueError(
+                f"Regex de actividad invalida en reglas de omision ({source}): "
+                f"no se pueden combinar {section.get('regex_actividad')!r} ({exc})"
+            ) from exc
+        for key in ("desde", "hasta"):
+            if section.get(key):
+                try:
+                    pd.Timestamp(section[key])
+                except (TypeError, ValueError) as exc:
+                    raise ValueError(
+                        f"Fecha invalida en reglas de omision ({source}): {key}={section[key]!r}"
+                    ) from exc
+    return spec
+
+
+def _parse_rules(content: bytes, path: Path) -> dict:
+    if path.suffix.lower() in {".yml", ".yaml"}:
+        try:
+            import yaml
+        except ImportError as exc:
+            raise ValueError(
+                "Para usar reglas de omision en YAML instala PyYAML o usa un archivo JSON."
+            ) from exc
+        return yaml.safe_load(content) or {}
+    try:
+        return json.loads(content.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise ValueError(f"Archivo de reglas de omision invalido ({path.name}): {exc}") from exc
+
+
+_BUILTIN_RULES = CompiledOmissionRules({}, source="integradas", version="integradas")
+_cache: dict[str, tuple[int, str, CompiledOmissionRules]] = {}
+_cache_lock = threading.Lock()
+
+
+def load_omission_rules(path: str | os.PathLike | None = None) -> CompiledOmissionRules:
+    """Devuelve el plan compilado del archivo de reglas.
+
+    Solo se relee el archivo si cambio su mtime y solo se recompila si ademas cambio
+    su contenido. Sin archivo se usan las listas integradas en validation_logic.
+    """
+    rules_path = Path(path or os.environ.get(RULES_PATH_ENV) or DEFAULT_RULES_PATH)
+    try:
+        mtime_ns = rules_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        if path:
+            raise ValueError(f"No se encontro el archivo de reglas de omision: {rules_path}")
+        return _BUILTIN_RULES
+
+    key = str(rules_path.resolve())
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == mtime_ns:
+            return cached[2]
+
+        content = rules_path.read_bytes()
+        digest = hashlib.sha256(content).hexdigest()
+        if cached and cached[1] == digest:
+            _cache[key] = (mtime_ns, digest, cached[2])
+            return cached[2]
+
+        spec = _validate_spec(_parse_rules(content, rules_path), rules_path.name)
+        compiled = CompiledOmissionRules(spec, source=rules_path.name, version=digest[:12])
+        _cache[key] = (mtime_ns, digest, compiled)
+        return compiled
@@ -0,0 +1,265 @@
+"""Validacion de CECO/Actividad en paralelo, particionando por persona.
+
+Cada persona (grupo de la columna de persona, con las mismas reglas que el
+groupby del motor serial) cae entera en una sola particion; las particiones se
+validan con el motor vectorizado en el pool de procesos compartido y los
+resultados se reordenan al orden de grupos original antes del mismo orden final
+que usa validate_people_ceco_activity, asi que el resultado es identico.
+
+Las particiones viajan como archivos Arrow IPC en memoria compartida (/dev/shm
+si existe) que cada proceso abre con mmap, en lugar de copiarse por el pipe del
+pool. Si alguna columna no se puede llevar a Arrow sin alterar sus valores
+(objetos con numeros mezclados, fechas sueltas...) o no hay pyarrow, la
+particion se envia como DataFrame.
+"""
+
+import os
+import tempfile
+import uuid
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import numpy as np
+import pandas as pd
+
+from Comun.workers import get_worker_pool, wait_with_progress
+
+try:
+    from ValidacionDeDatos.validation_logic import (
+        DEFAULT_OMISSION_MATCHER,
+        STATS_COLUMNS,
+        OmissionMatcher,
+        _finalize_stats,
+        _require_columns,
+        _validate_people_vectorized,
+        new_distinct_stats,
+        normalize_dates,
+        resolve_activity_code_column,
+        validate_people_ceco_activity,
+    )
+except ImportError:
+    from validation_logic import (
+        DEFAULT_OMISSION_MATCHER,
+        STATS_COLUMNS,
+        OmissionMatcher,
+        _finalize_stats,
+        _require_columns,
+        _validate_people_vectorized,
+        new_distinct_stats,
+        normalize_dates,
+        resolve_activity_code_column,
+        validate_people_ceco_activity,
+    )
+
+
+# Por debajo de esta cantidad de filas el costo de repartir supera la ganancia.
+PARALLEL_MIN_ROWS = 200_000
+SHARED_MEMORY_DIR = "/dev/shm"
+_GROUP_ORDER_COL = "__orden_grupo"
+# Columnas object que Arrow ida y vuelta deja con los mismos valores.
+_ARROW_SAFE_OBJECT_KINDS = {"string", "empty"}
+
+
+def _shard_directory() -> str:
+    if os.path.isdir(SHARED_MEMORY_DIR) and os.access(SHARED_MEMORY_DIR, os.W_OK):
+        return SHARED_MEMORY_DIR
+    return tempfile.gettempdir()
+
+
+def _arrow_safe(df: pd.DataFrame) -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    for col in df.columns:
+        if not isinstance(col, str):
+            return False
+        series = df[col]
+        if series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) not in _ARROW_SAFE_OBJECT_KINDS:
+            return False
+    return True
+
+
+def _write_shard(shard: pd.DataFrame, directory: str) -> str:
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(shard, preserve_index=False)
+    path = os.path.join(directory, f"aquanqa_particion_{uuid.uuid4().hex}.arrow")
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return path
+
+
+def _read_shard(path: str) -> pd.DataFrame:
+    import pyarrow as pa
+
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+def _validate_shard(shard, engine_kwargs: dict, rules: OmissionMatcher):
+    """Corre en un proceso del pool: stats sin ordenar + orden global de cada grupo."""
+    if isinstance(shard, str):
+        shard = _read_shard(shard)
+    distinct_stats = new_distinct_stats()
+    stats_df = _validate_people_vectorized(shard, stats=distinct_stats, rules=rules, **engine_kwargs)
+    # Los grupos salen en el mismo orden que groupby(person_col, dropna=False).
+    group_order = (
+        shard.groupby(engine_kwargs["person_col"], dropna=False)[_GROUP_ORDER_COL].first().to_numpy()
+    )
+    return stats_df, group_order, distinct_stats
+
+
+def validate_people_groups(
+    df: pd.DataFrame,
+    engine_kwargs: dict,
+    rules: OmissionMatcher,
+    shards: int = 1,
+    session_id: str = "local",
+    progress=None,
+) -> tuple[pd.DataFrame, dict[str, int]]:
+    """Stats del motor vectorizado en el orden de grupos de df (sin el orden final).
+
+    La fila i corresponde al grupo i de df.groupby(person_col, dropna=False). Se
+    valida en el pool compartido en shards particiones; engine_kwargs son los
+    argumentos de columna ya resueltos de _validate_people_vectorized.
+    """
+    distinct_stats = new_distinct_stats()
+    if df.empty:
+        return pd.DataFrame(columns=STATS_COLUMNS), distinct_stats
+    columns = list(dict.fromkeys(col for col in engine_kwargs.values() if col))
+    columns += [col for col in rules.columns if col in df.columns and col not in columns]
+    group_ids = df.groupby(engine_kwargs["person_col"], dropna=False).ngroup().to_numpy()
+    frame = df[columns].assign(**{_GROUP_ORDER_COL: group_ids})
+
+    # Reparto por id de grupo: todas las filas de una persona van a la misma particion.
+    n_shards = max(1, shards)
+    shard_ids = group_ids % n_shards
+    row_order = np.argsort(shard_ids, kind="stable")
+    bounds = np.searchsorted(shard_ids[row_order], np.arange(1, n_shards))
+    shard_rows = [rows for rows in np.split(row_order, bounds) if len(rows)]
+
+    use_arrow = len(shard_rows) > 1 and _arrow_safe(frame)
+    directory = _shard_directory()
+    pool = get_worker_pool()
+    paths: list[str] = []
+    futures = []
+    try:
+        for rows in shard_rows:
+            shard = frame.iloc[rows] if len(shard_rows) > 1 else frame
+            if use_arrow:
+                payload = _write_shard(shard, directory)
+                paths.append(payload)
+            else:
+                payload = shard
+            futures.append(pool.submit(session_id, _validate_shard, payload, engine_kwargs, rules))
+
+        if len(futures) == 1 and progress is not None:
+            results = [
+                wait_with_progress(
+                    futures[0],
+                    _validate_shard,
+                    lambda stage, fraction, rows_done=None: progress(stage, fraction),
+                    "Validando por persona",
+                    0.05,
+                    0.95,
+                )
+            ]
+        else:
+            pending = set(futures)
+            while pending:
+                _, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                if progress is not None:
+                    progress("Validando particiones", 0.05 + 0.9 * (len(futures) - len(pending)) / len(futures))
+            results = [future.result() for future in futures]
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+    finally:
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    for _, _, shard_stats in results:
+        for key in distinct_stats:
+            distinct_stats[key] += shard_stats[key]
+    stats_parts = [stats_df for stats_df, _, _ in results if not stats_df.empty]
+    if not stats_parts:
+        return pd.DataFrame(columns=STATS_COLUMNS), distinct_stats
+    group_order = np.concatenate([order for stats_df, order, _ in results if not stats_df.empty])
+    stats_df = pd.concat(stats_parts, ignore_index=True).iloc[np.argsort(group_order, kind="stable")]
+    return stats_df.reset_index(drop=True), distinct_stats
+
+
+def validate_people_parallel(
+    df: pd.DataFrame,
+    person_col: str,
+    ceco_col: str,
+    activity_col: str,
+    date_col: str | None = None,
+    document_col: str | None = None,
+    activity_code_col: str | None = None,
+    rules: OmissionMatcher | None = None,
+    infer_activity_code: bool = True,
+    shards: int | None = None,
+    session_id: str = "local",
+    progress=None,
+) -> pd.DataFrame:
+    """Igual que validate_people_ceco_activity (motor vectorizado) repartido en shards procesos.
+
+    Por defecto usa una particion por proceso del pool compartido; con una sola
+    particion valida en serie. progress(etapa, fraccion) se llama mientras se
+    esperan las particiones; si lanza, se cancelan las que aun no empezaron.
+    """
+    _require_columns(df, [person_col, ceco_col, activity_col])
+    n_shards = shards or get_worker_pool().max_workers
+    if n_shards <= 1 or df.empty:
+        return validate_people_ceco_activity(
+            df,
+            person_col,
+            ceco_col,
+            activity_col,
+            date_col=date_col,
+            document_col=document_col,
+            activity_code_col=activity_code_col,
+            rules=rules,
+            infer_activity_code=infer_activity_code,
+            progress=progress,
+        )
+
+    distinct_stats = new_distinct_stats()
+    if infer_activity_code:
+        activity_code_col = resolve_activity_code_column(
+            df, person_col, ceco_col, activity_col, activity_code_col, stats=distinct_stats
+        )
+    elif activity_code_col not in df.columns:
+        activity_code_col = None
+    engine_kwargs = {
+        "person_col": person_col,
+        "ceco_col": ceco_col,
+        "activity_col": activity_col,
+        "date_col": date_col if date_col and date_col in df.columns else None,
+        "document_col": document_col if document_col and document_col in df.columns else None,
+        "activity_code_col": activity_code_col,
+    }
+    if engine_kwargs["date_col"]:
+        # Una sola vez sobre todo df: el formato se infiere como en serie y las
+        # particiones reciben texto YYYY-MM-DD (que ademas viaja por Arrow).
+        df = df.assign(**{date_col: normalize_dates(df[date_col])})
+    stats_df, shard_stats = validate_people_groups(
+        df,
+        engine_kwargs,
+        rules if rules is not None else DEFAULT_OMISSION_MATCHER,
+        shards=n_shards,
+        session_id=session_id,
+        progress=progress,
+    )
+    if stats_df.empty:
+        return pd.DataFrame(columns=STATS_COLUMNS)
+    for key in distinct_stats:
+        distinct_stats[key] += shard_stats[key]
+    if progress is not None:
+        progress("Ordenando resultados", 0.95)
+    return _finalize_stats(stats_df, distinct_stats)
@@ -0,0 +1,191 @@
+"""Indice de la tabla de resultados, armado una vez por validacion.
+
+Guarda una mascara por filtro rapido, el texto de busqueda de cada fila ya en
+minusculas (los campos buscables unidos en una sola columna) y el orden estable
+de cada opcion de "Ordenar por" en ambos sentidos. Asi filtrar, buscar y paginar
+en cada rerun son operaciones sobre arreglos de posiciones, sin copiar stats_df
+ni volver a pasar a minusculas todas las columnas.
+"""
+
+import numpy as np
+import pandas as pd
+
+try:
+    from ValidacionDeDatos.incremental import CHANGE_COL
+    from ValidacionDeDatos.validation_logic import CECO_EVALUATED_COL, summarize_validation
+except ImportError:
+    from incremental import CHANGE_COL
+    from validation_logic import CECO_EVALUATED_COL, summarize_validation
+
+
+QUICK_FILTERS = [
+    "Todos",
+    "Solo con problemas",
+    "Solo CECO diferentes",
+    "Solo con vacios",
+    "Solo con omitidas CECO",
+]
+CHANGES_FILTER = "Solo con cambios"
+SEARCH_COLUMNS = [
+    "Persona",
+    "Documento",
+    "Cecos Unicos",
+    CECO_EVALUATED_COL,
+    "Actividades Unicas",
+    "Actividades (con Cod. Actividad)",
+    "Observaciones",
+]
+ACTIVITY_SEARCH_COLUMNS = ["Actividades Unicas", "Actividades (con Cod. Actividad)"]
+SORT_COLUMNS = ["Persona", "Tiene Problemas", "Filas Persona", "Filas Omitidas CECO"]
+# Cantidad de personas que se ofrecen en el selector del detalle.
+PERSON_OPTIONS_LIMIT = 50
+# Separador de campos: no puede quedar dentro de una busqueda (strip() lo quita de los extremos).
+_FIELD_SEPARATOR = "\x1f"
+
+
+class TextIndex:
+    """Busqueda por subcadena sin distinguir mayusculas sobre varias columnas.
+
+    Equivale a buscar la consulta en cada columna por separado y unir los
+    resultados. Si la consulta nueva contiene a la anterior (se sigue
+    escribiendo) solo se revisan las filas que ya coincidian. El indice es de
+    solo lectura (lo comparten las sesiones que validan el mismo archivo): la
+    busqueda anterior se guarda en un dict state de quien busca, uno por sesion.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: list[str]):
+        self.size = len(df)
+        self.columns = [col for col in columns if col in df.columns]
+        texts = None
+        for col in self.columns:
+            lowered = df[col].fillna("").astype(str).str.lower()
+            texts = lowered if texts is None else texts + _FIELD_SEPARATOR + lowered
+        self._texts = texts.reset_index(drop=True) if texts is not None else None
+
+    def contains(self, query: str, state: dict | None = None) -> np.ndarray:
+        """Filas que contienen query; sin state no se aprovecha la busqueda anterior."""
+        query = query.strip().lower()
+        if not query:
+            return np.ones(self.size, dtype=bool)
+        if self._texts is None or _FIELD_SEPARATOR in query:
+            return np.zeros(self.size, dtype=bool)
+        # La busqueda guardada solo sirve si es de este mismo indice.
+        last = state.get("last") if state is not None else None
+        if last is not None and last[0] is self and last[1] in query:
+            candidates = np.flatnonzero(last[2])
+        else:
+            candidates = np.arange(self.size)
+        mask = np.zeros(self.size, dtype=bool)
+        if len(candidates):
+            found = self._texts.iloc[candidates].str.contains(query, regex=False)
+            mask[candidates[found.to_numpy(dtype=bool)]] = True
+        if state is not None:
+            state["last"] = (self, query, mask)
+        return mask
+
+    def starts_with(self, positions: np.ndarray, query: str) -> np.ndarray:
+        """Para cada posicion, si su texto (la primera columna) empieza con query."""
+        query = query.strip().lower()
+        if self._texts is None or not len(positions):
+            return np.zeros(len(positions), dtype=bool)
+        return self._texts.iloc[positions].str.startswith(query).to_numpy(dtype=bool)
+
+
+def _text_state(search_state: dict | None, name: str) -> dict | None:
+    return search_state.setdefault(name, {}) if search_state is not None else None
+
+
+def _stable_orders(series: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """Orden ascendente y descendente estables, con vacios al final (como sort_values)."""
+    codes, _ = pd.factorize(series, sort=True)
+    top = int(codes.max()) + 1 if len(codes) else 0
+    ascending_key = np.where(codes < 0, top, codes)
+    descending_key = np.where(codes < 0, top, top - 1 - codes)
+    return (
+        np.argsort(ascending_key, kind="stable"),
+        np.argsort(descending_key, kind="stable"),
+    )
+
+
+class ResultsIndex:
+    def __init__(self, stats_df: pd.DataFrame, file_dates: list[str]):
+        self.size = len(stats_df)
+        self.summary = summarize_validation(stats_df, file_dates)
+
+        all_rows = np.ones(self.size, dtype=bool)
+        self.quick_filters = {"Todos": all_rows}
+        if not stats_df.empty:
+            self.quick_filters["Solo con problemas"] = stats_df["Tiene Problemas"].astype(bool).to_numpy()
+            self.quick_filters["Solo CECO diferentes"] = stats_df["Cecos Diferentes"].astype(bool).to_numpy()
+            self.quick_filters["Solo con vacios"] = (
+                stats_df["Tiene Ceco Vacio"] | stats_df["Tiene Actividad Vacia"]
+            ).to_numpy(dtype=bool)
+            if "Filas Omitidas CECO" in stats_df.columns:
+                self.quick_filters["Solo con omitidas CECO"] = (stats_df["Filas Omitidas CECO"] > 0).to_numpy()
+        self.has_changes = CHANGE_COL in stats_df.columns
+        if self.has_changes:
+            self.quick_filters[CHANGES_FILTER] = (stats_df[CHANGE_COL] != "").to_numpy()
+
+        self.search = TextIndex(stats_df, SEARCH_COLUMNS)
+        self.person_search = TextIndex(stats_df, ["Persona"])
+        self.person_labels = (
+            stats_df["Persona"].astype(str).to_numpy(dtype=object)
+            if "Persona" in stats_df.columns
+            else np.full(self.size, "", dtype=object)
+        )
+        self.ceco_search = TextIndex(stats_df, ["Cecos Unicos"]) if "Cecos Unicos" in stats_df.columns else None
+        self.activity_search = TextIndex(stats_df, ACTIVITY_SEARCH_COLUMNS)
+
+        self.sort_options = [col for col in SORT_COLUMNS if col in stats_df.columns]
+        if not self.sort_options and len(stats_df.columns):
+            self.sort_options = [stats_df.columns[0]]
+        self._orders = {col: _stable_orders(stats_df[col]) for col in self.sort_options}
+
+    def quick_filter_options(self) -> list[str]:
+        return QUICK_FILTERS + ([CHANGES_FILTER] if self.has_changes else [])
+
+    def select(
+        self,
+        quick_filter: str = "Todos",
+        search_query: str = "",
+        ceco_query: str = "",
+        activity_query: str = "",
+        sort_by: str | None = None,
+        ascending: bool = True,
+        search_state: dict | None = None,
+    ) -> np.ndarray:
+        """Posiciones de stats_df que pasan los filtros, en el orden pedido.
+
+        search_state es el dict de busquedas de la sesion (ver TextIndex.contains).
+        """
+        mask = self.quick_filters.get(quick_filter, self.quick_filters["Todos"]).copy()
+        if search_query.strip():
+            mask &= self.search.contains(search_query, _text_state(search_state, "search"))
+        if ceco_query.strip() and self.ceco_search is not None:
+            mask &= self.ceco_search.contains(ceco_query, _text_state(search_state, "ceco"))
+        if activity_query.strip():
+            mask &= self.activity_search.contains(activity_query, _text_state(search_state, "activity"))
+
+        if sort_by in self._orders:
+            order = self._orders[sort_by][0 if ascending else 1]
+            return order[mask[order]]
+        return np.flatnonzero(mask)
+
+    def find_people(
+        self,
+        positions: np.ndarray,
+        query: str,
+        limit: int = PERSON_OPTIONS_LIMIT,
+        search_state: dict | None = None,
+    ) -> tuple[np.ndarray, int]:
+        """Hasta limit posiciones (de positions) cuyo nombre contiene query, y el total.
+
+        Conserva el orden de positions, pero los nombres que empiezan con la
+        consulta van primero.
+        """
+        if query.strip():
+            matches = self.person_search.contains(query, _text_state(search_state, "person"))
+            positions = positions[matches[positions]]
+            prefix = self.person_search.starts_with(positions, query)
+            positions = np.concatenate([positions[prefix], positions[~prefix]])
+        return positions[:limit], len(positions)
@@ -0,0 +1,397 @@
+"""Validacion de CECO/Actividad por bloques, para archivos que no caben en memoria.
+
+Las filas se leen en bloques (XLSX en modo read-only, CSV o Parquet) y cada bloque
+se pliega en acumuladores por persona: conjuntos de CECO, CECO evaluados,
+actividades, firmas actividad+codigo y fechas, mas conteos de filas, omitidas y
+vacios. Del bloque no queda nada en memoria, asi que el consumo depende de la
+cantidad de personas y no de la cantidad de filas. Los acumuladores se pueden
+combinar (merge) y al final se arma el mismo stats_df que
+validate_people_ceco_activity.
+
+Diferencia con la lectura completa: el tipo de cada columna no se infiere sobre
+todo el archivo, de modo que un numero entero en una columna con celdas vacias se
+muestra como "5" y no como "5.0".
+"""
+
+import io
+import os
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from Comun.excel import iter_sheet_chunks
+from Comun.ingest_cache import file_bytes
+
+try:
+    from ValidacionDeDatos.validation_logic import (
+        DEFAULT_OMISSION_MATCHER,
+        STATS_COLUMNS,
+        DistinctMapper,
+        OmissionMatcher,
+        _activity_signature,
+        _assemble_stats,
+        _extract_activity_code,
+        _finalize_stats,
+        _normalize_text,
+        _require_columns,
+        new_distinct_stats,
+        normalize_dates,
+        resolve_activity_code_column,
+    )
+except ImportError:
+    from validation_logic import (
+        DEFAULT_OMISSION_MATCHER,
+        STATS_COLUMNS,
+        DistinctMapper,
+        OmissionMatcher,
+        _activity_signature,
+        _assemble_stats,
+        _extract_activity_code,
+        _finalize_stats,
+        _normalize_text,
+        _require_columns,
+        new_distinct_stats,
+        normalize_dates,
+        resolve_activity_code_column,
+    )
+
+
+CHUNK_ROWS = 50_000
+STREAMING_FORMATS = {
+    ".xlsx": "xlsx",
+    ".xlsm": "xlsx",
+    ".csv": "csv",
+    ".txt": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+}
+
+
+def _detect_format(file) -> str:
+    name = str(file) if isinstance(file, (str, os.PathLike)) else getattr(file, "name", "")
+    file_format = STREAMING_FORMATS.get(Path(name).suffix.lower())
+    if file_format is None:
+        raise ValueError(
+            f"Formato no soportado para validar por bloques: {name or 'archivo sin nombre'} "
+            "(usa XLSX, CSV o Parquet)."
+        )
+    return file_format
+
+
+def iter_chunks(
+    file,
+    file_format: str | None = None,
+    sheet_name=0,
+    columns: list | None = None,
+    chunk_rows: int = CHUNK_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """Bloques de hasta chunk_rows filas del archivo (ruta, archivo subido o bytes)."""
+    file_format = file_format or _detect_format(file)
+    if file_format == "xlsx":
+        yield from iter_sheet_chunks(file, sheet_name=sheet_name, columns=columns, chunk_rows=chunk_rows)
+        return
+    source = file if isinstance(file, (str, os.PathLike)) else io.BytesIO(file_bytes(file))
+    if file_format == "csv":
+        with pd.read_csv(source, usecols=columns, dtype=str, chunksize=chunk_rows) as reader:
+            yield from reader
+    elif file_format == "parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Formato no soportado para validar por bloques: {file_format}")
+
+
+class PersonAccumulator:
+    __slots__ = (
+        "name",
+        "document",
+        "rows",
+        "omitted",
+        "missing_ceco",
+        "missing_activity",
+        "cecos",
+        "evaluated_cecos",
+        "activities",
+        "signatures",
+        "dates",
+    )
+
+    def __init__(self, name: str, document: str):
+        self.name = name
+        self.document = document
+        self.rows = 0
+        self.omitted = 0
+        self.missing_ceco = 0
+        self.missing_activity = 0
+        self.cecos: set[str] = set()
+        self.evaluated_cecos: set[str] = set()
+        self.activities: set[str] = set()
+        self.signatures: set[str] = set()
+        self.dates: set[str] = set()
+
+    def merge(self, other: "PersonAccumulator") -> None:
+        """Suma other (filas posteriores de la misma persona); nombre y documento quedan los primeros."""
+        self.rows += other.rows
+        self.omitted += other.omitted
+        self.missing_ceco += other.missing_ceco
+        self.missing_activity += other.missing_activity
+        self.cecos |= other.cecos
+        self.evaluated_cecos |= other.evaluated_cecos
+        self.activities |= other.activities
+        self.signatures |= other.signatures
+        self.dates |= other.dates
+
+
+def _distinct_pairs(
+    group_ids: np.ndarray, values: DistinctMapper, mask: np.ndarray | None = None
+) -> Iterator[tuple[int, str]]:
+    """Pares (grupo, valor no vacio) distintos del bloque."""
+    keep = values.values() != ""
+    if mask is not None:
+        keep &= mask
+    width = max(len(values.uniques), 1)
+    pair_keys = np.unique(group_ids[keep].astype(np.int64) * width + values.codes[keep])
+    for group, code in zip((pair_keys // width).tolist(), (pair_keys % width).tolist()):
+        yield group, values.uniques[code]
+
+
+class StreamingValidation:
+    """Acumuladores por persona alimentados por bloques; combinables con merge()."""
+
+    def __init__(
+        self,
+        person_col: str,
+        ceco_col: str,
+        activity_col: str,
+        date_col: str | None = None,
+        document_col: str | None = None,
+        activity_code_col: str | None = None,
+        rules: OmissionMatcher | None = None,
+    ):
+        self.person_col = person_col
+        self.ceco_col = ceco_col
+        self.activity_col = activity_col
+        self.date_col = date_col
+        self.document_col = document_col
+        self.activity_code_col = activity_code_col
+        self.rules = rules if rules is not None else DEFAULT_OMISSION_MATCHER
+        # Personas por valor crudo de la columna (None = persona nula), en orden de aparicion.
+        self.persons: dict[object, PersonAccumulator] = {}
+        self.file_dates: set[str] = set()
+        # Formato de fecha inferido en el primer bloque que lo trae, usado en todos los demas.
+        self.date_formats: dict = {}
+        self.rows = 0
+        self.distinct_stats = new_distinct_stats()
+
+    def add_chunk(self, chunk: pd.DataFrame) -> None:
+        _require_columns(chunk, [self.person_col, self.ceco_col, self.activity_col])
+        if chunk.empty:
+            return
+        stats = self.distinct_stats
+        person_codes, person_keys = pd.factorize(chunk[self.person_col], use_na_sentinel=True)
+        person_keys = list(person_keys) + [None]
+        group_ids = np.where(person_codes == -1, len(person_keys) - 1, person_codes)
+        n_groups = len(person_keys)
+        date_col = self.date_col if self.date_col and self.date_col in chunk.columns else None
+        if date_col:
+            # Las reglas y las fechas por persona ven el texto YYYY-MM-DD ya normalizado.
+            chunk = chunk.assign(**{date_col: normalize_dates(chunk[date_col], self.date_formats)})
+
+        cecos = DistinctMapper.from_values(chunk[self.ceco_col], stats).map(_normalize_text)
+        raw_activities = DistinctMapper.from_values(chunk[self.activity_col], stats)
+        activities = raw_activities.map(_normalize_text)
+        if self.activity_code_col and self.activity_code_col in chunk.columns:
+            raw_codes = DistinctMapper.from_values(chunk[self.activity_code_col], stats)
+        else:
+            raw_codes = raw_activities
+        activity_codes = raw_codes.map(_extract_activity_code)
+        omitted_mask = self.rules.omitted_mask(chunk, activities, activity_codes, date_col)
+        signatures = activities.combine(activity_codes, _activity_signature)
+
+        row_counts = np.bincount(group_ids, minlength=n_groups)
+        omitted_counts = np.bincount(group_ids, weights=omitted_mask, minlength=n_groups)
+        missing_ceco_counts = np.bincount(group_ids, weights=cecos.values() == "", minlength=n_groups)
+        missing_activity_counts = np.bincount(
+            group_ids, weights=activities.values() == "", minlength=n_groups
+        )
+
+        present_groups, first_rows = np.unique(group_ids, return_index=True)
+        chunk_states: dict[int, PersonAccumulator] = {}
+        for group, first_row in zip(present_groups.tolist(), first_rows.tolist()):
+            key = person_keys[group]
+            state = self.persons.get(key)
+            if state is None:
+                document = "N/A"
+                if self.document_col and self.document_col in chunk.columns:
+                    document = _normalize_text(chunk[self.document_col].iloc[first_row]) or "N/A"
+                name = _normalize_text(chunk[self.person_col].iloc[first_row]) or "(Sin nombre)"
+                state = self.persons[key] = PersonAccumulator(name, document)
+            state.rows += int(row_counts[group])
+            state.omitted += int(omitted_counts[group])
+            state.missing_ceco += int(missing_ceco_counts[group])
+            state.missing_activity += int(missing_activity_counts[group])
+            chunk_states[group] = state
+
+        for group, value in _distinct_pairs(group_ids, cecos):
+            chunk_states[group].cecos.add(value)
+        for group, value in _distinct_pairs(group_ids, cecos, mask=~omitted_mask):
+            chunk_states[group].evaluated_cecos.add(value)
+        for group, value in _distinct_pairs(group_ids, activities):
+            chunk_states[group].activities.add(value)
+        for group, value in _distinct_pairs(group_ids, signatures):
+            chunk_states[group].signatures.add(value)
+        if date_col:
+            dates = DistinctMapper.from_values(chunk[date_col].to_numpy(dtype=object), stats).map(
+                _normalize_text
+            )
+            for group, value in _distinct_pairs(group_ids, dates):
+                chunk_states[group].dates.add(value)
+                self.file_dates.add(value)
+        self.rows += len(chunk)
+
+    def merge(self, other: "StreamingValidation") -> None:
+        """Incorpora los acumuladores de other (filas que van despues de las de self)."""
+        for key, state in other.persons.items():
+            current = self.persons.get(key)
+            if current is None:
+                self.persons[key] = state
+            else:
+                current.merge(state)
+        self.file_dates |= other.file_dates
+        self.rows += other.rows
+        for key in self.distinct_stats:
+            self.distinct_stats[key] += other.distinct_stats[key]
+
+    def finalize(self) -> pd.DataFrame:
+        if not self.persons:
+            return pd.DataFrame(columns=STATS_COLUMNS)
+        # Mismo orden de grupos que groupby(person_col, dropna=False): claves ordenadas, nulos al final.
+        keys = pd.Series(list(self.persons), dtype=object)
+        ranks, _ = pd.factorize(keys, sort=True, use_na_sentinel=True)
+        ranks = np.where(ranks == -1, len(keys), ranks)
+        states = [self.persons[keys.iloc[position]] for position in np.argsort(ranks, kind="stable")]
+
+        def joined(attribute: str, empty_label: str) -> tuple[np.ndarray, np.ndarray]:
+            values = [getattr(state, attribute) for state in states]
+            texts = np.array([", ".join(sorted(value)) if value else empty_label for value in values], dtype=object)
+            return texts, np.array([len(value) for value in values], dtype=np.int64)
+
+        def counts(attribute: str) -> np.ndarray:
+            return np.array([getattr(state, attribute) for state in states], dtype=np.int64)
+
+        unique_cecos, unique_ceco_counts = joined("cecos", "Ninguno")
+        evaluated_cecos, evaluated_ceco_counts = joined("evaluated_cecos", "Ninguno")
+        unique_activities, unique_activity_counts = joined("activities", "Ninguna")
+        activity_signatures, signature_counts = joined("signatures", "Ninguna")
+        person_dates, date_counts = joined("dates", "Sin fecha")
+        stats_df = _assemble_stats(
+            person_names=np.array([state.name for state in states], dtype=object),
+            documents=np.array([state.document for state in states], dtype=object),
+            row_counts=counts("rows"),
+            omitted_counts=counts("omitted"),
+            missing_ceco_counts=counts("missing_ceco"),
+            missing_activity_counts=counts("missing_activity"),
+            unique_cecos=unique_cecos,
+            unique_ceco_counts=unique_ceco_counts,
+            evaluated_cecos=evaluated_cecos,
+            evaluated_ceco_counts=evaluated_ceco_counts,
+            unique_activities=unique_activities,
+            unique_activity_counts=unique_activity_counts,
+            activity_signatures=activity_signatures,
+            signature_counts=signature_counts,
+            person_dates=person_dates,
+            date_counts=date_counts,
+            use_signatures=bool(self.activity_code_col),
+        )
+        return _finalize_stats(stats_df, self.distinct_stats)
+
+
+def validate_chunks(
+    chunks: Iterable[pd.DataFrame],
+    person_col: str,
+    ceco_col: str,
+    activity_col: str,
+    date_col: str | None = None,
+    document_col: str | None = None,
+    activity_code_col: str | None = None,
+    rules: OmissionMatcher | None = None,
+    infer_activity_code: bool = True,
+    on_rows: Callable[[int], None] | None = None,
+) -> tuple[pd.DataFrame, list[str]]:
+    """Valida bloque a bloque; devuelve (stats_df, fechas del archivo).
+
+    Si no se indica la columna de Cod. Actividad y infer_activity_code es True, se
+    infiere sobre el primer bloque.
+    """
+    validation = None
+    for chunk in chunks:
+        if validation is None:
+            if infer_activity_code:
+                activity_code_col = resolve_activity_code_column(
+                    chunk, person_col, ceco_col, activity_col, activity_code_col
+                )
+            validation = StreamingValidation(
+                person_col,
+                ceco_col,
+                activity_col,
+                date_col=date_col if date_col and date_col in chunk.columns else None,
+                document_col=document_col if document_col and document_col in chunk.columns else None,
+                activity_code_col=activity_code_col if activity_code_col in chunk.columns else None,
+                rules=rules,
+            )
+        validation.add_chunk(chunk)
+        if on_rows is not None:
+            on_rows(validation.rows)
+    if validation is None:
+        return pd.DataFrame(columns=STATS_COLUMNS), []
+    return validation.finalize(), sorted(validation.file_dates)
+
+
+def validate_file_streaming(
+    file,
+    person_col: str,
+    ceco_col: str,
+    activity_col: str,
+    date_col: str | None = None,
+    document_col: str | None = None,
+    activity_code_col: str | None = None,
+    rules: OmissionMatcher | None = None,
+    infer_activity_code: bool = True,
+    file_format: str | None = None,
+    sheet_name=0,
+    chunk_rows: int = CHUNK_ROWS,
+    on_rows: Callable[[int], None] | None = None,
+    rule_columns: tuple = (),
+) -> tuple[pd.DataFrame, list[str]]:
+    """Lee file por bloques (solo las columnas usadas) y lo valida; ver validate_chunks.
+
+    rule_columns son las columnas de las excepciones de rules que existen en el archivo.
+    """
+    columns = None
+    if activity_code_col or not infer_activity_code:
+        columns = list(
+            dict.fromkeys(
+                col
+                for col in (
+                    person_col, ceco_col, activity_col, date_col, document_col, activity_code_col, *rule_columns
+                )
+                if col
+            )
+        )
+    chunks = iter_chunks(file, file_format, sheet_name=sheet_name, columns=columns, chunk_rows=chunk_rows)
+    return validate_chunks(
+        chunks,
+        person_col,
+        ceco_col,
+        activity_col,
+        date_col=date_col,
+        document_col=document_col,
+        activity_code_col=activity_code_col,
+        rules=rules,
+        infer_activity_code=infer_activity_code,
+        on_rows=on_rows,
+    )
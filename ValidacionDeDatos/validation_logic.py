@@ -1,7 +1,13 @@
 import re
+from collections import OrderedDict
+from collections.abc import Callable
 
+import numpy as np
 import pandas as pd
 
+from Comun.dates import parse_dates
+from Comun.distinct import factorize_typed
+
 
 CECO_OMITTED_ACTIVITIES = (
     "cosecha",
@@ -66,15 +72,117 @@ def _normalize_text(value) -> str:
     return text
 
 
-def _is_omitted_activity_for_ceco(value: str) -> bool:
-    normalized = " ".join(value.lower().split())
-    return any(term in normalized for term in CECO_OMITTED_ACTIVITIES)
-
-
 def _normalize_activity_code(value: str) -> str:
     return value.upper().replace(" ", "").strip()
 
 
+def _normalize_activity_term(value: str) -> str:
+    return " ".join(value.lower().split())
+
+
+def _trie_pattern(terms: list[str]) -> str:
+    """Regex equivalente a "contiene alguno de los terminos", factorizada como trie.
+
+    Los terminos que comparten prefijo comparten rama, asi que el costo por posicion
+    depende del largo de los terminos y no de cuantos hay.
+    """
+    trie: dict = {}
+    for term in sorted(terms, key=len):
+        node = trie
+        for char in term:
+            if node.get("") is True:
+                # Un termino mas corto ya es prefijo: basta con encontrarlo a el.
+                break
+            node = node.setdefault(char, {})
+        else:
+            node.clear()
+            node[""] = True
+
+    def emit(node: dict) -> str:
+        if node.get("") is True:
+            return ""
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items())]
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return emit(trie)
+
+
+class OmissionMatcher:
+    """Reglas de omision de CECO compiladas para evaluar columnas completas.
+
+    Los terminos de actividad se compilan en una sola regex tipo trie y los prefijos
+    de Cod. Actividad se agrupan por longitud, de modo que cada valor se compara con
+    un set por longitud distinta en vez de con cada prefijo.
+    """
+
+    # Columnas que las reglas leen ademas de actividad y Cod. Actividad (ninguna).
+    columns: tuple = ()
+
+    def __init__(self, activity_terms, code_prefixes, activity_regexes=()):
+        terms = sorted({_normalize_activity_term(term) for term in activity_terms} - {""})
+        branches = [_trie_pattern(terms)] if terms else []
+        branches.extend(f"(?:{pattern})" for pattern in activity_regexes if pattern)
+        self.activity_pattern = re.compile("|".join(branches)) if branches else None
+        prefixes = {_normalize_activity_code(prefix) for prefix in code_prefixes} - {""}
+        self.prefixes_by_length: dict[int, frozenset[str]] = {}
+        for length in sorted({len(prefix) for prefix in prefixes}):
+            self.prefixes_by_length[length] = frozenset(
+                prefix for prefix in prefixes if len(prefix) == length
+            )
+
+    def is_omitted_activity(self, value: str) -> bool:
+        if self.activity_pattern is None:
+            return False
+        return self.activity_pattern.search(_normalize_activity_term(value)) is not None
+
+    def is_omitted_code(self, value: str) -> bool:
+        if not value:
+            return False
+        normalized = _normalize_activity_code(value)
+        return any(
+            normalized[:length] in prefixes
+            for length, prefixes in self.prefixes_by_length.items()
+        )
+
+    def activity_mask(self, values) -> np.ndarray:
+        series = pd.Series(values, dtype=object).astype(str)
+        if self.activity_pattern is None or series.empty:
+            return np.zeros(len(series), dtype=bool)
+        normalized = series.str.lower().str.replace(r"\s+", " ", regex=True).str.strip()
+        return normalized.str.contains(self.activity_pattern, regex=True).to_numpy(dtype=bool)
+
+    def code_mask(self, values) -> np.ndarray:
+        series = pd.Series(values, dtype=object).astype(str)
+        mask = np.zeros(len(series), dtype=bool)
+        if not self.prefixes_by_length or series.empty:
+            return mask
+        normalized = series.str.upper().str.replace(" ", "", regex=False).str.strip()
+        for length, prefixes in self.prefixes_by_length.items():
+            mask |= normalized.str[:length].isin(prefixes).to_numpy(dtype=bool)
+        return mask
+
+    def omitted_mask(
+        self,
+        df: pd.DataFrame,
+        activities: "DistinctMapper",
+        activity_codes: "DistinctMapper",
+        date_col: str | None = None,
+    ) -> np.ndarray:
+        """Filas omitidas para validar CECO (por nombre de actividad o por Cod. Actividad)."""
+        omit_by_name = activities.map_batch(self.activity_mask, dtype=bool).values()
+        omit_by_code = activity_codes.map_batch(self.code_mask, dtype=bool).values()
+        return omit_by_name | omit_by_code
+
+
+DEFAULT_OMISSION_MATCHER = OmissionMatcher(CECO_OMITTED_ACTIVITIES, CECO_OMITTED_CODE_PREFIXES)
+
+
+def _is_omitted_activity_for_ceco(value: str) -> bool:
+    return DEFAULT_OMISSION_MATCHER.is_omitted_activity(value)
+
+
 def _extract_activity_code(value) -> str:
     text = _normalize_text(value)
     if not text:
@@ -86,33 +194,185 @@ def _extract_activity_code(value) -> str:
 
 
 def _is_omitted_code_for_ceco(value: str) -> bool:
-    if not value:
-        return False
-    normalized = _normalize_activity_code(value)
-    return any(normalized.startswith(prefix) for prefix in CECO_OMITTED_CODE_PREFIXES)
+    return DEFAULT_OMISSION_MATCHER.is_omitted_code(value)
+
+
+class DistinctMapper:
+    """Columna codificada por diccionario (factorize_typed: 100 y 100.0 son valores distintos).
+
+    Cada funcion se evalua una sola vez por valor distinto y el resultado se
+    reparte a las filas por codigo entero. ``stats`` acumula filas atendidas y
+    evaluaciones reales para reportar el hit ratio.
+    """
+
+    def __init__(self, codes: np.ndarray, uniques: np.ndarray, stats: dict[str, int] | None = None):
+        self.codes = codes
+        self.uniques = uniques
+        self.stats = stats if stats is not None else new_distinct_stats()
+
+    @classmethod
+    def from_values(cls, values, stats: dict[str, int] | None = None) -> "DistinctMapper":
+        codes, uniques = factorize_typed(values)
+        na_mask = codes == -1
+        if na_mask.any():
+            # Los nulos comparten un solo codigo al final del diccionario.
+            uniques = np.append(uniques, np.array([np.nan], dtype=object))
+            codes = codes.copy()
+            codes[na_mask] = len(uniques) - 1
+        return cls(codes, uniques, stats)
+
+    def map(self, func, dtype=object) -> "DistinctMapper":
+        mapped = np.empty(len(self.uniques), dtype=dtype)
+        for position, value in enumerate(self.uniques):
+            mapped[position] = func(value)
+        self._record(len(self.uniques))
+        return DistinctMapper(self.codes, mapped, self.stats)
+
+    def map_batch(self, func, dtype=object) -> "DistinctMapper":
+        """Como map, pero func recibe el arreglo completo de valores distintos."""
+        mapped = np.asarray(func(self.uniques), dtype=dtype)
+        self._record(len(self.uniques))
+        return DistinctMapper(self.codes, mapped, self.stats)
+
+    def combine(self, other: "DistinctMapper", func, dtype=object) -> "DistinctMapper":
+        """Evalua func(a, b) una vez por par distinto de valores de ambas columnas."""
+        width = max(len(other.uniques), 1)
+        pair_keys = self.codes.astype(np.int64) * width + other.codes
+        pair_codes, pair_uniques = pd.factorize(pair_keys)
+        mapped = np.empty(len(pair_uniques), dtype=dtype)
+        for position, key in enumerate(pair_uniques):
+            mapped[position] = func(self.uniques[key // width], other.uniques[key % width])
+        self._record(len(pair_uniques))
+        return DistinctMapper(pair_codes, mapped, self.stats)
+
+    def values(self) -> np.ndarray:
+        return self.uniques[self.codes]
+
+    def _record(self, evaluations: int) -> None:
+        self.stats["filas"] += len(self.codes)
+        self.stats["evaluaciones"] += evaluations
+
+
+# stats_df.attrs[DISTINCT_HIT_RATIO_ATTR]: lo deja _finalize_stats; pandas lo pierde al
+# concatenar o combinar, asi que se lee apenas vuelve la validacion.
+DISTINCT_HIT_RATIO_ATTR = "distinct_hit_ratio"
+
+
+def new_distinct_stats() -> dict[str, int]:
+    return {"filas": 0, "evaluaciones": 0}
+
+
+def distinct_hit_ratio(stats: dict[str, int]) -> float:
+    """Fraccion de filas resueltas sin evaluar la funcion (1.0 = todo desde diccionario)."""
+    if not stats.get("filas"):
+        return 0.0
+    return 1.0 - stats["evaluaciones"] / stats["filas"]
+
+
+def _may_hold_activity_codes(series: pd.Series) -> bool:
+    # Un codigo de actividad lleva letras: columnas numericas, booleanas o de fecha no aplican.
+    dtype = series.dtype
+    return not (
+        pd.api.types.is_numeric_dtype(dtype)
+        or pd.api.types.is_bool_dtype(dtype)
+        or pd.api.types.is_datetime64_any_dtype(dtype)
+        or pd.api.types.is_timedelta64_dtype(dtype)
+    )
+
+
+def _header_signature(df: pd.DataFrame) -> tuple:
+    return tuple((str(col), str(dtype)) for col, dtype in df.dtypes.items())
+
+
+_ACTIVITY_CODE_COLUMN_CACHE: OrderedDict[tuple, str] = OrderedDict()
+_ACTIVITY_CODE_COLUMN_CACHE_SIZE = 128
+
+
+def _activity_code_score(series: pd.Series, sample_size: int, stats: dict[str, int] | None = None) -> float | None:
+    """Fraccion de valores tipo Cod. Actividad en la muestra (None si la columna no aplica o esta vacia)."""
+    if not _may_hold_activity_codes(series):
+        return None
+    sample = series.dropna().head(sample_size).astype(str)
+    if sample.empty:
+        return None
+    # El regex solo corre sobre valores distintos; el puntaje se pondera por frecuencia.
+    counts = sample.value_counts(sort=False)
+    matches = np.fromiter(
+        (ACTIVITY_CODE_PATTERN.search(value) is not None for value in counts.index),
+        dtype=bool,
+        count=len(counts),
+    )
+    if stats is not None:
+        stats["filas"] += len(sample)
+        stats["evaluaciones"] += len(counts)
+    return float(counts.to_numpy()[matches].sum()) / len(sample)
 
 
 def _infer_activity_code_column(
     df: pd.DataFrame,
     excluded_cols: set[str],
     min_score: float = 0.45,
+    stats: dict[str, int] | None = None,
+    early_exit_score: float = 0.9,
+    sample_size: int = 500,
 ) -> str | None:
+    """Columna con mas valores tipo Cod. Actividad (en una muestra de cada columna).
+
+    La busqueda se detiene en la primera columna que supera early_exit_score. Esa
+    columna se memoriza por firma de encabezado (nombres + dtypes): con otro archivo
+    del mismo formato solo se vuelve a puntuar ella, y si en este archivo ya no supera
+    early_exit_score se infiere de nuevo. Un resultado debil o sin columna no se
+    memoriza, asi no depende de los archivos validados antes.
+    """
+    threshold = max(early_exit_score, min_score)
+    cache_key = (
+        _header_signature(df),
+        tuple(sorted(str(col) for col in excluded_cols)),
+        min_score,
+        early_exit_score,
+        sample_size,
+    )
+    cached_col = _ACTIVITY_CODE_COLUMN_CACHE.get(cache_key)
+    if cached_col is not None:
+        score = _activity_code_score(df[cached_col], sample_size, stats)
+        if score is not None and score >= threshold:
+            _ACTIVITY_CODE_COLUMN_CACHE.move_to_end(cache_key)
+            return cached_col
+        del _ACTIVITY_CODE_COLUMN_CACHE[cache_key]
+
     best_col = None
     best_score = 0.0
     for col in df.columns:
         if col in excluded_cols:
             continue
-        sample = df[col].dropna().astype(str).head(500)
-        if sample.empty:
-            continue
-        extracted = sample.apply(_extract_activity_code)
-        score = float((extracted != "").mean())
-        if score > best_score:
+        score = _activity_code_score(df[col], sample_size, stats)
+        if score is not None and score > best_score:
             best_col = col
             best_score = score
-    if best_col and best_score >= min_score:
-        return best_col
-    return None
+        if best_score >= threshold:
+            break
+
+    if best_col is None or best_score < min_score:
+        return None
+    if best_score >= threshold:
+        _ACTIVITY_CODE_COLUMN_CACHE[cache_key] = best_col
+        if len(_ACTIVITY_CODE_COLUMN_CACHE) > _ACTIVITY_CODE_COLUMN_CACHE_SIZE:
+            _ACTIVITY_CODE_COLUMN_CACHE.popitem(last=False)
+    return best_col
+
+
+def resolve_activity_code_column(
+    df: pd.DataFrame,
+    person_col: str,
+    ceco_col: str,
+    activity_col: str,
+    activity_code_col: str | None = None,
+    stats: dict[str, int] | None = None,
+) -> str | None:
+    """Columna de Cod. Actividad a usar: la elegida si existe o la inferida del contenido."""
+    if activity_code_col and activity_code_col in df.columns:
+        return activity_code_col
+    return _infer_activity_code_column(df, {person_col, ceco_col, activity_col}, stats=stats)
 
 
 def _activity_signature(activity: str, code: str) -> str:
@@ -148,16 +408,9 @@ def suggest_columns(df: pd.DataFrame) -> dict[str, str | None]:
     }
 
 
-def normalize_dates(series: pd.Series) -> pd.Series:
-    dt = pd.to_datetime(series, errors="coerce", dayfirst=True)
-    normalized = dt.dt.strftime("%Y-%m-%d")
-    invalid_mask = normalized.isna() | (normalized == "NaT")
-    if invalid_mask.any():
-        normalized.loc[invalid_mask] = (
-            series.loc[invalid_mask].astype(str).str.strip().str[:10]
-        )
-    normalized = normalized.fillna("").replace({"NaT": "", "nan": "", "None": ""})
-    return normalized
+def normalize_dates(series: pd.Series, formats: dict | None = None) -> pd.Series:
+    """Texto YYYY-MM-DD por fila (ver Comun.dates.parse_dates)."""
+    return parse_dates(series, formats)[1]
 
 
 def detect_file_dates(df: pd.DataFrame, date_col: str | None) -> list[str]:
@@ -173,6 +426,39 @@ def _require_columns(df: pd.DataFrame, required_columns: list[str]) -> None:
         raise ValueError(f"No se encontraron columnas requeridas: {', '.join(missing)}")
 
 
+# Las actividades omitidas dependen del archivo de reglas activo (se muestra con los
+# resultados), por eso la observacion no las nombra.
+OMITTED_CECO_OBSERVATION = (
+    "Se omitieron actividades para validar CECO "
+    "(actividad o Cod. Actividad en las reglas de omision)"
+)
+STATS_COLUMNS = [
+    "Persona",
+    "Documento",
+    "Filas Persona",
+    "Cecos Unicos",
+    CECO_EVALUATED_COL,
+    "Filas Omitidas CECO",
+    "Cantidad Cecos Unicos",
+    CECO_EVALUATED_COUNT_COL,
+    "Cecos Diferentes",
+    "Ceco Vacio (filas)",
+    "Tiene Ceco Vacio",
+    "Actividades Unicas",
+    "Actividades (con Cod. Actividad)",
+    "Cantidad Actividades Unicas",
+    "Cantidad Actividades (con Cod. Actividad)",
+    "Actividades Diferentes",
+    "Actividad Vacia (filas)",
+    "Tiene Actividad Vacia",
+    "Fechas Persona",
+    "Tiene Multiples Fechas Persona",
+    "Observaciones",
+    "Tiene Problemas",
+]
+VALIDATION_ENGINES = ("vectorized", "loop")
+
+
 def validate_people_ceco_activity(
     df: pd.DataFrame,
     person_col: str,
@@ -181,22 +467,117 @@ def validate_people_ceco_activity(
     date_col: str | None = None,
     document_col: str | None = None,
     activity_code_col: str | None = None,
+    engine: str = "vectorized",
+    rules: OmissionMatcher | None = None,
+    infer_activity_code: bool = True,
+    progress: Callable[[str, float], None] | None = None,
 ) -> pd.DataFrame:
+    """Valida CECO y Actividad por persona.
+
+    engine="vectorized" normaliza cada columna una sola vez y resuelve todo con
+    agregaciones por grupo; engine="loop" es la implementacion original por persona,
+    se conserva como referencia para comparar resultados.
+
+    rules es el plan de omision compilado (ver omission_rules.load_omission_rules);
+    si no se indica se usan las listas CECO_OMITTED_*. El motor "loop" solo
+    conoce esas listas.
+
+    Con infer_activity_code=False no se busca una columna de Cod. Actividad cuando
+    no se indica (util si df ya viene proyectado y la inferencia se hizo antes).
+
+    progress(etapa, fraccion) se llama al inicio de cada etapa; si lanza una
+    excepcion (p. ej. al cancelar un trabajo en segundo plano) la validacion se corta ahi.
+    """
+    if engine not in VALIDATION_ENGINES:
+        raise ValueError(f"Motor de validacion desconocido: {engine}")
+    if engine == "loop" and rules is not None:
+        raise ValueError("El motor 'loop' no admite reglas de omision personalizadas.")
     _require_columns(df, [person_col, ceco_col, activity_col])
-    stats_rows = []
-    excluded_cols = {person_col, ceco_col, activity_col}
-    effective_activity_code_col = (
-        activity_code_col if activity_code_col and activity_code_col in df.columns else None
-    )
-    if not effective_activity_code_col:
-        effective_activity_code_col = _infer_activity_code_column(df, excluded_cols)
+    distinct_stats = new_distinct_stats()
+    _report_progress(progress, "Detectando columnas", 0.0)
+    if infer_activity_code:
+        effective_activity_code_col = resolve_activity_code_column(
+            df, person_col, ceco_col, activity_col, activity_code_col, stats=distinct_stats
+        )
+    else:
+        effective_activity_code_col = (
+            activity_code_col if activity_code_col and activity_code_col in df.columns else None
+        )
+
+    engine_kwargs = {
+        "person_col": person_col,
+        "ceco_col": ceco_col,
+        "activity_col": activity_col,
+        "date_col": date_col if date_col and date_col in df.columns else None,
+        "document_col": document_col if document_col and document_col in df.columns else None,
+        "activity_code_col": effective_activity_code_col,
+    }
+    if engine == "vectorized":
+        stats_df = _validate_people_vectorized(
+            df,
+            stats=distinct_stats,
+            rules=rules if rules is not None else DEFAULT_OMISSION_MATCHER,
+            progress=progress,
+            **engine_kwargs,
+        )
+    else:
+        _report_progress(progress, "Validando por persona", 0.1)
+        stats_df = _validate_people_loop(df, **engine_kwargs)
+    if stats_df.empty:
+        return pd.DataFrame(columns=STATS_COLUMNS)
+
+    _report_progress(progress, "Ordenando resultados", 0.95)
+    return _finalize_stats(stats_df, distinct_stats)
+
+
+def _finalize_stats(stats_df: pd.DataFrame, distinct_stats: dict[str, int]) -> pd.DataFrame:
+    """Orden final (problemas primero, luego por persona) a partir del orden de grupos."""
+    stats_df = stats_df.sort_values(
+        by=["Tiene Problemas", "Persona"], ascending=[False, True]
+    ).reset_index(drop=True)
+    stats_df.attrs[DISTINCT_HIT_RATIO_ATTR] = distinct_hit_ratio(distinct_stats)
+    return stats_df
+
+
+def _report_progress(progress: Callable[[str, float], None] | None, stage: str, fraction: float) -> None:
+    if progress is not None:
+        progress(stage, fraction)
+
+
+def _build_observations(
+    has_multiple_cecos,
+    has_multiple_activities,
+    has_empty_ceco,
+    has_empty_activity,
+    has_multiple_dates,
+    has_omitted_rows,
+) -> list[tuple[object, str]]:
+    return [
+        (has_multiple_cecos, "Tiene mas de un CECO"),
+        (has_multiple_activities, "Tiene mas de una Actividad"),
+        (has_empty_ceco, "Tiene CECO vacio"),
+        (has_empty_activity, "Tiene Actividad vacia"),
+        (has_multiple_dates, "Tiene mas de una fecha en el archivo"),
+        (has_omitted_rows, OMITTED_CECO_OBSERVATION),
+    ]
 
+
+def _validate_people_loop(
+    df: pd.DataFrame,
+    person_col: str,
+    ceco_col: str,
+    activity_col: str,
+    date_col: str | None,
+    document_col: str | None,
+    activity_code_col: str | None,
+) -> pd.DataFrame:
+    stats_rows = []
     for person_value, person_df in df.groupby(person_col, dropna=False):
         person_name = _normalize_text(person_value) or "(Sin nombre)"
         cecos = person_df[ceco_col].apply(_normalize_text)
         activities = person_df[activity_col].apply(_normalize_text)
-        if effective_activity_code_col and effective_activity_code_col in person_df.columns:
-            activity_codes = person_df[effective_activity_code_col].apply(_extract_activity_code)
+        if activity_code_col:
+            activity_codes = person_df[activity_code_col].apply(_extract_activity_code)
         else:
             activity_codes = person_df[activity_col].apply(_extract_activity_code)
 
@@ -224,7 +605,7 @@ def validate_people_ceco_activity(
         has_multiple_cecos = len(unique_cecos_for_validation) > 1
         has_multiple_activities = (
             len(activity_signatures) > 1
-            if effective_activity_code_col
+            if activity_code_col
             else len(unique_activities) > 1
         )
         has_empty_ceco = missing_ceco_count > 0
@@ -232,7 +613,7 @@ def validate_people_ceco_activity(
 
         person_dates = []
         has_multiple_dates_person = False
-        if date_col and date_col in person_df.columns:
+        if date_col:
             person_dates = sorted(
                 {
                     value
@@ -242,28 +623,24 @@ def validate_people_ceco_activity(
             )
             has_multiple_dates_person = len(person_dates) > 1
 
-        observations = []
-        if has_multiple_cecos:
-            observations.append("Tiene mas de un CECO")
-        if has_multiple_activities:
-            observations.append("Tiene mas de una Actividad")
-        if has_empty_ceco:
-            observations.append("Tiene CECO vacio")
-        if has_empty_activity:
-            observations.append("Tiene Actividad vacia")
-        if has_multiple_dates_person:
-            observations.append("Tiene mas de una fecha en el archivo")
-        if omitted_rows_for_ceco > 0:
-            observations.append(
-                "Se omitieron actividades para validar CECO "
-                "(Cosecha/Lavado de Jarras/Acopio/Estibadores y Cod. Actividad omitido)"
+        observations = [
+            text
+            for flag, text in _build_observations(
+                has_multiple_cecos,
+                has_multiple_activities,
+                has_empty_ceco,
+                has_empty_activity,
+                has_multiple_dates_person,
+                omitted_rows_for_ceco > 0,
             )
+            if flag
+        ]
 
         # Por ahora solo consideramos CECO y vacios como problema (actividades diferentes se mapeara luego).
         has_issues = has_multiple_cecos or has_empty_ceco or has_empty_activity
 
         document_value = "N/A"
-        if document_col and document_col in person_df.columns:
+        if document_col:
             document_value = _normalize_text(person_df[document_col].iloc[0]) or "N/A"
 
         stats_rows.append(
@@ -299,39 +676,212 @@ def validate_people_ceco_activity(
             }
         )
 
-    if not stats_rows:
-        return pd.DataFrame(
-            columns=[
-                "Persona",
-                "Documento",
-                "Filas Persona",
-                "Cecos Unicos",
-                CECO_EVALUATED_COL,
-                "Filas Omitidas CECO",
-                "Cantidad Cecos Unicos",
-                CECO_EVALUATED_COUNT_COL,
-                "Cecos Diferentes",
-                "Ceco Vacio (filas)",
-                "Tiene Ceco Vacio",
-                "Actividades Unicas",
-                "Actividades (con Cod. Actividad)",
-                "Cantidad Actividades Unicas",
-                "Cantidad Actividades (con Cod. Actividad)",
-                "Actividades Diferentes",
-                "Actividad Vacia (filas)",
-                "Tiene Actividad Vacia",
-                "Fechas Persona",
-                "Tiene Multiples Fechas Persona",
-                "Observaciones",
-                "Tiene Problemas",
-            ]
-        )
+    return pd.DataFrame(stats_rows, columns=STATS_COLUMNS)
+
+
+def _join_unique_per_group(
+    group_ids: np.ndarray,
+    values: DistinctMapper,
+    n_groups: int,
+    empty_label: str,
+    mask: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Une con ", " los valores no vacios distintos (ordenados) de cada grupo.
+
+    Trabaja sobre codigos enteros: el orden alfabetico se resuelve una vez sobre
+    el diccionario de valores y no por fila.
+    """
+    value_ranks, sorted_values = pd.factorize(values.uniques, sort=True)
+    sorted_values = np.asarray(sorted_values, dtype=object)
+    row_ranks = value_ranks[values.codes]
+    keep = sorted_values[row_ranks] != ""
+    if mask is not None:
+        keep &= mask
+    width = max(len(sorted_values), 1)
+    pair_keys = np.unique(group_ids[keep].astype(np.int64) * width + row_ranks[keep])
+    pair_groups = pair_keys // width
+    counts = np.bincount(pair_groups, minlength=n_groups).astype(np.int64)
+    joined = np.full(n_groups, empty_label, dtype=object)
+    if len(pair_keys):
+        pair_values = sorted_values[pair_keys % width]
+        starts = np.flatnonzero(np.r_[True, pair_groups[1:] != pair_groups[:-1]])
+        joined[pair_groups[starts]] = [
+            ", ".join(chunk) for chunk in np.split(pair_values, starts[1:])
+        ]
+    return joined, counts
+
+
+def _validate_people_vectorized(
+    df: pd.DataFrame,
+    person_col: str,
+    ceco_col: str,
+    activity_col: str,
+    date_col: str | None,
+    document_col: str | None,
+    activity_code_col: str | None,
+    stats: dict[str, int] | None = None,
+    rules: OmissionMatcher = DEFAULT_OMISSION_MATCHER,
+    progress: Callable[[str, float], None] | None = None,
+) -> pd.DataFrame:
+    if df.empty:
+        return pd.DataFrame(columns=STATS_COLUMNS)
+
+    _report_progress(progress, "Agrupando por persona", 0.1)
+    # Mismo orden de grupos que df.groupby(person_col, dropna=False) en el motor por persona.
+    group_ids = df.groupby(person_col, dropna=False).ngroup().to_numpy()
+    n_groups = int(group_ids.max()) + 1
+    _, first_rows = np.unique(group_ids, return_index=True)
+
+    _report_progress(progress, "Normalizando CECO y actividades", 0.2)
+    # Cada funcion de normalizacion se evalua una vez por valor distinto de la columna.
+    cecos = DistinctMapper.from_values(df[ceco_col], stats).map(_normalize_text)
+    raw_activities = DistinctMapper.from_values(df[activity_col], stats)
+    activities = raw_activities.map(_normalize_text)
+    if activity_code_col:
+        raw_codes = DistinctMapper.from_values(df[activity_code_col], stats)
+    else:
+        raw_codes = raw_activities
+    activity_codes = raw_codes.map(_extract_activity_code)
+
+    _report_progress(progress, "Aplicando reglas de omision", 0.4)
+    omitted_mask = rules.omitted_mask(df, activities, activity_codes, date_col)
+    signatures = activities.combine(activity_codes, _activity_signature)
+    ceco_values = cecos.values()
+    activity_values = activities.values()
+
+    row_counts = np.bincount(group_ids, minlength=n_groups).astype(np.int64)
+    omitted_counts = np.bincount(group_ids, weights=omitted_mask, minlength=n_groups).astype(np.int64)
+    missing_ceco_counts = np.bincount(
+        group_ids, weights=ceco_values == "", minlength=n_groups
+    ).astype(np.int64)
+    missing_activity_counts = np.bincount(
+        group_ids, weights=activity_values == "", minlength=n_groups
+    ).astype(np.int64)
+
+    _report_progress(progress, "Consolidando valores por persona", 0.55)
+    unique_cecos, unique_ceco_counts = _join_unique_per_group(group_ids, cecos, n_groups, "Ninguno")
+    evaluated_cecos, evaluated_ceco_counts = _join_unique_per_group(
+        group_ids, cecos, n_groups, "Ninguno", mask=~omitted_mask
+    )
+    unique_activities, unique_activity_counts = _join_unique_per_group(
+        group_ids, activities, n_groups, "Ninguna"
+    )
+    activity_signatures, signature_counts = _join_unique_per_group(
+        group_ids, signatures, n_groups, "Ninguna"
+    )
 
-    stats_df = pd.DataFrame(stats_rows)
-    stats_df = stats_df.sort_values(
-        by=["Tiene Problemas", "Persona"], ascending=[False, True]
-    ).reset_index(drop=True)
-    return stats_df
+    if date_col:
+        _report_progress(progress, "Revisando fechas", 0.8)
+        dates = DistinctMapper.from_values(
+            normalize_dates(df[date_col]).to_numpy(dtype=object), stats
+        ).map(_normalize_text)
+        person_dates, date_counts = _join_unique_per_group(group_ids, dates, n_groups, "Sin fecha")
+    else:
+        person_dates = np.full(n_groups, "Sin fecha", dtype=object)
+        date_counts = np.zeros(n_groups, dtype=np.int64)
+
+    person_names = df[person_col].iloc[first_rows].apply(_normalize_text).to_numpy(dtype=object)
+    person_names[person_names == ""] = "(Sin nombre)"
+    if document_col:
+        documents = df[document_col].iloc[first_rows].apply(_normalize_text).to_numpy(dtype=object)
+        documents[documents == ""] = "N/A"
+    else:
+        documents = np.full(n_groups, "N/A", dtype=object)
+
+    return _assemble_stats(
+        person_names=person_names,
+        documents=documents,
+        row_counts=row_counts,
+        omitted_counts=omitted_counts,
+        missing_ceco_counts=missing_ceco_counts,
+        missing_activity_counts=missing_activity_counts,
+        unique_cecos=unique_cecos,
+        unique_ceco_counts=unique_ceco_counts,
+        evaluated_cecos=evaluated_cecos,
+        evaluated_ceco_counts=evaluated_ceco_counts,
+        unique_activities=unique_activities,
+        unique_activity_counts=unique_activity_counts,
+        activity_signatures=activity_signatures,
+        signature_counts=signature_counts,
+        person_dates=person_dates,
+        date_counts=date_counts,
+        use_signatures=bool(activity_code_col),
+    )
+
+
+def _assemble_stats(
+    *,
+    person_names: np.ndarray,
+    documents: np.ndarray,
+    row_counts: np.ndarray,
+    omitted_counts: np.ndarray,
+    missing_ceco_counts: np.ndarray,
+    missing_activity_counts: np.ndarray,
+    unique_cecos: np.ndarray,
+    unique_ceco_counts: np.ndarray,
+    evaluated_cecos: np.ndarray,
+    evaluated_ceco_counts: np.ndarray,
+    unique_activities: np.ndarray,
+    unique_activity_counts: np.ndarray,
+    activity_signatures: np.ndarray,
+    signature_counts: np.ndarray,
+    person_dates: np.ndarray,
+    date_counts: np.ndarray,
+    use_signatures: bool,
+) -> pd.DataFrame:
+    """Arma STATS_COLUMNS (banderas y observaciones) a partir de los agregados por persona."""
+    n_groups = len(person_names)
+    has_multiple_cecos = evaluated_ceco_counts > 1
+    has_multiple_activities = (
+        signature_counts > 1 if use_signatures else unique_activity_counts > 1
+    )
+    has_empty_ceco = missing_ceco_counts > 0
+    has_empty_activity = missing_activity_counts > 0
+    has_multiple_dates = date_counts > 1
+
+    observations = np.full(n_groups, "", dtype=object)
+    for flags, text in _build_observations(
+        has_multiple_cecos,
+        has_multiple_activities,
+        has_empty_ceco,
+        has_empty_activity,
+        has_multiple_dates,
+        omitted_counts > 0,
+    ):
+        appended = np.where(observations == "", text, observations + " | " + text)
+        observations = np.where(flags, appended, observations)
+    observations[observations == ""] = "OK"
+
+    # Por ahora solo consideramos CECO y vacios como problema (actividades diferentes se mapeara luego).
+    has_issues = has_multiple_cecos | has_empty_ceco | has_empty_activity
+
+    return pd.DataFrame(
+        {
+            "Persona": person_names,
+            "Documento": documents,
+            "Filas Persona": row_counts,
+            "Cecos Unicos": unique_cecos,
+            CECO_EVALUATED_COL: evaluated_cecos,
+            "Filas Omitidas CECO": omitted_counts,
+            "Cantidad Cecos Unicos": unique_ceco_counts,
+            CECO_EVALUATED_COUNT_COL: evaluated_ceco_counts,
+            "Cecos Diferentes": has_multiple_cecos,
+            "Ceco Vacio (filas)": missing_ceco_counts,
+            "Tiene Ceco Vacio": has_empty_ceco,
+            "Actividades Unicas": unique_activities,
+            "Actividades (con Cod. Actividad)": activity_signatures,
+            "Cantidad Actividades Unicas": unique_activity_counts,
+            "Cantidad Actividades (con Cod. Actividad)": signature_counts,
+            "Actividades Diferentes": has_multiple_activities,
+            "Actividad Vacia (filas)": missing_activity_counts,
+            "Tiene Actividad Vacia": has_empty_activity,
+            "Fechas Persona": person_dates,
+            "Tiene Multiples Fechas Persona": has_multiple_dates,
+            "Observaciones": observations,
+            "Tiene Problemas": has_issues,
+        },
+        columns=STATS_COLUMNS,
+    )
 
 
 def summarize_validation(stats_df: pd.DataFrame, file_dates: list[str]) -> dict[str, int]:
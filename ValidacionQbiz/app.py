@@ -1,11 +1,107 @@
 """
 Aplicación de validación de datos de asistencia.
 Carga archivo Excel (.xlsx) y detecta duplicados por DNI y nombres vacíos.
+La validación vive en validation_logic.py; esta página solo muestra el reporte.
+Los Excel de descarga se generan solo cuando se piden y se guardan por carga.
 """
 
-import io
-import streamlit as st
+import sqlite3
+from datetime import date
+
 import pandas as pd
+import streamlit as st
+
+from Comun.excel import write_excel_bytes
+from Comun.workers import pool_load_message, run_in_pool
+
+try:
+    from ValidacionQbiz.attendance_index import get_attendance_index, needs_date
+    from ValidacionQbiz.validation_logic import ARCHIVO_VACIO, AttendanceReport, validate_attendance_file
+except ImportError:
+    from attendance_index import get_attendance_index, needs_date
+    from validation_logic import ARCHIVO_VACIO, AttendanceReport, validate_attendance_file
+
+
+CRUCE_STATE_KEY = "qbiz_cruce_indice"
+EXPORTS_STATE_KEY = "qbiz_exports"
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _render_descarga(df: pd.DataFrame, kind: str, label: str, file_name: str, upload_key: tuple) -> None:
+    """Genera el Excel solo cuando se pide y lo reutiliza mientras no cambie la carga (upload_key)."""
+    cache = st.session_state.get(EXPORTS_STATE_KEY)
+    if cache is None or cache["carga"] != upload_key:
+        cache = {"carga": upload_key, "archivos": {}}
+        st.session_state[EXPORTS_STATE_KEY] = cache
+    data = cache["archivos"].get(kind)
+    if data is None:
+        if not st.button(f"📥 Preparar {label} (Excel)", key=f"prepare_{kind}"):
+            return
+        with st.spinner("Generando archivo..."):
+            data = run_in_pool(write_excel_bytes, df)
+        cache["archivos"][kind] = data
+
+    st.download_button(
+        label=f"📥 Descargar {label} (Excel)",
+        data=data,
+        file_name=file_name,
+        mime=XLSX_MIME,
+        key=f"download_{kind}",
+    )
+
+
+def _cruce_con_indice(archivo: str, report: AttendanceReport, fecha: str | None) -> pd.DataFrame:
+    """Registros de la carga ya presentes en otra carga del índice (se memoriza en la sesión)."""
+    key = (report.digest, archivo, fecha)
+    cached = st.session_state.get(CRUCE_STATE_KEY)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    cruces = get_attendance_index().find_duplicates(report.digest, archivo, report.attendance, fecha)
+    st.session_state[CRUCE_STATE_KEY] = (key, cruces)
+    return cruces
+
+
+def _render_indice_asistencia(archivo: str, report: AttendanceReport, upload_key: tuple) -> bool:
+    """Cruza la carga con el índice de asistencia y la registra si se confirma. Devuelve si hubo cruces."""
+    if report.digest is None or report.attendance.empty:
+        return False
+    fecha = None
+    if needs_date(report.attendance):
+        # Sin columna de fecha se pide la fecha para cruzar y registrar.
+        fecha = st.date_input(
+            "Fecha de asistencia del archivo",
+            value=date.today(),
+            help="El archivo no trae columna de fecha; se usa para cruzar con otras cargas.",
+            key="qbiz_fecha_asistencia",
+        ).strftime("%Y-%m-%d")
+    # Solo se registra al confirmar: una carga de prueba o con errores no debe quedar en el índice.
+    # Una carga posterior del mismo fundo y fecha reemplaza a esta.
+    registrar = st.button(
+        "Registrar en el índice de asistencia",
+        help="Una carga del mismo fundo (o archivo, si no trae fundo) y fecha reemplaza a la anterior.",
+        key="qbiz_registrar",
+    )
+
+    try:
+        cruces = _cruce_con_indice(archivo, report, fecha)
+        if registrar:
+            registrados = get_attendance_index().register(report.digest, archivo, report.attendance, fecha)
+            if registrados:
+                st.success(f"Se registraron {registrados} registros en el índice de asistencia.")
+            else:
+                st.info("Esta carga ya estaba registrada en el índice de asistencia.")
+    except sqlite3.Error as e:
+        st.warning(f"No se pudo usar el índice de asistencia: {e}")
+        return False
+
+    if cruces.empty:
+        return False
+    st.subheader("⚠️ DNI ya registrados en otra carga (mismo DNI y fecha)")
+    st.dataframe(cruces, use_container_width=True)
+    _render_descarga(
+        cruces, f"cruces_{fecha}", "cruces con otras cargas", "duplicados_otras_cargas.xlsx", upload_key
+    )
+    return True
 
 
 def run_app():
@@ -17,150 +113,76 @@ def run_app():
         type=["xlsx"],
         help="Solo se aceptan archivos .xlsx",
     )
+    columns_only = st.checkbox(
+        "Modo rápido (leer solo las columnas de la validación)",
+        value=False,
+        help="Lee solo DNI, Nombre, horas, justificaciones, fecha y fundo. Es más rápido con "
+        "archivos anchos; la tabla de nombres vacíos muestra solo esas columnas.",
+        key="qbiz_columns_only",
+    )
 
     if uploaded_file is not None:
+        load_message = pool_load_message()
+        if load_message:
+            st.caption(load_message)
         try:
-            df = pd.read_excel(uploaded_file, engine="openpyxl")
-        except Exception as e:
-            st.error(f"Error al leer el archivo: {e}")
+            report = validate_attendance_file(uploaded_file, columns_only)
+        except ValueError as e:
+            st.error(str(e))
             st.stop()
 
-        if df.empty:
-            st.warning("El archivo está vacío.")
+        if report.rows == 0:
+            st.warning(ARCHIVO_VACIO)
             st.stop()
+        upload_key = (report.digest, columns_only)
 
-        # Normalizar nombres de columnas (por si vienen con espacios o mayúsculas)
-        df.columns = df.columns.str.strip()
-
-        has_duplicates = False
-        has_empty_names = False
-
-        # --- Lógica de duplicados (solo columna DNI) ---
-        if "DNI" not in df.columns:
-            st.error("El archivo debe contener una columna 'DNI'.")
-            st.stop()
-
-        duplicated_mask = df.duplicated(subset=["DNI"], keep=False)
-        duplicates_df = df.loc[duplicated_mask]
-
-        # Columnas de justificación (sin Hr Entrada/Salida al menos una debe ser 1)
-        JUSTIFICACION_COLS = ["D.Ausencia", "D.Permiso", "D.Permiso Goce", "D.Vacaciones", "D.Licencia"]
-        justificacion_en_df = [c for c in JUSTIFICACION_COLS if c in df.columns]
-
-        # Columnas a mostrar para duplicados: DNI, Nombre, Hr Entrada, Hr Salida + "Con valor 1 en" (solo filas con DNI repetido 2+ veces)
-        dup_columns = ["DNI", "Nombre", "Hr Entrada", "Hr Salida"]
-        available_dup_cols = [c for c in dup_columns if c in df.columns]
-        if not available_dup_cols:
-            available_dup_cols = list(df.columns)
-
-        dup_display = duplicates_df[available_dup_cols].copy() if available_dup_cols else duplicates_df
-
-        # Añadir columna "Con valor 1 en" para saber en qué justificación tiene 1 (solo en la tabla de duplicados)
-        if justificacion_en_df and not dup_display.empty:
-            dup_display = dup_display.copy()
-            dup_display["Con valor 1 en"] = dup_display.apply(
-                lambda r: ", ".join(
-                    [c for c in justificacion_en_df if pd.notna(df.loc[r.name, c]) and str(df.loc[r.name, c]).strip() == "1"]
-                )
-                or "—",
-                axis=1,
-            )
-
-        if not dup_display.empty:
-            has_duplicates = True
+        # --- Duplicados por DNI ---
+        if not report.duplicates.empty:
             st.subheader("⚠️ Registros duplicados (por DNI)")
-            st.dataframe(dup_display, use_container_width=True)
+            st.dataframe(report.duplicates, use_container_width=True)
 
             # Opción de descarga para duplicados
-            buffer_dup = io.BytesIO()
-            dup_display.to_excel(buffer_dup, index=False, engine="openpyxl")
-            buffer_dup.seek(0)
-            st.download_button(
-                label="📥 Descargar duplicados (Excel)",
-                data=buffer_dup,
-                file_name="duplicados_asistencia.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                key="download_duplicates",
+            _render_descarga(
+                report.duplicates, "duplicates", "duplicados", "duplicados_asistencia.xlsx", upload_key
             )
 
-        # --- Lógica de nombres vacíos ---
-        if "Nombre" not in df.columns:
-            st.warning("No se encontró la columna 'Nombre'. Se omite la validación de nombres vacíos.")
-        else:
-            empty_name_mask = df["Nombre"].isna() | (df["Nombre"].astype(str).str.strip() == "")
-            empty_names_df = df.loc[empty_name_mask]
-
-            if not empty_names_df.empty:
-                has_empty_names = True
-                st.subheader("⚠️ Registros con Nombre vacío o nulo")
-                st.dataframe(empty_names_df, use_container_width=True)
-
-                buffer_empty = io.BytesIO()
-                empty_names_df.to_excel(buffer_empty, index=False, engine="openpyxl")
-                buffer_empty.seek(0)
-                st.download_button(
-                    label="📥 Descargar registros con nombre vacío (Excel)",
-                    data=buffer_empty,
-                    file_name="nombres_vacios_asistencia.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    key="download_empty_names",
-                )
-
-        # --- Sin Hr Entrada ni Hr Salida: al menos una de D.Ausencia, D.Permiso, etc. debe ser 1 ---
-        has_sin_justificacion = False
-        hr_entrada_col = "Hr Entrada" if "Hr Entrada" in df.columns else None
-        hr_salida_col = "Hr Salida" if "Hr Salida" in df.columns else None
-        if hr_entrada_col is not None and hr_salida_col is not None and justificacion_en_df:
-            def esta_vacio(val):
-                if pd.isna(val):
-                    return True
-                s = str(val).strip()
-                return s == "" or s.lower() in ("nan", "none")
-
-            sin_entrada_ni_salida = df.apply(
-                lambda r: esta_vacio(r[hr_entrada_col]) and esta_vacio(r[hr_salida_col]),
-                axis=1,
+        # --- Nombres vacíos ---
+        if report.empty_names is not None and not report.empty_names.empty:
+            st.subheader("⚠️ Registros con Nombre vacío o nulo")
+            st.dataframe(report.empty_names, use_container_width=True)
+
+            _render_descarga(
+                report.empty_names,
+                "empty_names",
+                "registros con nombre vacío",
+                "nombres_vacios_asistencia.xlsx",
+                upload_key,
             )
-            filas_sin_horas = df.loc[sin_entrada_ni_salida]
-
-            def alguna_justificacion_es_1(row):
-                for c in justificacion_en_df:
-                    v = row.get(c)
-                    if pd.notna(v) and str(v).strip() == "1":
-                        return True
-                return False
-
-            filas_sin_justificacion = filas_sin_horas.loc[~filas_sin_horas.apply(alguna_justificacion_es_1, axis=1)]
-
-            if not filas_sin_justificacion.empty:
-                has_sin_justificacion = True
-                cols_mostrar = [c for c in ["DNI", "Nombre", "Hr Entrada", "Hr Salida"] + justificacion_en_df if c in df.columns]
-                reporte_sin_just = filas_sin_justificacion[cols_mostrar].copy()
-                reporte_sin_just["Con valor 1 en"] = "— (ninguna tiene 1)"
-                st.subheader("⚠️ Sin Hr. Entrada ni Hr. Salida y ninguna justificación en 1")
-                st.markdown(
-                    "Estos registros tienen **Hr. Entrada** y **Hr. Salida** vacías y **ninguna** de "
-                    "D.Ausencia, D.Permiso, D.Permiso Goce, D.Vacaciones, D.Licencia tiene valor 1."
-                )
-                st.dataframe(reporte_sin_just, use_container_width=True)
-                buffer_sin = io.BytesIO()
-                reporte_sin_just.to_excel(buffer_sin, index=False, engine="openpyxl")
-                buffer_sin.seek(0)
-                st.download_button(
-                    label="📥 Descargar sin justificación (Excel)",
-                    data=buffer_sin,
-                    file_name="sin_justificacion_asistencia.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    key="download_sin_justificacion",
-                )
-        elif hr_entrada_col and hr_salida_col and not justificacion_en_df:
-            st.warning(
-                "No se encontraron las columnas D.Ausencia, D.Permiso, D.Permiso Goce, "
-                "D.Vacaciones o D.Licencia. No se valida justificación cuando faltan horas."
+
+        # --- Sin Hr Entrada ni Hr Salida y sin justificación en 1 ---
+        if report.missing_justification is not None and not report.missing_justification.empty:
+            st.subheader("⚠️ Sin Hr. Entrada ni Hr. Salida y ninguna justificación en 1")
+            st.markdown(
+                "Estos registros tienen **Hr. Entrada** y **Hr. Salida** vacías y **ninguna** de "
+                "D.Ausencia, D.Permiso, D.Permiso Goce, D.Vacaciones, D.Licencia tiene valor 1."
+            )
+            st.dataframe(report.missing_justification, use_container_width=True)
+            _render_descarga(
+                report.missing_justification,
+                "sin_justificacion",
+                "sin justificación",
+                "sin_justificacion_asistencia.xlsx",
+                upload_key,
             )
 
+        # --- Mismo DNI y fecha en otras cargas (índice de asistencia) ---
+        has_cruces = _render_indice_asistencia(uploaded_file.name, report, upload_key)
+
+        for warning in report.warnings:
+            st.warning(warning)
+
         # --- Mensaje de éxito si no hay errores ---
-        if not has_duplicates and not has_empty_names and not has_sin_justificacion:
+        if report.is_clean and not has_cruces:
             st.success("✅ Archivo limpio: No se encontraron errores.")
 
     else:
@@ -169,4 +191,3 @@ def run_app():
 
 if __name__ == "__main__":
     run_app()
-
@@ -0,0 +1,189 @@
+"""
+Índice local de asistencia para detectar DNI registrados en más de una carga.
+
+Cada archivo validado agrega sus registros (DNI, fecha, fundo, nombre) a una base
+SQLite con un índice por (dni, fecha). Un archivo nuevo se cruza contra el índice
+con un join por esa llave, sin volver a leer los Excel anteriores: encuentra al
+mismo DNI en la misma fecha en otro archivo (otro fundo, o el mismo día enviado
+de nuevo). Una carga se identifica por el hash del archivo, así que registrar dos
+veces el mismo archivo no duplica filas.
+
+Cada registro guarda además su origen: el fundo, o el nombre del archivo si no
+trae fundo. Una carga nueva del mismo origen y fecha es una versión corregida:
+reemplaza los registros de la anterior y no se cruza con ella.
+
+La ruta se toma de AQUANQA_ATTENDANCE_DB (por defecto ~/.aquanqa/asistencia.sqlite3).
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+
+INDEX_PATH_ENV = "AQUANQA_ATTENDANCE_DB"
+DEFAULT_INDEX_PATH = Path.home() / ".aquanqa" / "asistencia.sqlite3"
+CRUCE_COLS = ["DNI", "Fecha", "Nombre", "Fundo", "Otro archivo", "Otro fundo", "Otro nombre", "Registrado"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cargas (
+    digest TEXT PRIMARY KEY,
+    archivo TEXT NOT NULL,
+    registrado TEXT NOT NULL,
+    filas INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS asistencia (
+    dni TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    fundo TEXT,
+    nombre TEXT,
+    digest TEXT NOT NULL,
+    origen TEXT
+);
+"""
+
+# Después de agregar origen a las bases creadas antes de que existiera.
+_INDICES = """
+CREATE INDEX IF NOT EXISTS asistencia_dni_fecha ON asistencia (dni, fecha);
+CREATE INDEX IF NOT EXISTS asistencia_origen_fecha ON asistencia (origen, fecha);
+"""
+
+# Los registros del archivo nuevo van a una tabla temporal y se cruzan con el
+# índice (dni, fecha): el costo depende del archivo nuevo, no del tamaño del índice.
+# CROSS JOIN fija el orden en SQLite (recorre nuevos y busca en el índice); con
+# JOIN el planificador, sin estadísticas de la tabla temporal, recorre asistencia.
+_CRUCE_SQL = """
+SELECT n.dni, n.fecha, n.nombre, n.fundo, c.archivo, a.fundo, a.nombre, c.registrado
+FROM nuevos AS n
+CROSS JOIN asistencia AS a ON a.dni = n.dni AND a.fecha = n.fecha
+JOIN cargas AS c ON c.digest = a.digest
+WHERE a.digest != ? AND a.origen != n.origen
+ORDER BY n.dni, n.fecha, c.registrado
+"""
+
+
+def _filas(attendance: pd.DataFrame, archivo: str, fecha: str | None) -> list[tuple]:
+    """(dni, fecha, fundo, nombre, origen) por registro; fecha completa las filas sin fecha."""
+    fechas = attendance["Fecha"]
+    fundos = attendance["Fundo"]
+    if fecha is not None:
+        fechas = fechas.where(fechas.notna(), fecha)
+    registros = pd.DataFrame(
+        {
+            "dni": attendance["DNI"],
+            "fecha": fechas,
+            "fundo": fundos,
+            "nombre": attendance["Nombre"],
+            "origen": fundos.where(fundos.notna() & (fundos != ""), archivo),
+        }
+    )
+    registros = registros[registros["dni"].notna() & registros["fecha"].notna()]
+    registros = registros.drop_duplicates(subset=["dni", "fecha"]).astype(object)
+    return list(registros.where(registros.notna(), None).itertuples(index=False, name=None))
+
+
+def needs_date(attendance: pd.DataFrame) -> bool:
+    """Si algún registro no trae fecha (el archivo no tiene columna de fecha)."""
+    return bool(attendance["Fecha"].isna().any())
+
+
+class AttendanceIndex:
+    """Base SQLite de asistencia. Abre una conexión por operación (sirve desde varios hilos)."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            columnas = {fila[1] for fila in conn.execute("PRAGMA table_info(asistencia)")}
+            if "origen" not in columnas:
+                conn.execute("ALTER TABLE asistencia ADD COLUMN origen TEXT")
+                conn.execute(
+                    "UPDATE asistencia SET origen = COALESCE("
+                    "fundo, (SELECT archivo FROM cargas WHERE cargas.digest = asistencia.digest))"
+                )
+            conn.executescript(_INDICES)
+
+    @contextmanager
+    def _connect(self):
+        """Conexión de una sola operación: confirma al salir (o revierte si falla) y se cierra."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def is_registered(self, digest: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM cargas WHERE digest = ?", (digest,)).fetchone() is not None
+
+    def register(self, digest: str, archivo: str, attendance: pd.DataFrame, fecha: str | None = None) -> int:
+        """Agrega los registros de una carga; devuelve cuántos se agregaron (0 si ya estaba).
+
+        Los registros de cargas anteriores con el mismo origen y fecha se reemplazan; una
+        carga que se queda sin registros sale del índice.
+        """
+        filas = _filas(attendance, archivo, fecha)
+        versiones = sorted({(fila[4], fila[1]) for fila in filas})
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO cargas (digest, archivo, registrado, filas) VALUES (?, ?, ?, ?)",
+                (digest, archivo, datetime.now().isoformat(timespec="seconds"), len(filas)),
+            )
+            if cursor.rowcount == 0:
+                return 0
+            for origen, dia in versiones:
+                reemplazadas = conn.execute(
+                    "SELECT digest, COUNT(*) FROM asistencia WHERE origen = ? AND fecha = ? GROUP BY digest",
+                    (origen, dia),
+                ).fetchall()
+                conn.executemany("UPDATE cargas SET filas = filas - ? WHERE digest = ?", [(n, d) for d, n in reemplazadas])
+                conn.execute("DELETE FROM asistencia WHERE origen = ? AND fecha = ?", (origen, dia))
+            conn.execute("DELETE FROM cargas WHERE filas <= 0 AND digest != ?", (digest,))
+            conn.executemany(
+                "INSERT INTO asistencia (dni, fecha, fundo, nombre, origen, digest) VALUES (?, ?, ?, ?, ?, ?)",
+                [fila + (digest,) for fila in filas],
+            )
+        return len(filas)
+
+    def find_duplicates(
+        self, digest: str, archivo: str, attendance: pd.DataFrame, fecha: str | None = None
+    ) -> pd.DataFrame:
+        """Registros de attendance cuyo (DNI, fecha) ya está en otra carga del índice.
+
+        No cuenta las versiones anteriores de esta carga (mismo origen y fecha).
+        """
+        filas = _filas(attendance, archivo, fecha)
+        if not filas:
+            return pd.DataFrame(columns=CRUCE_COLS)
+        with self._connect() as conn:
+            conn.execute("CREATE TEMP TABLE nuevos (dni TEXT, fecha TEXT, fundo TEXT, nombre TEXT, origen TEXT)")
+            conn.executemany("INSERT INTO nuevos VALUES (?, ?, ?, ?, ?)", filas)
+            cruces = conn.execute(_CRUCE_SQL, (digest,)).fetchall()
+        return pd.DataFrame(cruces, columns=CRUCE_COLS)
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            cargas = conn.execute("SELECT COUNT(*) FROM cargas").fetchone()[0]
+            registros = conn.execute("SELECT COUNT(*) FROM asistencia").fetchone()[0]
+        return {"cargas": cargas, "registros": registros}
+
+
+_default_index: AttendanceIndex | None = None
+_default_index_lock = threading.Lock()
+
+
+def get_attendance_index() -> AttendanceIndex:
+    """Índice en la ruta configurada (compartido por las sesiones del servidor)."""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = AttendanceIndex(os.environ.get(INDEX_PATH_ENV) or DEFAULT_INDEX_PATH)
+        return _default_index
@@ -0,0 +1,203 @@
+"""
+Validación en lote de archivos de asistencia Qbiz.
+
+Valida en paralelo todos los .xlsx de una carpeta y escribe un solo Excel con
+una hoja de resumen (una fila por archivo) y una hoja por tipo de hallazgo, con
+la columna Archivo para saber de dónde viene cada fila. Después, en orden de
+nombre, cruza cada archivo con el índice de asistencia (mismo DNI y fecha en otra
+carga) y lo registra en él; un archivo posterior del mismo fundo y fecha reemplaza
+al anterior.
+
+Uso (desde la raíz del repositorio):
+    python -m ValidacionQbiz.batch CARPETA [-o reporte.xlsx] [--workers N] [--fecha AAAA-MM-DD] [--sin-indice] [--solo-columnas]
+"""
+
+import argparse
+import sqlite3
+import sys
+from datetime import date
+from concurrent.futures import as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from Comun.excel import write_excel_sheets_bytes
+from Comun.workers import WORKERS_ENV, WorkerPool, get_worker_pool
+
+try:
+    from ValidacionQbiz.attendance_index import AttendanceIndex, get_attendance_index, needs_date
+    from ValidacionQbiz.validation_logic import AttendanceReport, validate_attendance_path
+except ImportError:
+    from attendance_index import AttendanceIndex, get_attendance_index, needs_date
+    from validation_logic import AttendanceReport, validate_attendance_path
+
+
+REPORTE_POR_DEFECTO = "reporte_asistencia.xlsx"
+ARCHIVO_COL = "Archivo"
+HOJAS_DETALLE = {
+    "Duplicados": "duplicates",
+    "Nombres vacíos": "empty_names",
+    "Sin justificación": "missing_justification",
+}
+HOJA_CRUCES = "Otras cargas"
+SIN_FECHA = "Sin columna de fecha ni --fecha: no se cruzó con el índice de asistencia."
+
+
+def _archivos_xlsx(carpeta: Path, salida: Path) -> list[Path]:
+    # Se omiten los temporales de Excel (~$...) y el propio reporte si queda en la misma carpeta.
+    return sorted(
+        path
+        for path in carpeta.glob("*.xlsx")
+        if not path.name.startswith("~$") and path.resolve() != salida.resolve()
+    )
+
+
+def _contar(df: pd.DataFrame | None) -> int | None:
+    return None if df is None else len(df)
+
+
+def cruzar_con_indice(
+    resultados: dict[str, AttendanceReport | str], index: AttendanceIndex, fecha: str | None
+) -> dict[str, pd.DataFrame | str]:
+    """Por archivo validado, sus cruces con otras cargas del índice (o por qué no se cruzó).
+
+    Se cruza y registra de a un archivo, así los archivos del mismo lote también se cruzan entre sí.
+    """
+    cruces = {}
+    for archivo, resultado in resultados.items():
+        if isinstance(resultado, str) or resultado.digest is None:
+            continue
+        if fecha is None and needs_date(resultado.attendance):
+            cruces[archivo] = SIN_FECHA
+            continue
+        cruces[archivo] = index.find_duplicates(resultado.digest, archivo, resultado.attendance, fecha)
+        index.register(resultado.digest, archivo, resultado.attendance, fecha)
+    return cruces
+
+
+def combinar_reportes(
+    resultados: dict[str, AttendanceReport | str], cruces: dict[str, pd.DataFrame | str] | None = None
+) -> dict[str, pd.DataFrame]:
+    """Hojas del reporte combinado; cada resultado es un reporte o el mensaje de error del archivo."""
+    cruces = cruces or {}
+    resumen = []
+    detalle = {hoja: [] for hoja in [*HOJAS_DETALLE, HOJA_CRUCES]}
+    for archivo, resultado in resultados.items():
+        if isinstance(resultado, str):
+            resumen.append({ARCHIVO_COL: archivo, "Estado": "Error", "Observaciones": resultado})
+            continue
+        cruce = cruces.get(archivo)
+        observaciones = resultado.warnings + ([cruce] if isinstance(cruce, str) else [])
+        otras_cargas = _contar(cruce) if isinstance(cruce, pd.DataFrame) else None
+        resumen.append(
+            {
+                ARCHIVO_COL: archivo,
+                "Estado": "Limpio" if resultado.is_clean and not otras_cargas else "Con errores",
+                "Filas": resultado.rows,
+                "Duplicados": _contar(resultado.duplicates),
+                "Nombres vacíos": _contar(resultado.empty_names),
+                "Sin justificación": _contar(resultado.missing_justification),
+                HOJA_CRUCES: otras_cargas,
+                "Observaciones": " ".join(observaciones),
+            }
+        )
+        if otras_cargas:
+            detalle[HOJA_CRUCES].append(cruce.assign(**{ARCHIVO_COL: archivo}))
+        for hoja, atributo in HOJAS_DETALLE.items():
+            df = getattr(resultado, atributo)
+            if df is not None and not df.empty:
+                detalle[hoja].append(df.assign(**{ARCHIVO_COL: archivo}).reset_index(drop=True))
+
+    columnas_resumen = [
+        ARCHIVO_COL, "Estado", "Filas", "Duplicados", "Nombres vacíos", "Sin justificación", HOJA_CRUCES,
+        "Observaciones",
+    ]
+    hojas = {"Resumen": pd.DataFrame(resumen, columns=columnas_resumen)}
+    for hoja, partes in detalle.items():
+        df = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=[ARCHIVO_COL])
+        hojas[hoja] = df[[ARCHIVO_COL] + [c for c in df.columns if c != ARCHIVO_COL]]
+    return hojas
+
+
+def validar_carpeta(
+    carpeta: Path,
+    salida: Path,
+    workers: int,
+    index: AttendanceIndex | None = None,
+    fecha: str | None = None,
+    columns_only: bool = False,
+) -> pd.DataFrame:
+    """Valida cada .xlsx de carpeta en el pool de procesos y escribe el reporte combinado en salida.
+
+    Con index, además cruza y registra cada archivo en el índice de asistencia.
+    Devuelve la hoja de resumen.
+    """
+    archivos = _archivos_xlsx(carpeta, salida)
+    if not archivos:
+        raise ValueError(f"No se encontraron archivos .xlsx en {carpeta}")
+
+    pool = WorkerPool(workers, max_queue=len(archivos))
+    futuros = {
+        pool.submit("lote", validate_attendance_path, str(path), columns_only): path.name for path in archivos
+    }
+    resultados: dict[str, AttendanceReport | str] = {}
+    for hechos, futuro in enumerate(as_completed(futuros), start=1):
+        archivo = futuros[futuro]
+        try:
+            resultado = futuro.result()
+            estado = "limpio" if resultado.is_clean else "con errores"
+        except Exception as e:
+            # Un archivo que falla no detiene el lote: queda como error en el resumen.
+            resultado = str(e)
+            estado = f"error: {e}"
+        resultados[archivo] = resultado
+        print(f"[{hechos}/{len(archivos)}] {archivo}: {estado}")
+
+    resultados = {archivo: resultados[archivo] for archivo in sorted(resultados)}
+    cruces = cruzar_con_indice(resultados, index, fecha) if index is not None else {}
+    hojas = combinar_reportes(resultados, cruces)
+    salida.write_bytes(write_excel_sheets_bytes(hojas))
+    return hojas["Resumen"]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Valida en lote los archivos de asistencia Qbiz (.xlsx) de una carpeta.")
+    parser.add_argument("carpeta", type=Path, help="Carpeta con los archivos .xlsx")
+    parser.add_argument(
+        "-o", "--salida", type=Path, default=None,
+        help=f"Excel del reporte combinado (por defecto CARPETA/{REPORTE_POR_DEFECTO})",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help=f"Procesos en paralelo (por defecto {WORKERS_ENV} o según los núcleos; 0 = sin pool)",
+    )
+    parser.add_argument(
+        "--fecha", type=date.fromisoformat, default=None,
+        help="Fecha (AAAA-MM-DD) para los archivos sin columna de fecha al cruzar con el índice",
+    )
+    parser.add_argument("--sin-indice", action="store_true", help="No cruzar ni registrar en el índice de asistencia")
+    parser.add_argument(
+        "--solo-columnas", action="store_true",
+        help="Leer solo las columnas de la validación (más rápido; nombres vacíos sin la fila completa)",
+    )
+    args = parser.parse_args(argv)
+
+    if not args.carpeta.is_dir():
+        parser.error(f"No existe la carpeta {args.carpeta}")
+    salida = args.salida or args.carpeta / REPORTE_POR_DEFECTO
+    workers = args.workers if args.workers is not None else get_worker_pool().max_workers
+    try:
+        index = None if args.sin_indice else get_attendance_index()
+        fecha = args.fecha.isoformat() if args.fecha else None
+        resumen = validar_carpeta(args.carpeta, salida, workers, index, fecha, args.solo_columnas)
+    except (ValueError, sqlite3.Error) as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    con_errores = int((resumen["Estado"] != "Limpio").sum())
+    print(f"Reporte escrito en {salida} ({len(resumen)} archivos, {con_errores} con errores).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+"""
+Motor de validación de asistencia Qbiz, sin dependencias de Streamlit.
+
+validate_attendance(df) detecta DNI duplicados, nombres vacíos y filas sin
+Hr Entrada ni Hr Salida y sin ninguna justificación en 1, y devuelve un
+AttendanceReport. validate_attendance_file memoriza el reporte por el hash del
+contenido del archivo, así los reruns de la página y las cargas repetidas del
+mismo archivo no vuelven a leer ni validar. Lo usan la página y el lote (batch.py).
+
+En modo solo columnas (columns_only=True) se leen del Excel únicamente las
+columnas que usan las validaciones y los reportes (COLUMNAS_QBIZ); la tabla de
+nombres vacíos muestra entonces solo esas columnas en lugar de la fila completa.
+"""
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from Comun.dates import parse_dates
+from Comun.distinct import factorize_typed
+from Comun.excel import read_sheet_columns, read_sheet_preview
+from Comun.ingest_cache import cached_read, file_digest
+
+
+# Sin Hr Entrada ni Hr Salida, al menos una de estas columnas debe ser 1.
+JUSTIFICACION_COLS = ["D.Ausencia", "D.Permiso", "D.Permiso Goce", "D.Vacaciones", "D.Licencia"]
+COLUMNAS_REPORTE = ["DNI", "Nombre", "Hr Entrada", "Hr Salida"]
+CON_VALOR_1_COL = "Con valor 1 en"
+# Columnas de fecha y fundo que se buscan para el índice de asistencia (la primera que exista).
+FECHA_COLS = ["Fecha", "Fecha Asistencia", "Día", "Dia"]
+FUNDO_COLS = ["Fundo", "Sede"]
+ASISTENCIA_COLS = ["DNI", "Fecha", "Fundo", "Nombre"]
+COLUMNAS_QBIZ = COLUMNAS_REPORTE + JUSTIFICACION_COLS + FECHA_COLS + FUNDO_COLS
+ARCHIVO_VACIO = "El archivo está vacío."
+SIN_NOMBRE = "No se encontró la columna 'Nombre'. Se omite la validación de nombres vacíos."
+SIN_JUSTIFICACION_COLS = (
+    "No se encontraron las columnas D.Ausencia, D.Permiso, D.Permiso Goce, "
+    "D.Vacaciones o D.Licencia. No se valida justificación cuando faltan horas."
+)
+
+_REPORT_CACHE_SIZE = 16
+_report_cache: OrderedDict[tuple[str, bool], "AttendanceReport"] = OrderedDict()
+_report_cache_lock = threading.Lock()
+
+class AttendanceReport:
+    """Resultado de validar un archivo de asistencia.
+
+    empty_names es None si falta la columna Nombre y missing_justification es
+    None si no se pudo validar (faltan horas o columnas de justificación).
+    attendance tiene un registro por (DNI, Fecha) para el índice de asistencia;
+    Fecha queda vacía si el archivo no trae columna de fecha. digest es el hash
+    del archivo cuando el reporte viene de validate_attendance_file.
+    """
+
+    def __init__(
+        self,
+        rows: int,
+        duplicates: pd.DataFrame,
+        empty_names: pd.DataFrame | None,
+        missing_justification: pd.DataFrame | None,
+        warnings: list[str],
+        attendance: pd.DataFrame | None = None,
+        digest: str | None = None,
+    ):
+        self.rows = rows
+        self.duplicates = duplicates
+        self.empty_names = empty_names
+        self.missing_justification = missing_justification
+        self.warnings = warnings
+        self.attendance = attendance if attendance is not None else pd.DataFrame(columns=ASISTENCIA_COLS)
+        self.digest = digest
+
+    @property
+    def is_clean(self) -> bool:
+        return all(
+            df is None or df.empty
+            for df in (self.duplicates, self.empty_names, self.missing_justification)
+        )
+
+
+def _textos_distintos(valores: pd.Series) -> tuple[np.ndarray, pd.Series]:
+    """(código por fila, str() de cada valor distinto); los nulos llevan código -1.
+
+    Las columnas de asistencia repiten pocos valores, así que str() y las
+    comparaciones se hacen una vez por valor distinto y no por fila.
+    """
+    # 1, 1.0 y True son el mismo valor para factorize pero no para str(): se separan por tipo.
+    codigos, unicos = factorize_typed(valores)
+    return codigos, pd.Series(unicos, dtype=object).astype(str)
+
+
+def _valor_es_1(valores: pd.Series) -> np.ndarray:
+    """Por fila, si el valor no es nulo y str(valor).strip() == "1" (1, "1", " 1"; no 1.0 ni True)."""
+    codigos, textos = _textos_distintos(valores)
+    es_1 = (textos.str.strip() == "1").to_numpy(dtype=bool)
+    return np.append(es_1, False)[codigos]
+
+
+def _matriz_valor_1(justificaciones: pd.DataFrame) -> np.ndarray:
+    """Matriz filas x columnas de justificación, True donde el valor es 1."""
+    if justificaciones.columns.empty:
+        return np.zeros((len(justificaciones), 0), dtype=bool)
+    return np.column_stack([_valor_es_1(justificaciones[c]) for c in justificaciones.columns])
+
+
+def _columna_con_valor_1(justificaciones: pd.DataFrame) -> list[str]:
+    """Por fila, las columnas de justificación con valor 1 (o "—")."""
+    cols = list(justificaciones.columns)
+    matriz = _matriz_valor_1(justificaciones)
+    # Cada combinación de columnas en 1 se arma como texto una sola vez (a lo sumo 2**columnas).
+    patrones = matriz.astype(np.int64) @ (np.int64(1) << np.arange(len(cols), dtype=np.int64))
+    presentes, por_fila = np.unique(patrones, return_inverse=True)
+    etiquetas = np.array(
+        [", ".join(c for j, c in enumerate(cols) if patron >> j & 1) or "—" for patron in presentes],
+        dtype=object,
+    )
+    return etiquetas[por_fila].tolist()
+
+
+def _esta_vacio(valores: pd.Series) -> np.ndarray:
+    """Por fila, si el valor es nulo o su texto (sin espacios) es "", "nan" o "none"."""
+    codigos, textos = _textos_distintos(valores)
+    vacio = textos.str.strip().str.lower().isin(["", "nan", "none"]).to_numpy(dtype=bool)
+    return np.append(vacio, True)[codigos]
+
+
+def _mascara_sin_justificacion(df: pd.DataFrame, hr_entrada_col: str, hr_salida_col: str, justificacion_cols: list[str]) -> pd.Series:
+    """Filas sin Hr Entrada ni Hr Salida y sin ninguna justificación en 1."""
+    sin_entrada_ni_salida = _esta_vacio(df[hr_entrada_col]) & _esta_vacio(df[hr_salida_col])
+    alguna_justificacion_es_1 = _matriz_valor_1(df[justificacion_cols]).any(axis=1)
+    return pd.Series(sin_entrada_ni_salida & ~alguna_justificacion_es_1, index=df.index)
+
+
+def normalizar_dni(valores: pd.Series) -> pd.Series:
+    """DNI como texto comparable entre archivos: sin espacios ni ".0" y con ceros a la izquierda.
+
+    Excel suele leer el DNI como número (perdiendo los ceros iniciales), así que
+    los DNI solo numéricos de menos de 8 dígitos se completan a 8. Los nulos y
+    vacíos quedan como None.
+    """
+    texto = valores.astype(str).str.strip().str.replace(r"\.0+$", "", regex=True)
+    texto = texto.where(~texto.str.fullmatch(r"\d{1,7}"), texto.str.zfill(8))
+    return texto.where(valores.notna() & (texto != ""), None)
+
+
+def _texto_o_none(valores: pd.Series) -> pd.Series:
+    return valores.astype(str).str.strip().where(valores.notna(), None)
+
+
+def _primera_columna(df: pd.DataFrame, candidatas: list[str]) -> str | None:
+    return next((c for c in candidatas if c in df.columns), None)
+
+
+def _registros_asistencia(df: pd.DataFrame) -> pd.DataFrame:
+    """Un registro por (DNI, Fecha) con el fundo y el nombre de su primera fila."""
+    fecha_col = _primera_columna(df, FECHA_COLS)
+    fundo_col = _primera_columna(df, FUNDO_COLS)
+    if fecha_col:
+        fechas, texto = parse_dates(df[fecha_col])
+        fechas = texto.where(fechas.notna(), None)
+    else:
+        fechas = pd.Series(None, index=df.index, dtype=object)
+    registros = pd.DataFrame(
+        {
+            "DNI": normalizar_dni(df["DNI"]),
+            "Fecha": fechas,
+            "Fundo": _texto_o_none(df[fundo_col]) if fundo_col else None,
+            "Nombre": _texto_o_none(df["Nombre"]) if "Nombre" in df.columns else None,
+        },
+        index=df.index,
+    )
+    registros = registros[registros["DNI"].notna()]
+    return registros.drop_duplicates(subset=["DNI", "Fecha"]).reset_index(drop=True)
+
+
+def validate_attendance(df: pd.DataFrame) -> AttendanceReport:
+    """Valida un DataFrame de asistencia. Lanza ValueError si falta la columna DNI."""
+    if df.empty:
+        return AttendanceReport(0, pd.DataFrame(), None, None, [ARCHIVO_VACIO])
+
+    # Normalizar nombres de columnas (por si vienen con espacios); no se modifica el df recibido.
+    df = df.copy(deep=False)
+    df.columns = df.columns.str.strip()
+    if "DNI" not in df.columns:
+        raise ValueError("El archivo debe contener una columna 'DNI'.")
+
+    warnings = []
+    justificacion_en_df = [c for c in JUSTIFICACION_COLS if c in df.columns]
+
+    # --- Duplicados (solo columna DNI), con la justificación que tiene 1 ---
+    duplicates_df = df.loc[df.duplicated(subset=["DNI"], keep=False)]
+    available_dup_cols = [c for c in COLUMNAS_REPORTE if c in df.columns]
+    duplicates = duplicates_df[available_dup_cols].copy()
+    if justificacion_en_df and not duplicates.empty:
+        duplicates[CON_VALOR_1_COL] = _columna_con_valor_1(df.loc[duplicates.index, justificacion_en_df])
+
+    # --- Nombres vacíos ---
+    empty_names = None
+    if "Nombre" not in df.columns:
+        warnings.append(SIN_NOMBRE)
+    else:
+        empty_name_mask = df["Nombre"].isna() | (df["Nombre"].astype(str).str.strip() == "")
+        empty_names = df.loc[empty_name_mask]
+
+    # --- Sin Hr Entrada ni Hr Salida: al menos una justificación debe ser 1 ---
+    missing_justification = None
+    if "Hr Entrada" in df.columns and "Hr Salida" in df.columns:
+        if justificacion_en_df:
+            filas = df.loc[_mascara_sin_justificacion(df, "Hr Entrada", "Hr Salida", justificacion_en_df)]
+            missing_justification = filas[
+                [c for c in COLUMNAS_REPORTE + justificacion_en_df if c in df.columns]
+            ].copy()
+            missing_justification[CON_VALOR_1_COL] = "— (ninguna tiene 1)"
+        else:
+            warnings.append(SIN_JUSTIFICACION_COLS)
+
+    return AttendanceReport(
+        len(df), duplicates, empty_names, missing_justification, warnings, _registros_asistencia(df)
+    )
+
+
+def _read_attendance(buffer) -> pd.DataFrame:
+    return pd.read_excel(buffer, engine="openpyxl")
+
+
+def _read_attendance_columns(buffer) -> pd.DataFrame:
+    """Solo las columnas de COLUMNAS_QBIZ presentes (comparando sin espacios en los extremos)."""
+    header, _ = read_sheet_preview(buffer, nrows=0)
+    columns = [c for c in header.columns if isinstance(c, str) and c.strip() in COLUMNAS_QBIZ]
+    if not any(c.strip() == "DNI" for c in columns):
+        # Sin DNI no hay validación: se lee completo para dar el mismo error que el modo normal.
+        return read_sheet_columns(buffer)
+    return read_sheet_columns(buffer, columns=columns)
+
+
+def read_attendance(file, columns_only: bool = False) -> pd.DataFrame:
+    """Lee el .xlsx de asistencia (con la cache de ingesta compartida)."""
+    try:
+        if columns_only:
+            return cached_read(file, _read_attendance_columns, "ValidacionQbiz", "columnas", *COLUMNAS_QBIZ)
+        return cached_read(file, _read_attendance, "ValidacionQbiz")
+    except Exception as e:
+        raise ValueError(f"Error al leer el archivo: {e}") from e
+
+
+def validate_attendance_file(file, columns_only: bool = False) -> AttendanceReport:
+    """Lee y valida file; el reporte se memoriza por el hash del contenido (y el modo de lectura).
+
+    El reporte devuelto se comparte entre llamadas: no se debe modificar.
+    """
+    digest = file_digest(file)
+    key = (digest, columns_only)
+    with _report_cache_lock:
+        report = _report_cache.get(key)
+        if report is not None:
+            _report_cache.move_to_end(key)
+            return report
+
+    report = validate_attendance(read_attendance(file, columns_only))
+    report.digest = digest
+    with _report_cache_lock:
+        _report_cache[key] = report
+        while len(_report_cache) > _REPORT_CACHE_SIZE:
+            _report_cache.popitem(last=False)
+    return report
+
+
+def validate_attendance_path(path: str, columns_only: bool = False) -> AttendanceReport:
+    """validate_attendance_file desde una ruta; es picklable para el pool del lote."""
+    return validate_attendance_file(Path(path).read_bytes(), columns_only)
@@ -1,9 +1,17 @@
+import importlib
+import sys
+
 import streamlit as st
 
-# Importamos las apps como módulos
-from ValidacionQbiz import app as app_qbiz
-from BajaPersonalDatos import app as app_baja_personal
-from ValidacionDeDatos import app as app_validacion_avanzada
+from Comun.workers import get_worker_pool
+
+# Herramienta del menú -> módulo con run_app(). Cada módulo (y pandas con él) se
+# importa recién cuando se elige la herramienta, así el menú se pinta sin esperar.
+HERRAMIENTAS = {
+    "Validación simple de asistencia (Qbiz)": "ValidacionQbiz.app",
+    "Validación de CECO y Actividad": "ValidacionDeDatos.app",
+    "Filtro de DNIs contra data global": "BajaPersonalDatos.app",
+}
 
 
 SIDEBAR_CSS = """
@@ -41,6 +49,28 @@ SIDEBAR_CSS = """
 """
 
 
+def cargar_herramienta(opcion: str):
+    """Importa el módulo de la herramienta la primera vez que se elige (luego queda en sys.modules)."""
+    nombre_modulo = HERRAMIENTAS[opcion]
+    modulo = sys.modules.get(nombre_modulo)
+    if modulo is None:
+        with st.spinner("Cargando herramienta..."):
+            modulo = importlib.import_module(nombre_modulo)
+    return modulo
+
+
+def render_server_load():
+    metricas = get_worker_pool().metrics()
+    if not metricas["completadas"] and not metricas["en_cola"] and not metricas["en_ejecucion"]:
+        return
+    st.caption(
+        f"Carga del servidor: {metricas['en_ejecucion']}/{metricas['procesos']} procesos ocupados, "
+        f"{metricas['en_cola']} tareas en cola. "
+        f"Espera en cola prom. {metricas['espera_promedio_s']:.1f} s (p95 {metricas['espera_p95_s']:.1f} s) · "
+        f"ejecución prom. {metricas['ejecucion_promedio_s']:.1f} s (p95 {metricas['ejecucion_p95_s']:.1f} s)."
+    )
+
+
 def render_sidebar():
     st.markdown(SIDEBAR_CSS, unsafe_allow_html=True)
 
@@ -74,14 +104,12 @@ def render_sidebar():
 
         opcion = st.radio(
             "Herramienta",
-            (
-                "Validación simple de asistencia (Qbiz)",
-                "Validación de CECO y Actividad",
-                "Filtro de DNIs contra data global",
-            ),
+            tuple(HERRAMIENTAS),
             label_visibility="collapsed",
         )
 
+        render_server_load()
+
         st.markdown(
             """
             <div style="
@@ -107,13 +135,7 @@ def main():
     )
 
     opcion = render_sidebar()
-
-    if opcion == "Validación simple de asistencia (Qbiz)":
-        app_qbiz.run_app()
-    elif opcion == "Validación de CECO y Actividad":
-        app_validacion_avanzada.run_app()
-    elif opcion == "Filtro de DNIs contra data global":
-        app_baja_personal.run_app()
+    cargar_herramienta(opcion).run_app()
 
 
 if __name__ == "__main__":
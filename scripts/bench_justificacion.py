@@ -0,0 +1,134 @@
+"""
+Benchmark de la validación "sin horas y sin justificación" de ValidacionQbiz.
+
+Compara la versión anterior (dos df.apply fila por fila, copiada aquí como
+referencia) con la vectorizada _mascara_sin_justificacion sobre dos archivos
+sintéticos de asistencia:
+
+- realista: columnas D.* numéricas (1/0/vacío) y horas con time o vacías, como
+  en el export de Qbiz;
+- mixto: tipos mezclados en todas las columnas (1, 1.0, True, " 1", "nan", NaT...),
+  para comprobar que la semántica por celda no cambió.
+
+Verifica que ambas máscaras sean idénticas y reporta la mediana de varias corridas.
+
+Uso (desde la raíz del repositorio):
+    python scripts/bench_justificacion.py [--filas 100000] [--corridas 3]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from datetime import time as hora
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAIZ))
+
+from ValidacionQbiz.validation_logic import _mascara_sin_justificacion  # noqa: E402
+
+
+HR_ENTRADA = "Hr Entrada"
+HR_SALIDA = "Hr Salida"
+JUSTIFICACIONES = ["D.Ausencia", "D.Permiso", "D.Permiso Goce", "D.Vacaciones", "D.Licencia"]
+
+
+# Versión anterior, fila por fila (referencia de la semántica por celda).
+def _esta_vacio_fila(val) -> bool:
+    if pd.isna(val):
+        return True
+    s = str(val).strip()
+    return s == "" or s.lower() in ("nan", "none")
+
+
+def _alguna_justificacion_es_1(row, justificacion_cols) -> bool:
+    for c in justificacion_cols:
+        v = row.get(c)
+        if pd.notna(v) and str(v).strip() == "1":
+            return True
+    return False
+
+
+def mascara_fila_por_fila(df: pd.DataFrame, hr_entrada_col: str, hr_salida_col: str, justificacion_cols: list[str]) -> pd.Series:
+    sin_entrada_ni_salida = df.apply(
+        lambda r: _esta_vacio_fila(r[hr_entrada_col]) and _esta_vacio_fila(r[hr_salida_col]),
+        axis=1,
+    )
+    filas_sin_horas = df.loc[sin_entrada_ni_salida]
+    if filas_sin_horas.empty:
+        return pd.Series(False, index=df.index)
+    sin_justificacion = ~filas_sin_horas.apply(
+        lambda r: _alguna_justificacion_es_1(r, justificacion_cols), axis=1
+    )
+    return sin_justificacion.reindex(df.index, fill_value=False).astype(bool)
+
+
+def asistencia_realista(filas: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    entradas = np.array([hora(7, 0), hora(7, 30), None], dtype=object)
+    salidas = np.array([hora(16, 0), None], dtype=object)
+    return pd.DataFrame(
+        {
+            "DNI": rng.integers(10_000_000, 99_999_999, filas).astype(str),
+            "Nombre": rng.choice(np.array(["Ana", "Luis", None], dtype=object), filas),
+            HR_ENTRADA: rng.choice(entradas, filas, p=[0.45, 0.45, 0.1]),
+            HR_SALIDA: rng.choice(salidas, filas, p=[0.9, 0.1]),
+            **{c: rng.choice([1.0, 0.0, np.nan], filas, p=[0.02, 0.3, 0.68]) for c in JUSTIFICACIONES},
+        }
+    )
+
+
+def asistencia_mixta(filas: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    horas = np.array([hora(7, 0), None, np.nan, "", "  ", "nan", "None", "08:00", pd.NaT], dtype=object)
+    valores = np.array([1, 0, None, np.nan, " 1", "1", "x", True, "", 1.0, 100], dtype=object)
+    df = pd.DataFrame(
+        {
+            "DNI": rng.integers(10_000_000, 99_999_999, filas).astype(str),
+            "Nombre": rng.choice(np.array(["Ana", "Luis", None], dtype=object), filas),
+            HR_ENTRADA: rng.choice(horas, filas),
+            HR_SALIDA: rng.choice(horas, filas),
+            **{c: rng.choice(valores, filas) for c in JUSTIFICACIONES},
+        }
+    )
+    df["D.Permiso"] = rng.choice([1.0, np.nan, 0.0], filas)
+    df["D.Licencia"] = rng.choice([1, 0], filas)
+    return df
+
+
+def _medir(funcion, df: pd.DataFrame, corridas: int) -> tuple[float, pd.Series]:
+    tiempos = []
+    for _ in range(corridas):
+        inicio = time.perf_counter()
+        mascara = funcion(df, HR_ENTRADA, HR_SALIDA, JUSTIFICACIONES)
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos), mascara
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compara la validación de justificación fila por fila con la vectorizada.")
+    parser.add_argument("--filas", type=int, default=100_000, help="Filas de cada archivo sintético")
+    parser.add_argument("--corridas", type=int, default=3, help="Corridas por medición (se reporta la mediana)")
+    args = parser.parse_args(argv)
+
+    distintas = 0
+    for nombre, generar in [("realista", asistencia_realista), ("mixto", asistencia_mixta)]:
+        df = generar(args.filas)
+        antes, esperada = _medir(mascara_fila_por_fila, df, args.corridas)
+        ahora, mascara = _medir(_mascara_sin_justificacion, df, args.corridas)
+        iguales = mascara.equals(esperada)
+        distintas += not iguales
+        print(
+            f"{nombre:9} {args.filas} filas: fila por fila {antes:.3f} s, vectorizada {ahora:.4f} s "
+            f"({antes / ahora:.0f}x), {int(mascara.sum())} sin justificación, "
+            f"{'máscaras idénticas' if iguales else 'MÁSCARAS DISTINTAS'}"
+        )
+    return 1 if distintas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Tiempo de rerun de la pagina de resultados de ValidacionDeDatos.
+
+Valida un archivo sintetico de varios tamanos, renderiza los resultados con el
+AppTest de Streamlit y mide cada interaccion de la tabla (buscar, cambiar de
+pagina). En el servidor esas interacciones solo reejecutan el fragmento de la
+tabla y el detalle: su tiempo no debe crecer con la cantidad de personas. AppTest
+reejecuta la pagina entera, asi que tambien se informa ese tiempo (cota superior).
+
+Uso (desde la raiz del repositorio):
+    python scripts/bench_rerun.py [--personas 5000 50000] [--filas-por-persona 6]
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAIZ))
+
+from ValidacionDeDatos.validation_logic import validate_people_ceco_activity  # noqa: E402
+
+
+BUSQUEDAS = ["persona 1", "persona 12", "cam"]
+
+
+def archivo_sintetico(personas: int, filas_por_persona: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    filas = personas * filas_por_persona
+    nombres = np.array([f"Persona {i}" for i in range(personas)] + [None], dtype=object)
+    cecos = np.array(["CAM-001", "CAM-002", " CAM-003 ", "", None, 5], dtype=object)
+    actividades = np.array(["Cosecha", "PODADOR", "Lavado  de jarras", "riego", None, "Estibador"], dtype=object)
+    fechas = np.array([pd.Timestamp("2024-01-05"), pd.Timestamp("2024-01-06"), None], dtype=object)
+    return pd.DataFrame(
+        {
+            "Nombre": rng.choice(nombres, filas),
+            "DNI": rng.integers(10_000_000, 99_999_999, filas),
+            "CECO": rng.choice(cecos, filas),
+            "Actividad": rng.choice(actividades, filas),
+            "Fecha": rng.choice(fechas, filas),
+        }
+    )
+
+
+def _pagina(raiz: str, stats_path: str) -> None:
+    # Script de AppTest: se ejecuta aparte, solo ve sus argumentos.
+    import sys
+    import time
+
+    sys.path.insert(0, raiz)
+    import pandas as pd
+    import streamlit as st
+
+    from ValidacionDeDatos import app
+
+    if app.STATS_STATE_KEY not in st.session_state:
+        st.session_state[app.STATS_STATE_KEY] = pd.read_pickle(stats_path)
+    tabla = app._render_table_and_detail
+
+    def tabla_medida(*args):
+        inicio = time.perf_counter()
+        tabla(*args)
+        st.session_state.setdefault("bench_tabla", []).append(time.perf_counter() - inicio)
+
+    app._render_table_and_detail = tabla_medida
+    try:
+        inicio = time.perf_counter()
+        app._render_results(st.session_state[app.STATS_STATE_KEY], [])
+        st.session_state.setdefault("bench_pagina", []).append(time.perf_counter() - inicio)
+    finally:
+        app._render_table_and_detail = tabla
+
+
+def medir(stats_df: pd.DataFrame) -> tuple[float, float, float]:
+    """Segundos del primer render y medianas por interaccion: del fragmento de la tabla y de la pagina."""
+    from streamlit.testing.v1 import AppTest
+
+    with tempfile.TemporaryDirectory() as directorio:
+        stats_path = str(Path(directorio) / "stats.pkl")
+        stats_df.to_pickle(stats_path)
+        prueba = AppTest.from_function(_pagina, args=(str(RAIZ), stats_path), default_timeout=300)
+        prueba.run()
+        if prueba.exception:
+            raise RuntimeError(prueba.exception)
+        for consulta in BUSQUEDAS:
+            prueba.text_input[0].input(consulta).run()
+        prueba.text_input[0].input("").run()
+        prueba.number_input[0].set_value(2).run()
+        pagina = prueba.session_state["bench_pagina"]
+        tabla = prueba.session_state["bench_tabla"]
+    return pagina[0], statistics.median(tabla[1:]), statistics.median(pagina[1:])
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Tiempo de rerun de la tabla de resultados por tamano de archivo.")
+    parser.add_argument("--personas", type=int, nargs="+", default=[5_000, 50_000])
+    parser.add_argument("--filas-por-persona", type=int, default=6)
+    args = parser.parse_args(argv)
+
+    for personas in args.personas:
+        df = archivo_sintetico(personas, args.filas_por_persona)
+        stats_df = validate_people_ceco_activity(df, "Nombre", "CECO", "Actividad", "Fecha", "DNI")
+        primero, tabla, pagina = medir(stats_df)
+        print(
+            f"{personas:>7,} personas ({len(df):,} filas): primer render {primero:.3f} s; "
+            f"buscar/paginar (mediana): fragmento {tabla:.3f} s, pagina entera {pagina:.3f} s"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
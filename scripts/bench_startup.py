@@ -0,0 +1,66 @@
+"""
+Benchmark de arranque del lanzador (app.py).
+
+Mide en intérpretes nuevos (sin nada importado) cuánto tarda `import app`, que
+es lo que espera el servidor antes de pintar el menú, y cuánto agrega la primera
+vez que se elige cada herramienta (importar su módulo, con pandas). Reporta la
+mediana de varias corridas.
+
+Uso (desde la raíz del repositorio):
+    python scripts/bench_startup.py [--corridas 5]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAIZ))
+
+from app import HERRAMIENTAS  # noqa: E402  (solo el registro: pandas no se importa aquí)
+
+
+# Corre en un intérprete nuevo: imprime "segundos_lanzador segundos_herramienta".
+_MEDICION = """
+import sys, time
+sys.path.insert(0, sys.argv[1])
+inicio = time.perf_counter()
+import app
+lanzador = time.perf_counter() - inicio
+inicio = time.perf_counter()
+if sys.argv[2]:
+    app.importlib.import_module(sys.argv[2])
+print(f"{lanzador:.4f} {time.perf_counter() - inicio:.4f}")
+"""
+
+
+def medir(modulo: str, corridas: int) -> tuple[float, float]:
+    """Mediana de (segundos de import app, segundos de importar modulo después)."""
+    lanzador, herramienta = [], []
+    for _ in range(corridas):
+        salida = subprocess.run(
+            [sys.executable, "-c", _MEDICION, str(RAIZ), modulo],
+            capture_output=True, text=True, check=True, cwd=RAIZ,
+        ).stdout.split()
+        lanzador.append(float(salida[0]))
+        herramienta.append(float(salida[1]))
+    return statistics.median(lanzador), statistics.median(herramienta)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Tiempo de arranque del lanzador y de cada herramienta.")
+    parser.add_argument("--corridas", type=int, default=5, help="Corridas por medición (se reporta la mediana)")
+    args = parser.parse_args(argv)
+
+    lanzador, _ = medir("", args.corridas)
+    print(f"import app (menú listo): {lanzador:.2f} s")
+    for opcion, modulo in HERRAMIENTAS.items():
+        _, herramienta = medir(modulo, args.corridas)
+        print(f"  + primera vez '{opcion}': {herramienta:.2f} s ({modulo})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
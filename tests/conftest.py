@@ -0,0 +1,16 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(autouse=True)
+def cache_aislado(tmp_path, monkeypatch):
+    """Cache de lectura propio de cada test (no el compartido del usuario)."""
+    from Comun import ingest_cache
+
+    monkeypatch.setattr(ingest_cache, "_default_cache", ingest_cache.IngestCache(tmp_path / "cache", 64 * 1024 * 1024))
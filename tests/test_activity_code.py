@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+from ValidacionDeDatos import validation_logic
+from ValidacionDeDatos.validation_logic import resolve_activity_code_column
+
+CODIGOS = ["COS-001-L001", "COS CAM-002-L002", "LAV-003-L003"]
+
+@pytest.fixture(autouse=True)
+def cache_vacia(monkeypatch):
+    monkeypatch.setattr(validation_logic, "_ACTIVITY_CODE_COLUMN_CACHE", validation_logic.OrderedDict())
+
+
+def _archivo(codigos: list) -> pd.DataFrame:
+    n = len(codigos)
+    return pd.DataFrame(
+        {
+            "Nombre": [f"Persona {i}" for i in range(n)],
+            "CECO": ["CAM-001"] * n,
+            "Actividad": ["Cosecha"] * n,
+            "Labor": pd.Series(codigos, dtype=object),
+        }
+    )
+
+
+def _resolver(df: pd.DataFrame) -> str | None:
+    return resolve_activity_code_column(df, "Nombre", "CECO", "Actividad")
+
+
+def test_dia_sin_codigos_no_fija_la_columna():
+    assert _resolver(_archivo([None, None, None])) is None
+    assert _resolver(_archivo(CODIGOS)) == "Labor"
+
+
+def test_columna_memorizada_se_vuelve_a_puntuar():
+    assert _resolver(_archivo(CODIGOS)) == "Labor"
+    assert _resolver(_archivo(["sin codigo", "sin codigo", "otro"])) is None
+    assert _resolver(_archivo(CODIGOS)) == "Labor"
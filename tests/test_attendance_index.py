@@ -0,0 +1,61 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from ValidacionQbiz.attendance_index import AttendanceIndex
+
+
+def _asistencia(dnis: list[str], fundo: str | None, fecha: str | None = "2024-03-01") -> pd.DataFrame:
+    return pd.DataFrame({"DNI": dnis, "Fecha": fecha, "Fundo": fundo, "Nombre": "Ana"}, dtype=object)
+
+
+@pytest.fixture
+def index(tmp_path):
+    return AttendanceIndex(tmp_path / "asistencia.sqlite3")
+
+
+def test_version_corregida_reemplaza_a_la_anterior(index):
+    index.register("v1", "fundo_a.xlsx", _asistencia(["111", "222"], "A"))
+    corregida = _asistencia(["111", "333"], "A")
+
+    assert index.find_duplicates("v2", "fundo_a_v2.xlsx", corregida).empty
+    index.register("v2", "fundo_a_v2.xlsx", corregida)
+
+    assert index.stats() == {"cargas": 1, "registros": 2}
+    assert index.is_registered("v2") and not index.is_registered("v1")
+
+
+def test_otro_fundo_misma_fecha_se_cruza(index):
+    index.register("a", "fundo_a.xlsx", _asistencia(["111", "222"], "A"))
+
+    cruces = index.find_duplicates("b", "fundo_b.xlsx", _asistencia(["222"], "B"))
+    assert cruces[["DNI", "Otro archivo", "Otro fundo"]].values.tolist() == [["222", "fundo_a.xlsx", "A"]]
+
+    index.register("b", "fundo_b.xlsx", _asistencia(["222"], "B"))
+    assert index.stats() == {"cargas": 2, "registros": 3}
+
+
+def test_sin_fundo_la_version_es_por_archivo(index):
+    index.register("v1", "asistencia.xlsx", _asistencia(["111"], None))
+
+    assert index.find_duplicates("v2", "asistencia.xlsx", _asistencia(["111"], None)).empty
+    assert len(index.find_duplicates("x", "otro.xlsx", _asistencia(["111"], None))) == 1
+
+
+def test_base_anterior_sin_origen(tmp_path):
+    path = tmp_path / "asistencia.sqlite3"
+    with sqlite3.connect(path) as conn:
+        conn.executescript(
+            """
+            CREATE TABLE cargas (digest TEXT PRIMARY KEY, archivo TEXT NOT NULL, registrado TEXT NOT NULL, filas INTEGER NOT NULL);
+            CREATE TABLE asistencia (dni TEXT NOT NULL, fecha TEXT NOT NULL, fundo TEXT, nombre TEXT, digest TEXT NOT NULL);
+            INSERT INTO cargas VALUES ('v1', 'fundo_a.xlsx', '2024-03-01T08:00:00', 1);
+            INSERT INTO asistencia VALUES ('111', '2024-03-01', 'A', 'Ana', 'v1');
+            """
+        )
+    conn.close()
+
+    index = AttendanceIndex(path)
+    assert index.find_duplicates("v2", "fundo_a_v2.xlsx", _asistencia(["111"], "A")).empty
+    assert len(index.find_duplicates("b", "fundo_b.xlsx", _asistencia(["111"], "B"))) == 1
@@ -0,0 +1,31 @@
+import pandas as pd
+
+from Comun import dates
+
+
+def test_parse_dates_cache_is_bounded_by_bytes(monkeypatch):
+    monkeypatch.setattr(dates, "_cache", dates.OrderedDict())
+    monkeypatch.setattr(dates, "_cache_bytes", 0)
+    # Cada columna de 1000 filas ocupa 16 KB (fecha + puntero al texto por fila).
+    monkeypatch.setattr(dates, "_CACHE_MAX_BYTES", 40_000)
+
+    columns = [pd.Series([f"2024-01-{day:02d}"] * 1000) for day in range(1, 5)]
+    for column in columns:
+        dates.parse_dates(column)
+
+    assert len(dates._cache) == 2
+    assert dates._cache_bytes == sum(dates._entry_bytes(entry) for entry in dates._cache.values())
+    assert dates._cache_bytes <= 40_000
+    # Las que quedan son las usadas mas recientemente.
+    assert list(dates._cache) == [dates._column_key(column) for column in columns[2:]]
+
+
+def test_parse_dates_skips_columns_larger_than_budget(monkeypatch):
+    monkeypatch.setattr(dates, "_cache", dates.OrderedDict())
+    monkeypatch.setattr(dates, "_cache_bytes", 0)
+    monkeypatch.setattr(dates, "_CACHE_MAX_BYTES", 1_000)
+
+    values, display = dates.parse_dates(pd.Series(["15/01/2024", None] * 500))
+
+    assert display.iloc[0] == "2024-01-15" and display.iloc[1] == ""
+    assert not dates._cache and dates._cache_bytes == 0
@@ -0,0 +1,35 @@
+import io
+
+import pandas as pd
+from openpyxl import Workbook
+
+from Comun.excel import iter_sheet_chunks, read_sheet_columns
+
+
+def _workbook(rows) -> bytes:
+    workbook = Workbook()
+    sheet = workbook.active
+    for row in rows:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def test_projected_read_keeps_rows_with_data_outside_projection():
+    content = _workbook(
+        [
+            ["Persona", "CECO", "Horas"],
+            ["ANA", "100", 8],
+            [None, None, None],
+            [None, None, 16],
+            [None, None, None],
+        ]
+    )
+
+    expected = pd.read_excel(io.BytesIO(content), engine="openpyxl")[["Persona", "CECO"]]
+    projected = read_sheet_columns(content, columns=["Persona", "CECO"])
+
+    assert len(projected) == len(expected) == 3
+    pd.testing.assert_frame_equal(projected, expected, check_dtype=False)
+    assert sum(len(chunk) for chunk in iter_sheet_chunks(content, columns=["Persona", "CECO"])) == 3
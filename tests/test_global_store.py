@@ -0,0 +1,107 @@
+import io
+import json
+from datetime import date
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from BajaPersonalDatos.global_store import COL_DOCUMENTO, SIN_FECHA, GlobalStore
+
+
+def _excel(df: pd.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return GlobalStore(tmp_path / "global")
+
+
+def test_sin_fecha_se_agrega_entre_importaciones(store):
+    primero = _excel(pd.DataFrame({COL_DOCUMENTO: ["111", "222"], "NOMBRE": ["Ana", "Luis"]}))
+    segundo = _excel(pd.DataFrame({COL_DOCUMENTO: ["333"], "NOMBRE": ["Rosa"]}))
+
+    store.importar(primero, "primero.xlsx", None)
+    store.importar(segundo, "segundo.xlsx", None)
+
+    encontrados = store.buscar(["111", "333"])
+    assert encontrados[COL_DOCUMENTO].tolist() == ["111", "333"]
+    assert encontrados["NOMBRE"].tolist() == ["Ana", "Rosa"]
+    assert store.resumen()["filas"] == 3
+
+
+def test_sin_fecha_se_conserva_con_fecha_col(store):
+    primero = _excel(pd.DataFrame({COL_DOCUMENTO: ["111", "222"], "FECHA": ["2024-01-15", None]}))
+    segundo = _excel(pd.DataFrame({COL_DOCUMENTO: ["333", "444"], "FECHA": ["2024-01-20", None]}))
+
+    store.importar(primero, "primero.xlsx", "FECHA")
+    store.importar(segundo, "segundo.xlsx", "FECHA")
+
+    assert store.buscar(["111", "222", "333", "444"])[COL_DOCUMENTO].tolist() == ["111", "222", "333", "444"]
+    enero = store.buscar(["111", "222", "333"], date(2024, 1, 1), date(2024, 1, 31))
+    assert enero[COL_DOCUMENTO].tolist() == ["111", "333"]
+
+
+def test_global_que_cruza_meses_no_borra_el_resto_del_mes(store):
+    febrero = _excel(
+        pd.DataFrame({COL_DOCUMENTO: ["111", "222", "333"], "FECHA": ["2024-02-01", "2024-02-10", "2024-02-20"]})
+    )
+    cruce = _excel(pd.DataFrame({COL_DOCUMENTO: ["444", "555"], "FECHA": ["2024-02-29", "2024-03-01"]}))
+
+    store.importar(febrero, "febrero.xlsx", "FECHA")
+    store.importar(cruce, "cruce.xlsx", "FECHA")
+
+    encontrados = store.buscar(["111", "222", "333", "444", "555"])
+    assert encontrados[COL_DOCUMENTO].tolist() == ["111", "222", "333", "444", "555"]
+    assert store.resumen()["filas"] == 5
+
+
+def test_global_actualizado_reemplaza_misma_persona_y_fecha(store):
+    primero = _excel(pd.DataFrame({COL_DOCUMENTO: ["111", "222"], "FECHA": ["2024-02-01", "2024-02-01"], "CARGO": ["A", "B"]}))
+    segundo = _excel(pd.DataFrame({COL_DOCUMENTO: ["111", "111"], "FECHA": ["2024-02-01", "2024-02-02"], "CARGO": ["C", "D"]}))
+
+    store.importar(primero, "v1.xlsx", "FECHA")
+    store.importar(segundo, "v2.xlsx", "FECHA")
+
+    encontrados = store.buscar(["111", "222"])
+    assert encontrados[COL_DOCUMENTO].tolist() == ["222", "111", "111"]
+    assert encontrados["CARGO"].tolist() == ["B", "C", "D"]
+
+
+def test_sin_fecha_actualizado_no_duplica(store):
+    store.importar(_excel(pd.DataFrame({COL_DOCUMENTO: ["111"], "NOMBRE": ["Ana"]})), "v1.xlsx", None)
+    store.importar(_excel(pd.DataFrame({COL_DOCUMENTO: ["111", "999"], "NOMBRE": ["Ana M.", "Rosa"]})), "v2.xlsx", None)
+
+    encontrados = store.buscar(["111", "999"])
+    assert encontrados[COL_DOCUMENTO].tolist() == ["111", "999"]
+    assert encontrados["NOMBRE"].tolist() == ["Ana M.", "Rosa"]
+    assert store.resumen()["filas"] == 2
+
+
+def test_reimportar_no_duplica(store):
+    archivo = _excel(pd.DataFrame({COL_DOCUMENTO: ["111"]}))
+
+    assert store.importar(archivo, "a.xlsx", None)["importado"]
+    assert not store.importar(archivo, "a.xlsx", None)["importado"]
+    assert store.buscar(["111"])[COL_DOCUMENTO].tolist() == ["111"]
+
+
+def test_manifest_anterior_conserva_sin_fecha(store):
+    store.importar(_excel(pd.DataFrame({COL_DOCUMENTO: ["111"]})), "a.xlsx", None)
+    path = store.root / "manifest.json"
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    manifest["meses"][SIN_FECHA] = manifest.pop("sin_fecha")[0]
+    path.write_text(json.dumps(manifest), encoding="utf-8")
+
+    store.importar(_excel(pd.DataFrame({COL_DOCUMENTO: ["222"]})), "b.xlsx", None)
+    assert store.buscar(["111", "222"])[COL_DOCUMENTO].tolist() == ["111", "222"]
+
+
+def test_buscar_ignora_documentos_vacios(store):
+    store.importar(_excel(pd.DataFrame({COL_DOCUMENTO: ["111", None]})), "a.xlsx", None)
+
+    assert store.buscar(["111", None, float("nan"), ""])[COL_DOCUMENTO].tolist() == ["111"]
@@ -0,0 +1,44 @@
+import pandas as pd
+
+from ValidacionDeDatos.app import _validation_job_key
+from ValidacionDeDatos.incremental import validate_incremental
+from ValidacionDeDatos.omission_rules import _BUILTIN_RULES
+
+ENGINE_KWARGS = {
+    "person_col": "Nombre",
+    "ceco_col": "CECO",
+    "activity_col": "Actividad",
+    "date_col": None,
+    "document_col": None,
+    "activity_code_col": None,
+}
+CONFIG = {"person_col": "Nombre", "ceco_col": "CECO", "activity_col": "Actividad"}
+
+
+def _carga(cecos: list[str]) -> pd.DataFrame:
+    return pd.DataFrame({"Nombre": ["Ana", "Luis"], "CECO": cecos, "Actividad": ["Riego", "Riego"]})
+
+
+def _snapshot(df: pd.DataFrame, previous=None):
+    return validate_incremental(df, ENGINE_KWARGS, _BUILTIN_RULES, _BUILTIN_RULES.version, previous)
+
+
+def test_digest_de_la_foto_depende_solo_del_contenido():
+    _, primera, _ = _snapshot(_carga(["CAM-001", "CAM-002"]))
+    _, misma, _ = _snapshot(_carga(["CAM-001", "CAM-002"]))
+    _, otra, _ = _snapshot(_carga(["CAM-001", "CAM-003"]))
+
+    assert primera.digest == misma.digest
+    assert primera.digest != otra.digest
+
+
+def test_llave_del_trabajo_incluye_la_foto_anterior():
+    archivo = b"mismo archivo"
+    _, v1, _ = _snapshot(_carga(["CAM-001", "CAM-002"]))
+    _, v2, _ = _snapshot(_carga(["CAM-001", "CAM-003"]))
+
+    llaves = {
+        _validation_job_key(archivo, "Hoja1", CONFIG, _BUILTIN_RULES, previous)
+        for previous in [None, v1, v2]
+    }
+    assert len(llaves) == 3
@@ -0,0 +1,53 @@
+import os
+import stat
+
+import pandas as pd
+import pytest
+
+from Comun.ingest_cache import IngestCache
+
+
+def _loader(calls):
+    def load(buffer):
+        calls.append(buffer.read())
+        return pd.DataFrame({"valor": [1, "a"]})
+
+    return load
+
+
+def test_cache_directory_is_private(tmp_path):
+    directory = tmp_path / "cache"
+    calls = []
+    cache = IngestCache(directory, 1024 * 1024)
+
+    first = cache.load(b"contenido", _loader(calls), "hoja")
+    second = cache.load(b"contenido", _loader(calls), "hoja")
+
+    pd.testing.assert_frame_equal(first, second)
+    assert len(calls) == 1
+    if os.name != "nt":
+        assert stat.S_IMODE(directory.stat().st_mode) == 0o700
+
+
+@pytest.mark.skipif(os.name == "nt", reason="permisos POSIX")
+def test_shared_directory_is_made_private(tmp_path):
+    directory = tmp_path / "cache"
+    directory.mkdir(mode=0o777)
+    os.chmod(directory, 0o777)
+
+    IngestCache(directory, 1024 * 1024).load(b"contenido", _loader([]), "hoja")
+
+    assert stat.S_IMODE(directory.stat().st_mode) == 0o700
+
+
+@pytest.mark.skipif(os.name == "nt", reason="permisos POSIX")
+def test_directory_of_another_user_is_not_used(tmp_path, monkeypatch):
+    calls = []
+    cache = IngestCache(tmp_path / "cache", 1024 * 1024)
+    monkeypatch.setattr(os, "getuid", lambda: os.stat(tmp_path).st_uid + 1)
+
+    cache.load(b"contenido", _loader(calls), "hoja")
+    cache.load(b"contenido", _loader(calls), "hoja")
+
+    assert len(calls) == 2
+    assert not list((tmp_path / "cache").glob("*.p*"))
@@ -0,0 +1,102 @@
+import pandas as pd
+import pytest
+
+from ValidacionDeDatos.incremental import validate_incremental
+from ValidacionDeDatos.omission_rules import (
+    DEFAULT_RULES_PATH,
+    CompiledOmissionRules,
+    _validate_spec,
+    load_omission_rules,
+)
+from ValidacionDeDatos.parallel import validate_people_groups
+from ValidacionDeDatos.streaming import validate_file_streaming
+from ValidacionDeDatos.validation_logic import DEFAULT_OMISSION_MATCHER, OMITTED_CECO_OBSERVATION
+
+OMITTED_COL = "Filas Omitidas CECO"
+
+ENGINE_KWARGS = {
+    "person_col": "Persona",
+    "ceco_col": "CECO",
+    "activity_col": "Actividad",
+    "date_col": None,
+    "document_col": None,
+    "activity_code_col": None,
+}
+
+
+def _fundo_rules() -> CompiledOmissionRules:
+    spec = {"excepciones": [{"nombre": "Poda en Norte", "columna": "Fundo", "valores": ["NORTE"], "actividades": ["poda"]}]}
+    return CompiledOmissionRules(spec, source="test", version="test")
+
+
+def _df() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Persona": ["ANA", "ANA", "LUIS", "LUIS"],
+            "CECO": ["100", None, "200", None],
+            "Actividad": ["riego", "poda", "riego", "poda"],
+            "Fundo": ["NORTE", "NORTE", "SUR", "SUR"],
+        }
+    )
+
+
+def test_rules_expose_override_columns():
+    assert _fundo_rules().columns == ("Fundo",)
+
+
+def test_column_override_applies_in_shards():
+    stats_df, _ = validate_people_groups(_df(), ENGINE_KWARGS, _fundo_rules(), shards=2)
+
+    assert stats_df.set_index("Persona")[OMITTED_COL].to_dict() == {"ANA": 1, "LUIS": 0}
+
+
+def test_column_override_applies_incrementally():
+    rules = _fundo_rules()
+    stats_df, snapshot, _ = validate_incremental(_df(), ENGINE_KWARGS, rules, rules.version)
+    assert stats_df.set_index("Persona")[OMITTED_COL].to_dict() == {"ANA": 1, "LUIS": 0}
+
+    # Cambiar solo el Fundo cambia la huella de la persona y se revalida.
+    moved = _df().assign(Fundo="NORTE")
+    stats_df, _, changes = validate_incremental(moved, ENGINE_KWARGS, rules, rules.version, previous=snapshot)
+    assert changes["modificadas"] == 1
+    assert stats_df.set_index("Persona")[OMITTED_COL].to_dict() == {"ANA": 1, "LUIS": 1}
+
+
+def test_column_override_applies_streaming():
+    content = _df().to_csv(index=False).encode("utf-8")
+    stats_df, _ = validate_file_streaming(
+        content,
+        "Persona",
+        "CECO",
+        "Actividad",
+        rules=_fundo_rules(),
+        infer_activity_code=False,
+        file_format="csv",
+        rule_columns=("Fundo",),
+    )
+
+    assert stats_df.set_index("Persona")[OMITTED_COL].to_dict() == {"ANA": 1, "LUIS": 0}
+
+
+def test_observation_does_not_name_builtin_activities():
+    stats_df, _ = validate_people_groups(_df(), ENGINE_KWARGS, _fundo_rules(), shards=1)
+
+    observations = stats_df.set_index("Persona").loc["ANA", "Observaciones"]
+    assert OMITTED_CECO_OBSERVATION in observations
+    assert "Cosecha" not in observations
+
+
+def test_shipped_rules_use_builtin_lists():
+    rules = load_omission_rules(DEFAULT_RULES_PATH)
+
+    assert rules.base.activity_pattern.pattern == DEFAULT_OMISSION_MATCHER.activity_pattern.pattern
+    assert rules.base.prefixes_by_length == DEFAULT_OMISSION_MATCHER.prefixes_by_length
+
+
+@pytest.mark.parametrize(
+    "regexes",
+    [["(?P<tipo>poda)", "(?P<tipo>riego)"], ["poda", "(?i)riego"]],
+)
+def test_regexes_that_only_fail_combined_are_rejected(regexes):
+    with pytest.raises(ValueError, match="no se pueden combinar"):
+        _validate_spec({"excepciones": [{"regex_actividad": regexes}]}, "reglas.json")
@@ -0,0 +1,23 @@
+import pandas as pd
+
+from ValidacionDeDatos.parallel import validate_people_parallel
+from ValidacionDeDatos.validation_logic import validate_people_ceco_activity
+
+
+def test_parallel_matches_serial_with_mixed_dates():
+    df = pd.DataFrame(
+        {
+            "Persona": ["ANA", "ANA", "LUIS", "LUIS", "ROSA", "ROSA", "PEDRO"],
+            "CECO": ["100", "101", "200", "200", "300", None, "400"],
+            "Actividad": ["Riego", "Cosecha", "Poda", "Poda", "Riego", "Riego", "Acopio"],
+            "Fecha": [
+                "13/02/2024", pd.Timestamp("2024-02-14"), "01/02/2024", 45352, "2024-03-05", None, "sin fecha",
+            ],
+        }
+    )
+    kwargs = {"date_col": "Fecha", "infer_activity_code": False}
+
+    serial = validate_people_ceco_activity(df, "Persona", "CECO", "Actividad", **kwargs)
+    parallel = validate_people_parallel(df, "Persona", "CECO", "Actividad", shards=3, **kwargs)
+
+    pd.testing.assert_frame_equal(parallel, serial)
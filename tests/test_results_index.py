@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from ValidacionDeDatos.results_index import ResultsIndex, TextIndex
+from ValidacionDeDatos.validation_logic import validate_people_ceco_activity
+
+
+def _stats() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Persona": ["ANA PEREZ", "ANALIA RUIZ", "LUIS ANAYA", "ROSA DIAZ"],
+            "Observaciones": ["", "Tiene mas de un CECO", "", ""],
+        }
+    )
+
+
+def test_sessions_do_not_share_incremental_search():
+    index = TextIndex(_stats(), ["Persona"])
+    first, second = {}, {}
+
+    assert index.contains("ana", first).tolist() == [True, True, True, False]
+    assert index.contains("ros", second).tolist() == [False, False, False, True]
+    # La sesion first sigue escribiendo: parte de sus filas, no de las de second.
+    assert index.contains("ana p", first).tolist() == [True, False, False, False]
+    assert index.contains("rosa", second).tolist() == [False, False, False, True]
+
+
+def test_state_from_another_index_is_ignored():
+    state = {}
+    TextIndex(_stats(), ["Persona"]).contains("ana", state)
+    other = TextIndex(_stats().iloc[::-1], ["Persona"])
+
+    assert other.contains("ana p", state).tolist() == [False, False, False, True]
+
+
+def test_select_without_state_matches_with_state():
+    df = pd.DataFrame(
+        {
+            "Persona": ["ANA PEREZ", "ANALIA RUIZ", "ANALIA RUIZ", "LUIS ANAYA", "ROSA DIAZ"],
+            "CECO": ["100", "200", "201", "300", "400"],
+            "Actividad": ["Riego", "Poda", "Poda", "Cosecha", "Riego"],
+        }
+    )
+    index = ResultsIndex(validate_people_ceco_activity(df, "Persona", "CECO", "Actividad"), [])
+    state = {}
+    for query in ["a", "an", "ana", "anal", "ros", "20", "200"]:
+        np.testing.assert_array_equal(
+            index.select(search_query=query, search_state=state), index.select(search_query=query)
+        )
@@ -0,0 +1,40 @@
+import pandas as pd
+
+from Comun import dates
+from ValidacionDeDatos.streaming import validate_file_streaming
+from ValidacionDeDatos.validation_logic import validate_people_ceco_activity
+
+
+def _df() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Persona": ["ANA", "ANA", "LUIS", "LUIS", "ROSA", "ROSA", "ANA", "LUIS"],
+            "CECO": ["100", "101", "200", "200", "300", "", "100", "201"],
+            "Actividad": ["Riego", "Cosecha", "Poda", "Poda", "Riego", "Riego", "Acopio", "Poda"],
+            "Fecha": [
+                "13/02/2024", "14/02/2024", "2024-02-01", "01/03/2024", "02/03/2024", "", "2024-03-05", "05/03/2024",
+            ],
+        }
+    )
+
+
+def test_streaming_infers_date_format_once(monkeypatch):
+    guesses = []
+    original = dates.guess_datetime_format
+
+    def counting_guess(text, dayfirst=False):
+        guesses.append(text)
+        return original(text, dayfirst=dayfirst)
+
+    monkeypatch.setattr(dates, "guess_datetime_format", counting_guess)
+    content = _df().to_csv(index=False).encode("utf-8")
+
+    streamed, file_dates = validate_file_streaming(
+        content, "Persona", "CECO", "Actividad", date_col="Fecha", file_format="csv", chunk_rows=2
+    )
+
+    # Una inferencia por familia de texto (dia primero e ISO) para todo el archivo, no por bloque.
+    assert guesses == ["13/02/2024", "2024-02-01"]
+    in_memory = validate_people_ceco_activity(_df(), "Persona", "CECO", "Actividad", date_col="Fecha")
+    pd.testing.assert_series_equal(streamed["Fechas Persona"], in_memory["Fechas Persona"])
+    assert file_dates == ["2024-02-01", "2024-02-13", "2024-02-14", "2024-03-01", "2024-03-02", "2024-03-05"]
@@ -0,0 +1,86 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ValidacionDeDatos.validation_logic import validate_people_ceco_activity
+
+
+def _mixed_df() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Persona": ["ANA", "ANA", "ANA", "LUIS", "LUIS", "ROSA", "ROSA", None, None, "PEDRO", "PEDRO", "ANA"],
+            "DNI": ["111", "111", "111", 222, 222, "333", None, "444", "444", "555", "555", "111"],
+            # 100 y 100.0 (o 1 y True) son iguales para pd.factorize pero no como texto.
+            "CECO": [100, "100", 100.0, "A-200", None, 1, True, 400, np.nan, " ", "500", 101],
+            "Actividad": [
+                "Riego", "Cosecha", "riego ", "Poda", "Poda", "Lavado  de jarras", "Fumigacion",
+                None, "Acopio", "Riego", "Riego", "Estibadores",
+            ],
+            "Cod": [
+                "RIE-001-L001", "COSEC-008-L002", "RIE-001-L001", "PODA-020-L010", "PODA-021-L010",
+                None, "FITO-016-L003", "", "OPER-014-L001", "RIE-001-L001", 12345, "RIE-002-L001",
+            ],
+            "Fecha": [
+                "2024-01-15", "2024-01-15", "2024-01-16", "15/01/2024", None, "2024-01-15",
+                "2024-01-15", pd.Timestamp("2024-02-01"), "2024-02-01", "2024-01-15", "2024-01-15", "2024-01-17",
+            ],
+        }
+    )
+
+
+@pytest.mark.parametrize("activity_code_col", [None, "Cod"])
+@pytest.mark.parametrize("date_col", [None, "Fecha"])
+def test_vectorized_matches_loop(activity_code_col, date_col):
+    kwargs = {
+        "person_col": "Persona",
+        "ceco_col": "CECO",
+        "activity_col": "Actividad",
+        "date_col": date_col,
+        "document_col": "DNI",
+        "activity_code_col": activity_code_col,
+    }
+
+    loop = validate_people_ceco_activity(_mixed_df(), engine="loop", **kwargs)
+    vectorized = validate_people_ceco_activity(_mixed_df(), engine="vectorized", **kwargs)
+
+    assert not loop.empty
+    pd.testing.assert_frame_equal(vectorized, loop, check_dtype=False)
+
+
+def test_loop_rejects_custom_rules():
+    with pytest.raises(ValueError):
+        validate_people_ceco_activity(
+            _mixed_df(), "Persona", "CECO", "Actividad", engine="loop", rules=object()
+        )
+
+
+def test_distinct_hit_ratio_reaches_the_job_result():
+    from ValidacionDeDatos.app import _validation_job
+    from ValidacionDeDatos.omission_rules import _BUILTIN_RULES
+
+    # 3 CECO y 2 actividades distintos en 300 filas: casi todo se resuelve desde el diccionario.
+    df = pd.DataFrame(
+        {
+            "Persona": [f"P{i % 30}" for i in range(300)],
+            "CECO": ["100", "200", "300"] * 100,
+            "Actividad": ["Riego", "Poda"] * 150,
+        }
+    )
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    config = {
+        "person_col": "Persona",
+        "ceco_col": "CECO",
+        "activity_col": "Actividad",
+        "date_col": None,
+        "document_col": None,
+        "activity_code_col": None,
+    }
+
+    result = _validation_job(
+        buffer.getvalue(), 0, df.head(50), config, _BUILTIN_RULES, len(df), None, "test", lambda *args: None
+    )
+
+    assert 0.9 < result["distinct_hit_ratio"] < 1.0
@@ -0,0 +1,47 @@
+import threading
+from concurrent.futures import Future
+
+from Comun.workers import WorkerPool, _timed_call
+
+
+def _finished_future(task) -> Future:
+    future = Future()
+    future.set_result(_timed_call(task.fn, task.args, task.kwargs))
+    return future
+
+
+def test_already_finished_future_does_not_deadlock(monkeypatch):
+    pool = WorkerPool(max_workers=1)
+    monkeypatch.setattr(pool, "_submit_to_executor", _finished_future)
+    results = []
+
+    def submit_all():
+        futures = [pool.submit("s1", max, index, 2) for index in range(4)]
+        results.extend(future.result(timeout=5) for future in futures)
+
+    thread = threading.Thread(target=submit_all, daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+
+    assert not thread.is_alive()
+    assert results == [2, 2, 2, 3]
+    assert pool.metrics()["completadas"] == 4
+    assert pool.metrics()["en_ejecucion"] == 0
+
+
+def test_callback_may_submit_again(monkeypatch):
+    pool = WorkerPool(max_workers=1)
+    monkeypatch.setattr(pool, "_submit_to_executor", _finished_future)
+    chained = []
+
+    def submit_chain():
+        first = pool.submit("s1", abs, -1)
+        first.add_done_callback(lambda _: chained.append(pool.submit("s1", abs, -2)))
+        first.result(timeout=5)
+
+    thread = threading.Thread(target=submit_chain, daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+
+    assert not thread.is_alive()
+    assert chained[0].result(timeout=5) == 2